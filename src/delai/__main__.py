@@ -15,6 +15,14 @@ import uvicorn
 
 from .api import create_app
 from .config import ServiceConfig, default_config
+from .processors import (
+    COMPRESSION_PROFILES,
+    DelaySettings,
+    HistorySettings,
+    StationSettings,
+    TransferSettings,
+    check_protobuf_backend,
+)
 from .service import DownloadResult, DownloadService
 from .sources.base import DataSource, DownloadTarget
 
@@ -54,6 +62,69 @@ def build_parser() -> argparse.ArgumentParser:
         default="0.0.0.0",
         help="Host/IP where the HTTP API should listen",
     )
+    parser.add_argument(
+        "--static-compression",
+        default="default",
+        choices=sorted(COMPRESSION_PROFILES),
+        help="Compression profile used for the consolidated GTFS.zip",
+    )
+    parser.add_argument(
+        "--stop-times-memory-limit",
+        type=int,
+        default=None,
+        metavar="MIB",
+        help="Sort stop_times.txt externally, spilling to disk above this many MiB",
+    )
+    parser.add_argument(
+        "--static-window-days",
+        type=int,
+        default=None,
+        metavar="DAYS",
+        help="Also write GTFS-window.zip with only the trips running today and the next DAYS-1 days",
+    )
+    parser.add_argument(
+        "--transfer-distance",
+        type=float,
+        default=None,
+        metavar="METRES",
+        help="Generate walking transfers between agencies' stops within this distance",
+    )
+    parser.add_argument(
+        "--station-distance",
+        type=float,
+        default=None,
+        metavar="METRES",
+        help="Group equally named stops of different agencies within this distance into parent stations",
+    )
+    parser.add_argument(
+        "--deduplicate-shapes",
+        action="store_true",
+        help="Collapse geometrically identical shapes in GTFS.zip onto one shape_id",
+    )
+    parser.add_argument(
+        "--strict-validation",
+        action="store_true",
+        help="Keep the previous GTFS.zip when the new bundle has dangling references",
+    )
+    parser.add_argument(
+        "--realtime-history-days",
+        type=float,
+        default=None,
+        metavar="DAYS",
+        help="Archive consolidated TripUpdates and VehiclePositions snapshots for this many days",
+    )
+    parser.add_argument(
+        "--delay-half-life",
+        type=float,
+        default=None,
+        metavar="MINUTES",
+        help="How quickly older observations fade from the per-route and per-stop delay statistics",
+    )
+    parser.add_argument(
+        "--partition-routes",
+        action="store_true",
+        help="Also split TripUpdates and VehiclePositions into one feed per route_id",
+    )
     return parser
 
 
@@ -181,9 +252,43 @@ def main(argv: Sequence[str] | None = None) -> int:
     args = parser.parse_args(argv)
 
     configure_logging(args.log_level)
+    check_protobuf_backend()
 
     config = default_config(output_dir=args.output)
-    service = DownloadService(config.sources, config.output_dir)
+    service = DownloadService(
+        config.sources,
+        config.output_dir,
+        static_compression=COMPRESSION_PROFILES[args.static_compression],
+        stop_times_memory_limit=(
+            args.stop_times_memory_limit * 1024 * 1024
+            if args.stop_times_memory_limit is not None
+            else None
+        ),
+        static_window_days=args.static_window_days,
+        static_transfers=(
+            TransferSettings(max_distance=args.transfer_distance)
+            if args.transfer_distance is not None
+            else None
+        ),
+        static_stations=(
+            StationSettings(max_distance=args.station_distance)
+            if args.station_distance is not None
+            else None
+        ),
+        deduplicate_shapes=args.deduplicate_shapes,
+        strict_validation=args.strict_validation,
+        realtime_history=(
+            HistorySettings(retention_days=args.realtime_history_days)
+            if args.realtime_history_days is not None
+            else None
+        ),
+        delay_settings=(
+            DelaySettings(half_life_minutes=args.delay_half_life)
+            if args.delay_half_life is not None
+            else None
+        ),
+        partition_routes=args.partition_routes,
+    )
 
     if not config.sources:
         RUNNER_LOGGER.warning("No data sources configured. The API will serve 404 responses.")
@@ -2,29 +2,83 @@ from __future__ import annotations
 
 import json
 import threading
+from datetime import date
 from pathlib import Path
 from typing import Any, Callable
 
-from fastapi import FastAPI, HTTPException, Response, status
+from fastapi import FastAPI, HTTPException, Query, Request, Response, status
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import FileResponse
 
+from .processors import (
+    AGENCY_PARTITIONS_DIRNAME,
+    CHECKSUM_SUFFIX,
+    DELAY_DIMENSIONS,
+    ROUTE_PARTITIONS_DIRNAME,
+    VERSIONS_SUFFIX,
+    DelayStatistics,
+    DelayStatisticsError,
+    RealtimeFeedError,
+    ServiceCalendarError,
+    StopSearchError,
+    build_differential_feed,
+    empty_partition,
+    load_delay_statistics,
+    load_feed_versions,
+    load_realtime_index,
+    load_service_calendar,
+    load_stop_search_index,
+    partition_path,
+    read_checksum,
+)
 from .service import (
     APPROVED_INCIDENTS_FILENAME,
+    COMBINED_REALTIME_DIRNAME,
+    COMBINED_REALTIME_FILENAME,
+    DELAY_STATISTICS_FILENAME,
+    CONSOLIDATED_SQLITE_FILENAME,
     CONSOLIDATED_STATIC_FILENAME,
     DISPATCHER_ALERTS_FILENAME,
     RAW_INCIDENTS_FILENAME,
     RAW_SERVICE_ALERTS_FILENAME,
     RAW_TRIP_UPDATES_FILENAME,
     RAW_VEHICLE_POSITIONS_FILENAME,
+    ROUTE_GEOMETRY_DIRNAME,
     SERVICE_ALERTS_JSON_FILENAME,
+    SERVICE_CALENDAR_FILENAME,
+    STATIC_DIFF_FILENAME,
+    STOP_SEARCH_FILENAME,
+    VALIDATION_REPORT_FILENAME,
+    WINDOW_STATIC_FILENAME,
 )
 
 
 RAW_STATIC_ROUTE = f"/api/v1/raw-static/{CONSOLIDATED_STATIC_FILENAME}"
+RAW_STATIC_CHECKSUM_ROUTE = f"{RAW_STATIC_ROUTE}{CHECKSUM_SUFFIX}"
+RAW_STATIC_SQLITE_ROUTE = f"/api/v1/raw-static/{CONSOLIDATED_SQLITE_FILENAME}"
+RAW_STATIC_WINDOW_ROUTE = f"/api/v1/raw-static/{WINDOW_STATIC_FILENAME}"
 RAW_SERVICE_ALERTS_ROUTE = f"/api/v1/raw-service-alerts/{RAW_SERVICE_ALERTS_FILENAME}"
 RAW_TRIP_UPDATES_ROUTE = f"/api/v1/raw-trip-updates/{RAW_TRIP_UPDATES_FILENAME}"
 RAW_VEHICLE_POSITIONS_ROUTE = f"/api/v1/raw-vehicle-positions/{RAW_VEHICLE_POSITIONS_FILENAME}"
+RAW_REALTIME_ROUTE = f"/api/v1/raw-realtime/{COMBINED_REALTIME_FILENAME}"
+TRIP_UPDATES_CHANGES_ROUTE = "/api/v1/raw-trip-updates/changes"
+VEHICLE_POSITIONS_CHANGES_ROUTE = "/api/v1/raw-vehicle-positions/changes"
+TRIP_UPDATES_AGENCY_PARTITION_ROUTE = "/api/v1/raw-trip-updates/agencies/{agency_id}"
+TRIP_UPDATES_ROUTE_PARTITION_ROUTE = "/api/v1/raw-trip-updates/routes/{route_id}"
+VEHICLE_POSITIONS_AGENCY_PARTITION_ROUTE = "/api/v1/raw-vehicle-positions/agencies/{agency_id}"
+VEHICLE_POSITIONS_ROUTE_PARTITION_ROUTE = "/api/v1/raw-vehicle-positions/routes/{route_id}"
+TRIP_UPDATES_ROUTE = "/api/v1/trip-updates"
+VEHICLE_POSITIONS_ROUTE = "/api/v1/vehicle-positions"
+DELAYS_ROUTE = "/api/v1/delays"
+FEED_VERSION_HEADER = "X-Feed-Version"
+ROUTE_GEOMETRY_ROUTE = "/api/v1/route-geometry"
+ACTIVE_SERVICES_ROUTE = "/api/v1/active-services"
+STOP_SEARCH_ROUTE = "/api/v1/stops/search"
+
+_ROUTE_GEOMETRY_FORMATS = {
+    "geojson": "geojson",
+    "polyline": "polyline.json",
+}
 
 
 def create_app(output_dir: Path, source_slug: str) -> FastAPI:
@@ -36,7 +90,7 @@ def create_app(output_dir: Path, source_slug: str) -> FastAPI:
         allow_origins=["*"],
         allow_methods=["*"],
         allow_headers=["*"],
-        expose_headers=["Content-Disposition"],
+        expose_headers=["Content-Disposition", FEED_VERSION_HEADER],
     )
     io_lock = threading.Lock()
     base_dir = output_dir / source_slug
@@ -44,6 +98,7 @@ def create_app(output_dir: Path, source_slug: str) -> FastAPI:
     raw_incidents_path = servicealerts_dir / RAW_INCIDENTS_FILENAME
     approved_incidents_path = servicealerts_dir / APPROVED_INCIDENTS_FILENAME
     dispatcher_alerts_path = servicealerts_dir / DISPATCHER_ALERTS_FILENAME
+    index_cache: dict[Path, tuple[int, Any]] = {}
 
     def _resolve_path(resolver: Callable[[Path], Path]) -> Path:
         resolved_path = resolver(base_dir)
@@ -53,12 +108,27 @@ def create_app(output_dir: Path, source_slug: str) -> FastAPI:
 
     def _serve(path: Path) -> FileResponse:
         media_type = {
+            ".geojson": "application/geo+json",
             ".zip": "application/zip",
             ".pb": "application/octet-stream",
             ".json": "application/json",
+            ".sqlite": "application/vnd.sqlite3",
+            CHECKSUM_SUFFIX: "text/plain",
         }.get(path.suffix.lower(), "application/octet-stream")
         return FileResponse(path, media_type=media_type, filename=path.name)
 
+    def _serve_bundle(path: Path, request: Request) -> Response:
+        # Bundles are reproducible, so their digest is a stable strong validator.
+        digest = read_checksum(path)
+        if digest is None:
+            return _serve(path)
+        etag = f'"{digest}"'
+        if etag in request.headers.get("if-none-match", ""):
+            return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+        response = _serve(path)
+        response.headers["ETag"] = etag
+        return response
+
     def _load_json_document(path: Path) -> Any:
         try:
             with path.open("r", encoding="utf-8") as handle:
@@ -67,8 +137,96 @@ def create_app(output_dir: Path, source_slug: str) -> FastAPI:
             raise HTTPException(status_code=500, detail=f"Failed to read {path.name}") from exc
 
     @app.get(RAW_STATIC_ROUTE)
-    def get_raw_static() -> FileResponse:
+    def get_raw_static(request: Request) -> Response:
         path = _resolve_path(lambda base: base / "static" / CONSOLIDATED_STATIC_FILENAME)
+        return _serve_bundle(path, request)
+
+    @app.get(RAW_STATIC_CHECKSUM_ROUTE)
+    def get_raw_static_checksum() -> FileResponse:
+        path = _resolve_path(
+            lambda base: base / "static" / f"{CONSOLIDATED_STATIC_FILENAME}{CHECKSUM_SUFFIX}"
+        )
+        return _serve(path)
+
+    @app.get(RAW_STATIC_SQLITE_ROUTE)
+    def get_raw_static_sqlite() -> FileResponse:
+        path = _resolve_path(lambda base: base / "static" / CONSOLIDATED_SQLITE_FILENAME)
+        return _serve(path)
+
+    @app.get(RAW_STATIC_WINDOW_ROUTE)
+    def get_raw_static_window(request: Request) -> Response:
+        path = _resolve_path(lambda base: base / "static" / WINDOW_STATIC_FILENAME)
+        return _serve_bundle(path, request)
+
+    @app.get("/api/v1/static-diff")
+    def get_static_diff() -> Any:
+        path = _resolve_path(lambda base: base / "static" / STATIC_DIFF_FILENAME)
+        return _load_json_document(path)
+
+    def _load_index(path: Path, loader: Callable[[Path], Any]) -> Any:
+        # Indexes only change when the file behind them is replaced, so keep them parsed.
+        modified = path.stat().st_mtime_ns
+        with io_lock:
+            cached = index_cache.get(path)
+            if cached is not None and cached[0] == modified:
+                return cached[1]
+        try:
+            index = loader(path)
+        except (
+            ServiceCalendarError,
+            StopSearchError,
+            RealtimeFeedError,
+            DelayStatisticsError,
+        ) as exc:  # pragma: no cover - defensive
+            raise HTTPException(status_code=500, detail=f"Failed to read {path.name}") from exc
+        with io_lock:
+            index_cache[path] = (modified, index)
+        return index
+
+    @app.get("/api/v1/static-validation")
+    def get_static_validation() -> Any:
+        path = _resolve_path(lambda base: base / "static" / VALIDATION_REPORT_FILENAME)
+        return _load_json_document(path)
+
+    @app.get(ACTIVE_SERVICES_ROUTE)
+    def get_active_services(
+        service_date: date | None = Query(None, alias="date"),
+        include_trips: bool = False,
+    ) -> dict[str, Any]:
+        path = _resolve_path(lambda base: base / "static" / SERVICE_CALENDAR_FILENAME)
+        calendar = _load_index(path, load_service_calendar)
+        day = service_date or date.today()
+        payload: dict[str, Any] = {
+            "date": day.isoformat(),
+            "service_ids": calendar.active_services(day),
+        }
+        if include_trips:
+            payload["trip_ids"] = calendar.active_trips(day)
+        return payload
+
+    @app.get(STOP_SEARCH_ROUTE)
+    def search_stops(
+        q: str,
+        limit: int = Query(10, ge=1, le=50),
+    ) -> list[dict[str, Any]]:
+        path = _resolve_path(lambda base: base / "static" / STOP_SEARCH_FILENAME)
+        index = _load_index(path, load_stop_search_index)
+        return [entry.to_payload() for entry in index.search(q, limit)]
+
+    @app.get(ROUTE_GEOMETRY_ROUTE)
+    def get_route_geometry(
+        zoom: int,
+        geometry_format: str = Query("geojson", alias="format"),
+    ) -> FileResponse:
+        suffix = _ROUTE_GEOMETRY_FORMATS.get(geometry_format)
+        if suffix is None:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Unsupported geometry format: {geometry_format}",
+            )
+        path = _resolve_path(
+            lambda base: base / "static" / ROUTE_GEOMETRY_DIRNAME / f"routes-z{zoom}.{suffix}"
+        )
         return _serve(path)
 
     @app.get(RAW_SERVICE_ALERTS_ROUTE)
@@ -90,6 +248,152 @@ def create_app(output_dir: Path, source_slug: str) -> FastAPI:
         )
         return _serve(path)
 
+    @app.get(RAW_REALTIME_ROUTE)
+    def get_raw_realtime() -> FileResponse:
+        path = _resolve_path(
+            lambda base: base / COMBINED_REALTIME_DIRNAME / COMBINED_REALTIME_FILENAME
+        )
+        return _serve(path)
+
+    def _serve_changes(path: Path, since: int | None) -> Response:
+        # The journal is replaced after the feed, so reading it first never
+        # pairs a journal with an older feed.
+        journal = path.with_name(f"{path.name}{VERSIONS_SUFFIX}")
+        versions = (
+            _load_index(journal, lambda _: load_feed_versions(path)) if journal.exists() else None
+        )
+        data = path.read_bytes()
+        if versions is None:
+            return Response(data, media_type="application/octet-stream")
+
+        headers = {FEED_VERSION_HEADER: str(versions.version)}
+        if since is not None:
+            differential = build_differential_feed(data, versions, since)
+            if differential is not None:
+                return Response(differential, media_type="application/octet-stream", headers=headers)
+        return Response(data, media_type="application/octet-stream", headers=headers)
+
+    @app.get(TRIP_UPDATES_CHANGES_ROUTE)
+    def get_trip_updates_changes(since: int | None = Query(None, ge=0)) -> Response:
+        path = _resolve_path(lambda base: base / "tripupdates" / RAW_TRIP_UPDATES_FILENAME)
+        return _serve_changes(path, since)
+
+    @app.get(VEHICLE_POSITIONS_CHANGES_ROUTE)
+    def get_vehicle_positions_changes(since: int | None = Query(None, ge=0)) -> Response:
+        path = _resolve_path(
+            lambda base: base / "vehiclepositions" / RAW_VEHICLE_POSITIONS_FILENAME
+        )
+        return _serve_changes(path, since)
+
+    def _serve_partition(feed_path: Path, dirname: str, key: str) -> Response:
+        directory = feed_path.parent / dirname
+        if not directory.is_dir():
+            raise HTTPException(status_code=404, detail="Requested artifact is not available")
+        path = partition_path(directory, key)
+        if path.is_file():
+            return _serve(path)
+        # The feed is current but has no entities for this key right now.
+        return Response(
+            empty_partition(feed_path.read_bytes()),
+            media_type="application/octet-stream",
+        )
+
+    @app.get(TRIP_UPDATES_AGENCY_PARTITION_ROUTE)
+    def get_trip_updates_for_agency(agency_id: str) -> Response:
+        path = _resolve_path(lambda base: base / "tripupdates" / RAW_TRIP_UPDATES_FILENAME)
+        return _serve_partition(path, AGENCY_PARTITIONS_DIRNAME, agency_id)
+
+    @app.get(TRIP_UPDATES_ROUTE_PARTITION_ROUTE)
+    def get_trip_updates_for_route(route_id: str) -> Response:
+        path = _resolve_path(lambda base: base / "tripupdates" / RAW_TRIP_UPDATES_FILENAME)
+        return _serve_partition(path, ROUTE_PARTITIONS_DIRNAME, route_id)
+
+    @app.get(VEHICLE_POSITIONS_AGENCY_PARTITION_ROUTE)
+    def get_vehicle_positions_for_agency(agency_id: str) -> Response:
+        path = _resolve_path(
+            lambda base: base / "vehiclepositions" / RAW_VEHICLE_POSITIONS_FILENAME
+        )
+        return _serve_partition(path, AGENCY_PARTITIONS_DIRNAME, agency_id)
+
+    @app.get(VEHICLE_POSITIONS_ROUTE_PARTITION_ROUTE)
+    def get_vehicle_positions_for_route(route_id: str) -> Response:
+        path = _resolve_path(
+            lambda base: base / "vehiclepositions" / RAW_VEHICLE_POSITIONS_FILENAME
+        )
+        return _serve_partition(path, ROUTE_PARTITIONS_DIRNAME, route_id)
+
+    def _query_realtime(
+        path: Path,
+        trip_id: str | None,
+        route_id: str | None,
+        stop_id: str | None,
+        vehicle_id: str | None,
+    ) -> dict[str, Any]:
+        filters = {
+            "trip_id": trip_id,
+            "route_id": route_id,
+            "stop_id": stop_id,
+            "vehicle_id": vehicle_id,
+        }
+        if not any(filters.values()):
+            raise HTTPException(
+                status_code=400,
+                detail="Provide trip_id, route_id, stop_id or vehicle_id",
+            )
+        # A new index is built once per refreshed feed and swapped in whole.
+        index = _load_index(path, load_realtime_index)
+        return index.to_payload(index.lookup(filters))
+
+    @app.get(TRIP_UPDATES_ROUTE)
+    def get_trip_updates(
+        trip_id: str | None = None,
+        route_id: str | None = None,
+        stop_id: str | None = None,
+        vehicle_id: str | None = None,
+    ) -> dict[str, Any]:
+        path = _resolve_path(lambda base: base / "tripupdates" / RAW_TRIP_UPDATES_FILENAME)
+        return _query_realtime(path, trip_id, route_id, stop_id, vehicle_id)
+
+    @app.get(VEHICLE_POSITIONS_ROUTE)
+    def get_vehicle_positions(
+        trip_id: str | None = None,
+        route_id: str | None = None,
+        stop_id: str | None = None,
+        vehicle_id: str | None = None,
+    ) -> dict[str, Any]:
+        path = _resolve_path(
+            lambda base: base / "vehiclepositions" / RAW_VEHICLE_POSITIONS_FILENAME
+        )
+        return _query_realtime(path, trip_id, route_id, stop_id, vehicle_id)
+
+    def _load_delay_report(path: Path) -> dict[str, Any]:
+        # Summaries are computed once per refreshed statistics file, not per request.
+        statistics: DelayStatistics = load_delay_statistics(path)
+        return {
+            "timestamp": statistics.timestamp,
+            "dimensions": {
+                dimension: {
+                    key: summary.to_payload()
+                    for key, summary in statistics.summary(dimension).items()
+                }
+                for dimension in DELAY_DIMENSIONS
+            },
+        }
+
+    @app.get(DELAYS_ROUTE)
+    def get_delays(by: str = "route", key: str | None = None) -> dict[str, Any]:
+        if by not in DELAY_DIMENSIONS:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Unsupported delay grouping: {by}",
+            )
+        path = _resolve_path(lambda base: base / "tripupdates" / DELAY_STATISTICS_FILENAME)
+        report = _load_index(path, _load_delay_report)
+        delays = report["dimensions"][by]
+        if key is not None:
+            delays = {key: delays[key]} if key in delays else {}
+        return {"timestamp": report["timestamp"], "by": by, "delays": delays}
+
     @app.get("/api/v1/service-alerts")
     def get_processed_service_alerts() -> Any:
         path = _resolve_path(
@@ -0,0 +1,145 @@
+from __future__ import annotations
+
+import argparse
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Iterable, Sequence
+
+from .processors import (
+    ServiceAlertInput,
+    TripUpdateInput,
+    VehiclePositionInput,
+    agency_id_from_filename,
+    feed_to_dict,
+    parse_feed,
+    protobuf_backend,
+    splice_service_alerts,
+    splice_trip_updates,
+    splice_vehicle_positions,
+)
+
+DEFAULT_REPEAT = 5
+
+# Feed kinds, recognized by the filename prefix of the downloaded protobufs.
+_KINDS: dict[str, tuple[type, Callable[..., bytes]]] = {
+    "ServiceAlerts": (ServiceAlertInput, splice_service_alerts),
+    "TripUpdates": (TripUpdateInput, splice_trip_updates),
+    "VehiclePositions": (VehiclePositionInput, splice_vehicle_positions),
+}
+
+
+@dataclass(frozen=True, slots=True)
+class BenchmarkResult:
+    """Best and median wall time of one realtime processing stage."""
+
+    kind: str
+    stage: str
+    entities: int
+    size: int
+    best: float
+    median: float
+
+    def format(self) -> str:
+        return (
+            f"{self.kind:<17} {self.stage:<10} {self.entities:>8} {self.size:>11} "
+            f"{self.best * 1000:>9.2f} {self.median * 1000:>9.2f}"
+        )
+
+
+def discover_feeds(paths: Iterable[Path]) -> dict[str, list[Path]]:
+    """Group recorded ``<Kind>_<variant>.pb`` files by feed kind; directories are searched recursively."""
+
+    grouped: dict[str, list[Path]] = {}
+    for path in paths:
+        candidates = sorted(path.rglob("*.pb")) if path.is_dir() else [path]
+        for candidate in candidates:
+            kind = candidate.stem.split("_", 1)[0]
+            if kind in _KINDS and "_" in candidate.stem:
+                grouped.setdefault(kind, []).append(candidate)
+    return {kind: sorted(set(files)) for kind, files in sorted(grouped.items())}
+
+
+def run_benchmarks(paths: Iterable[Path], repeat: int = DEFAULT_REPEAT) -> list[BenchmarkResult]:
+    """Time parse, merge, serialize and ``MessageToDict`` for each kind of recorded feed.
+
+    ``parse`` decodes every input file, ``merge`` is the full consolidation
+    of the inputs (decode, id rewrite and splice), ``serialize`` encodes the
+    merged feed and ``to_dict`` renders it the way the JSON outputs do.
+    """
+
+    if repeat < 1:
+        raise ValueError("Benchmarks need at least one repetition")
+
+    results: list[BenchmarkResult] = []
+    for kind, files in discover_feeds(paths).items():
+        input_type, splice = _KINDS[kind]
+        payloads = [path.read_bytes() for path in files]
+        inputs = [
+            input_type(path, agency_id_from_filename(path, index))
+            for index, path in enumerate(files)
+        ]
+        merged_bytes = splice(inputs)
+        merged = parse_feed(merged_bytes)
+        entities = len(merged.entity)
+        size = len(merged_bytes)
+
+        stages: dict[str, Callable[[], object]] = {
+            "parse": lambda: [parse_feed(payload) for payload in payloads],
+            "merge": lambda: splice(inputs),
+            "serialize": merged.SerializeToString,
+            "to_dict": lambda: feed_to_dict(merged),
+        }
+        for stage, operation in stages.items():
+            timings = _measure(operation, repeat)
+            results.append(
+                BenchmarkResult(kind, stage, entities, size, timings[0], timings[len(timings) // 2])
+            )
+    return results
+
+
+def _measure(operation: Callable[[], object], repeat: int) -> list[float]:
+    timings: list[float] = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        operation()
+        timings.append(time.perf_counter() - start)
+    timings.sort()
+    return timings
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        description="Micro-benchmarks for realtime feed processing on recorded feeds"
+    )
+    parser.add_argument(
+        "feeds",
+        nargs="+",
+        type=Path,
+        help="Recorded ServiceAlerts_*.pb, TripUpdates_*.pb or VehiclePositions_*.pb files or directories",
+    )
+    parser.add_argument(
+        "--repeat",
+        type=int,
+        default=DEFAULT_REPEAT,
+        help="Number of timed runs per stage",
+    )
+    return parser
+
+
+def main(argv: Sequence[str] | None = None) -> int:
+    args = build_parser().parse_args(argv)
+    results = run_benchmarks(args.feeds, args.repeat)
+    if not results:
+        print("No recorded realtime feeds found")
+        return 1
+
+    print(f"protobuf backend: {protobuf_backend()}")
+    print(f"{'kind':<17} {'stage':<10} {'entities':>8} {'bytes':>11} {'best ms':>9} {'median ms':>9}")
+    for result in results:
+        print(result.format())
+    return 0
+
+
+if __name__ == "__main__":  # pragma: no cover - CLI entry point
+    raise SystemExit(main())
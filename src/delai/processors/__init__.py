@@ -1,29 +1,155 @@
 """Post-processing helpers for downloaded transit data."""
 
-from .archive import extract_zip
-from .realtime import convert_feed_to_json
+from .archive import (
+    CHECKSUM_SUFFIX,
+    COMPRESSION_PROFILES,
+    BundleCompression,
+    extract_zip,
+    publish_zip,
+    read_checksum,
+    write_zip,
+)
+from .realtime import (
+    FeedView,
+    ParsedFeed,
+    RealtimeFeedError,
+    check_protobuf_backend,
+    convert_feed_to_json,
+    feed_to_dict,
+    parse_feed,
+    protobuf_backend,
+    read_feed,
+)
 from .realtime_merge import (
+    INPUTS_SUFFIX,
     ServiceAlertInput,
     TripUpdateInput,
     VehiclePositionInput,
     agency_id_from_filename,
     consolidate_service_alerts,
     consolidate_trip_updates,
+    consolidate_feed,
     consolidate_vehicle_positions,
+    describe_inputs,
+    inputs_unchanged,
+    merge_service_alerts,
+    merge_trip_updates,
+    merge_vehicle_positions,
+    merged_feed,
+    record_inputs,
+    splice_combined_feed,
+    splice_service_alerts,
+    splice_trip_updates,
+    splice_vehicle_positions,
+)
+from .realtime_versions import (
+    VERSIONS_SUFFIX,
+    FeedVersions,
+    build_differential_feed,
+    load_feed_versions,
+    record_feed_version,
+)
+from .realtime_archive import (
+    ArchivedSnapshot,
+    HistorySettings,
+    RealtimeArchive,
+    RealtimeArchiveError,
 )
+from .realtime_delays import (
+    DELAY_DIMENSIONS,
+    DelaySettings,
+    DelayStatistics,
+    DelayStatisticsError,
+    DelaySummary,
+    load_delay_statistics,
+)
+from .realtime_partition import (
+    AGENCY_PARTITIONS_DIRNAME,
+    ROUTE_PARTITIONS_DIRNAME,
+    FeedPartitions,
+    empty_partition,
+    partition_feed,
+    partition_path,
+    write_partitions,
+)
+from .realtime_index import RealtimeIndex, build_realtime_index, load_realtime_index
 from .alerts import ServiceAlertsOutput, process_service_alerts
 from .static_gtfs import (
     StaticFeedInput,
     consolidate_static_feeds,
     determine_agency_id,
 )
+from .static_calendar import (
+    ServiceCalendar,
+    ServiceCalendarError,
+    build_service_calendar,
+    load_service_calendar,
+    write_service_calendar,
+)
+from .static_dedup import canonical_shapes, shape_fingerprints, stop_pattern_fingerprints
+from .static_diff import StaticDiffError, diff_static_bundles, write_static_diff
+from .static_geometry import RouteGeometryError, build_route_geometry, encode_polyline
+from .static_stations import StationSettings, cluster_stops, normalize_stop_name
+from .static_transfers import TransferSettings, generate_transfers
+from .static_validation import StaticValidationError, ValidationReport, validate_references
+from .static_search import (
+    StopSearchError,
+    StopSearchIndex,
+    build_stop_search_index,
+    load_stop_search_index,
+    write_stop_search_index,
+)
+from .static_sqlite import StaticIndexError, build_sqlite_index
 
 __all__ = [
     "convert_feed_to_json",
+    "feed_to_dict",
+    "read_feed",
+    "parse_feed",
+    "protobuf_backend",
+    "check_protobuf_backend",
+    "FeedView",
+    "ParsedFeed",
+    "RealtimeFeedError",
     "extract_zip",
+    "write_zip",
+    "publish_zip",
+    "read_checksum",
+    "CHECKSUM_SUFFIX",
+    "BundleCompression",
+    "COMPRESSION_PROFILES",
     "StaticFeedInput",
     "consolidate_static_feeds",
     "determine_agency_id",
+    "build_sqlite_index",
+    "diff_static_bundles",
+    "write_static_diff",
+    "StaticDiffError",
+    "build_route_geometry",
+    "encode_polyline",
+    "RouteGeometryError",
+    "StaticIndexError",
+    "TransferSettings",
+    "StationSettings",
+    "StaticValidationError",
+    "StopSearchError",
+    "StopSearchIndex",
+    "build_stop_search_index",
+    "load_stop_search_index",
+    "write_stop_search_index",
+    "ValidationReport",
+    "validate_references",
+    "canonical_shapes",
+    "shape_fingerprints",
+    "stop_pattern_fingerprints",
+    "cluster_stops",
+    "normalize_stop_name",
+    "generate_transfers",
+    "ServiceCalendar",
+    "ServiceCalendarError",
+    "build_service_calendar",
+    "load_service_calendar",
+    "write_service_calendar",
     "ServiceAlertInput",
     "TripUpdateInput",
     "VehiclePositionInput",
@@ -31,6 +157,44 @@ __all__ = [
     "consolidate_service_alerts",
     "consolidate_trip_updates",
     "consolidate_vehicle_positions",
+    "INPUTS_SUFFIX",
+    "consolidate_feed",
+    "VERSIONS_SUFFIX",
+    "FeedVersions",
+    "build_differential_feed",
+    "load_feed_versions",
+    "record_feed_version",
+    "RealtimeIndex",
+    "build_realtime_index",
+    "load_realtime_index",
+    "ArchivedSnapshot",
+    "HistorySettings",
+    "RealtimeArchive",
+    "RealtimeArchiveError",
+    "DELAY_DIMENSIONS",
+    "DelaySettings",
+    "DelayStatistics",
+    "DelayStatisticsError",
+    "DelaySummary",
+    "load_delay_statistics",
+    "AGENCY_PARTITIONS_DIRNAME",
+    "ROUTE_PARTITIONS_DIRNAME",
+    "FeedPartitions",
+    "empty_partition",
+    "partition_feed",
+    "partition_path",
+    "write_partitions",
+    "describe_inputs",
+    "inputs_unchanged",
+    "record_inputs",
+    "merge_service_alerts",
+    "merge_trip_updates",
+    "merge_vehicle_positions",
+    "merged_feed",
+    "splice_combined_feed",
+    "splice_service_alerts",
+    "splice_trip_updates",
+    "splice_vehicle_positions",
      "process_service_alerts",
     "ServiceAlertsOutput",
 ]
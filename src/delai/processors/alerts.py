@@ -10,7 +10,7 @@ from google.protobuf.json_format import ParseDict
 from google.transit import gtfs_realtime_pb2
 
 from ..utils.io import atomic_dump_json, atomic_write_bytes
-from .realtime import convert_feed_to_json
+from .realtime import ParsedFeed, feed_to_dict, read_feed
 
 LOGGER = logging.getLogger(__name__)
 
@@ -29,19 +29,23 @@ def process_service_alerts(
     dispatcher_alerts_path: Path,
     raw_incidents_path: Path,
     approved_alerts_pb_path: Path,
+    *,
+    feed: ParsedFeed | None = None,
 ) -> ServiceAlertsOutput:
     """Convert and enrich the consolidated ServiceAlerts feed.
 
     Steps:
-    1. Convert the protobuf feed into JSON.
+    1. Convert the protobuf feed into JSON (``feed`` may carry the already
+       parsed contents of ``raw_feed_path``).
     2. Ensure each alert carries an ``approved`` flag (default ``False``).
     3. Append additional alert entities sourced from dispatcher/incident files.
     4. Mark alerts as approved when they are listed in ``approved_alerts.json``.
        Entries that no longer reference an existing alert are removed from that file.
     """
 
-    base_json_path = convert_feed_to_json(raw_feed_path, output_json_path)
-    data = _load_json(base_json_path)
+    if feed is None:
+        feed = read_feed(raw_feed_path)
+    data = feed_to_dict(feed)
 
     entity_list = data.get("entity")
     if not isinstance(entity_list, list):
@@ -121,23 +125,6 @@ def _extract_entity_id(entry: Any) -> str | None:
     return None
 
 
-def _load_json(path: Path) -> dict[str, Any]:
-    try:
-        with path.open("r", encoding="utf-8") as handle:
-            data = json.load(handle)
-    except FileNotFoundError:
-        LOGGER.error("Base JSON file %s is missing", path)
-        raise
-    except Exception:
-        LOGGER.exception("Failed to parse JSON payload from %s", path)
-        raise
-
-    if not isinstance(data, dict):
-        LOGGER.warning("Expected object at root of %s; coercing to dict", path)
-        return {}
-    return data
-
-
 def _load_json_list(path: Path) -> list[Any]:
     if not path.exists():
         return []
@@ -168,11 +155,11 @@ def _ensure_list_file(path: Path) -> None:
 
 
 def _write_approved_protobuf(payload: dict[str, Any], destination: Path) -> Path:
-    snapshot = json.loads(json.dumps(payload, ensure_ascii=False))
+    snapshot: dict[str, Any] = {key: value for key, value in payload.items() if key != "entity"}
 
-    entities = snapshot.get("entity")
+    filtered: list[dict[str, Any]] = []
+    entities = payload.get("entity")
     if isinstance(entities, list):
-        filtered: list[dict[str, Any]] = []
         for entity in entities:
             if not isinstance(entity, dict):
                 continue
@@ -181,15 +168,14 @@ def _write_approved_protobuf(payload: dict[str, Any], destination: Path) -> Path
                 continue
             if not alert.get("approved"):
                 continue
-            alert.pop("approved", None)
-            filtered.append(entity)
-        snapshot["entity"] = filtered
-    else:
-        snapshot["entity"] = []
+            # Shallow copies are enough: only the ``approved`` flag is dropped.
+            stripped = {key: value for key, value in alert.items() if key != "approved"}
+            filtered.append({**entity, "alert": stripped})
+    snapshot["entity"] = filtered
 
     message = gtfs_realtime_pb2.FeedMessage()
     ParseDict(snapshot, message, ignore_unknown_fields=True)
 
     payload = message.SerializeToString()
     atomic_write_bytes(destination, payload)
-    return destination
\ No newline at end of file
+    return destination
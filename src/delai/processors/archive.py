@@ -1,20 +1,114 @@
 from __future__ import annotations
 
+import csv
+import hashlib
+import io
+import json
+import os
+import shutil
+import tempfile
 import zipfile
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
 from pathlib import Path
+from typing import IO, Callable, Iterable, Iterator
+
+from ..utils.io import atomic_dump_json, atomic_write, atomic_write_text
+
+_COMPRESSION_METHODS: dict[str, int] = {
+    "stored": zipfile.ZIP_STORED,
+    "deflate": zipfile.ZIP_DEFLATED,
+    "bzip2": zipfile.ZIP_BZIP2,
+    "lzma": zipfile.ZIP_LZMA,
+}
+
+_SPOOL_LIMIT = 32 * 1024 * 1024  # 32 MiB
+_COPY_CHUNK_SIZE = 1024 * 1024  # 1 MiB
+
+_EXTRACT_MANIFEST_FILENAME = ".extracted.json"
+
+# Members carry fixed metadata so identical contents always produce identical archives.
+_MEMBER_DATE_TIME = (1980, 1, 1, 0, 0, 0)
+_MEMBER_ATTRIBUTES = 0o644 << 16
+_UNIX_SYSTEM = 3
+
+CHECKSUM_SUFFIX = ".sha256"
+
+MemberWriter = Callable[[], "bytes | Iterable[bytes]"]
+
+# Appending precompressed entries relies on these ZipFile internals (CPython
+# 3.10-3.13); without them members are written serially through writestr().
+_ARCHIVE_INTERNALS = ("fp", "filelist", "NameToInfo", "start_dir")
+# ZipInfo attribute ZipFile.open() reads the compression level from; renamed in 3.13.
+_LEVEL_ATTRIBUTE = next(
+    (
+        name
+        for name in ("compress_level", "_compresslevel")
+        if name in getattr(zipfile.ZipInfo, "__slots__", ())
+    ),
+    None,
+)
 
 
 class ArchiveExtractionError(RuntimeError):
     """Raised when an archive cannot be safely extracted."""
 
 
-def extract_zip(zip_path: Path, destination_dir: Path | None = None) -> Path:
+@dataclass(frozen=True, slots=True)
+class BundleCompression:
+    """Codec settings used when writing a ZIP bundle.
+
+    ``method`` is one of ``stored``, ``deflate``, ``bzip2`` or ``lzma``.
+    ``level`` is passed to the codec (``None`` keeps its default) and
+    ``workers`` bounds the number of members compressed concurrently
+    (``None`` uses the CPU count). Note that OpenTripPlanner and most GTFS
+    consumers only read ``stored`` and ``deflate`` members.
+    """
+
+    method: str = "deflate"
+    level: int | None = None
+    workers: int | None = None
+
+    def __post_init__(self) -> None:
+        if self.method not in _COMPRESSION_METHODS:
+            raise ValueError(f"Unsupported compression method: {self.method}")
+        if self.workers is not None and self.workers < 1:
+            raise ValueError("Compression workers must be a positive integer")
+
+    @property
+    def compress_type(self) -> int:
+        return _COMPRESSION_METHODS[self.method]
+
+
+COMPRESSION_PROFILES: dict[str, BundleCompression] = {
+    "default": BundleCompression(),
+    "fast": BundleCompression(method="deflate", level=1),
+    "stored": BundleCompression(method="stored"),
+    "compact": BundleCompression(method="lzma"),
+}
+
+
+def extract_zip(
+    zip_path: Path,
+    destination_dir: Path | None = None,
+    *,
+    workers: int | None = None,
+) -> Path:
     """Extract a ZIP archive into a directory.
 
+    Members are streamed to disk in bounded chunks, each through a temporary
+    file that atomically replaces the previous copy, and several members are
+    extracted concurrently. A member is skipped when the file already on disk
+    has the same CRC32 and size; these are recorded in a small manifest so
+    unchanged files are usually recognized from a ``stat`` alone.
+
     Args:
         zip_path: Path to the `.zip` file.
         destination_dir: Optional directory to extract into. Defaults to a
             sibling directory whose name matches the ZIP stem.
+        workers: Maximum number of members extracted concurrently. Defaults
+            to the CPU count.
 
     Returns:
         The directory containing the extracted files.
@@ -27,30 +121,273 @@ def extract_zip(zip_path: Path, destination_dir: Path | None = None) -> Path:
         destination_dir = zip_path.with_suffix("")
 
     destination_dir.mkdir(parents=True, exist_ok=True)
+    manifest_path = destination_dir / _EXTRACT_MANIFEST_FILENAME
+    manifest = _load_manifest(manifest_path)
+
+    def _extract(member: zipfile.ZipInfo) -> tuple[str, list[int]]:
+        extracted_path = destination_dir / member.filename
+        recorded = manifest.get(member.filename)
+        if not _is_extracted(extracted_path, member, recorded):
+            extracted_path.parent.mkdir(parents=True, exist_ok=True)
+            # Each worker reads through its own handle instead of sharing one file pointer.
+            with zipfile.ZipFile(zip_path) as zip_file:
+                atomic_write(
+                    extracted_path,
+                    lambda temp_path: _copy_member(zip_file, member, temp_path),
+                )
+        return member.filename, [member.CRC, member.file_size, extracted_path.stat().st_mtime_ns]
 
     try:
         with zipfile.ZipFile(zip_path) as zip_file:
+            members: list[zipfile.ZipInfo] = []
             for member in zip_file.infolist():
                 extracted_path = destination_dir / member.filename
                 _assert_within_directory(destination_dir, extracted_path)
                 if member.is_dir():
                     extracted_path.mkdir(parents=True, exist_ok=True)
                 else:
-                    extracted_path.parent.mkdir(parents=True, exist_ok=True)
-                    with zip_file.open(member) as source, extracted_path.open("wb") as target:
-                        target.write(source.read())
+                    members.append(member)
+
+        worker_count = min(len(members), workers or os.cpu_count() or 1)
+        if worker_count <= 1:
+            extracted = dict(map(_extract, members))
+        else:
+            with ThreadPoolExecutor(max_workers=worker_count) as executor:
+                extracted = dict(executor.map(_extract, members))
     except Exception as exc:  # pragma: no cover - defensive
         raise ArchiveExtractionError(f"Failed to extract ZIP archive: {zip_path}") from exc
 
+    if extracted != manifest:
+        atomic_dump_json(manifest_path, extracted, indent=None)
+
     return destination_dir
 
 
+def iter_bundle_table(archive: zipfile.ZipFile, name: str) -> Iterator[list[str]]:
+    """Stream a table from a GTFS archive as lists, header first.
+
+    Yields nothing when the archive has no member called *name*.
+    """
+
+    try:
+        handle = archive.open(name)
+    except KeyError:
+        return
+
+    with handle, io.TextIOWrapper(handle, encoding="utf-8-sig", newline="") as text:
+        yield from csv.reader(text)
+
+
+def _is_extracted(path: Path, member: zipfile.ZipInfo, recorded: list[int] | None) -> bool:
+    """Check whether *path* already holds the contents of *member*."""
+
+    try:
+        stat = path.stat()
+    except FileNotFoundError:
+        return False
+
+    if stat.st_size != member.file_size:
+        return False
+    if recorded == [member.CRC, member.file_size, stat.st_mtime_ns]:
+        return True
+    return _file_crc32(path) == member.CRC
+
+
+def _file_crc32(path: Path) -> int:
+    crc = 0
+    with path.open("rb") as handle:
+        while chunk := handle.read(_COPY_CHUNK_SIZE):
+            crc = zlib.crc32(chunk, crc)
+    return crc
+
+
+def _copy_member(zip_file: zipfile.ZipFile, member: zipfile.ZipInfo, destination: Path) -> None:
+    with zip_file.open(member) as source, destination.open("wb") as target:
+        shutil.copyfileobj(source, target, _COPY_CHUNK_SIZE)
+
+
+def _load_manifest(path: Path) -> dict[str, list[int]]:
+    try:
+        with path.open("r", encoding="utf-8") as handle:
+            data = json.load(handle)
+    except (FileNotFoundError, ValueError):
+        return {}
+    return data if isinstance(data, dict) else {}
+
+
 def _assert_within_directory(directory: Path, target: Path) -> None:
     """Ensure the target path stays within the destination directory."""
 
     try:
-        target.relative_to(directory)
+        target.resolve().relative_to(directory.resolve())
     except ValueError as exc:
         raise ArchiveExtractionError(
             f"Archive extraction would escape destination directory: {target}"
         ) from exc
+
+
+def write_zip(
+    destination: Path,
+    members: Iterable[tuple[str, MemberWriter]],
+    compression: BundleCompression | None = None,
+) -> Path:
+    """Write a ZIP archive whose members are rendered and compressed in parallel.
+
+    Each member writer returns either the member bytes or an iterable of
+    byte chunks, which is streamed. Members are compressed into single-entry
+    archives spooled to disk past 32 MiB, on worker threads (zlib, bz2 and
+    lzma release the GIL). The resulting local entries are then appended to
+    *destination* in the order given by *members*.
+
+    On Python versions whose ``zipfile`` internals differ, members are
+    compressed one after another with the public ``writestr`` instead.
+    """
+
+    compression = compression or BundleCompression()
+    members = list(members)
+    workers = compression.workers or os.cpu_count() or 1
+
+    def _compress(member: tuple[str, MemberWriter]) -> tuple[zipfile.ZipInfo, IO[bytes], int]:
+        name, writer = member
+        info = _member_info(name, compression)
+        # ZipFile.open() has no compresslevel argument; it reads the level from the ZipInfo.
+        setattr(info, _LEVEL_ATTRIBUTE, compression.level)
+        buffer = tempfile.SpooledTemporaryFile(max_size=_SPOOL_LIMIT)
+        try:
+            with zipfile.ZipFile(buffer, "w") as single:
+                payload = writer()
+                if isinstance(payload, bytes):
+                    single.writestr(info, payload)
+                else:
+                    with single.open(info, "w", force_zip64=True) as handle:
+                        for chunk in payload:
+                            handle.write(chunk)
+                local_end = buffer.tell()
+                (info,) = single.infolist()
+        except BaseException:
+            buffer.close()
+            raise
+        return info, buffer, local_end
+
+    with zipfile.ZipFile(destination, "w") as archive:
+        if not _supports_precompressed_entries(archive):
+            _write_serially(archive, members, compression)
+        elif workers == 1 or len(members) <= 1:
+            _append_entries(archive, map(_compress, members))
+        else:
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                _append_entries(archive, executor.map(_compress, members))
+
+    return destination
+
+
+def _member_info(name: str, compression: BundleCompression) -> zipfile.ZipInfo:
+    info = zipfile.ZipInfo(name, date_time=_MEMBER_DATE_TIME)
+    info.compress_type = compression.compress_type
+    info.external_attr = _MEMBER_ATTRIBUTES
+    info.create_system = _UNIX_SYSTEM
+    return info
+
+
+def _supports_precompressed_entries(archive: zipfile.ZipFile) -> bool:
+    return _LEVEL_ATTRIBUTE is not None and all(
+        hasattr(archive, name) for name in _ARCHIVE_INTERNALS
+    )
+
+
+def _write_serially(
+    archive: zipfile.ZipFile,
+    members: Iterable[tuple[str, MemberWriter]],
+    compression: BundleCompression,
+) -> None:
+    """Write *members* through the public API; streamed members are buffered first."""
+
+    for name, writer in members:
+        payload = writer()
+        if not isinstance(payload, bytes):
+            payload = b"".join(payload)
+        archive.writestr(_member_info(name, compression), payload, compresslevel=compression.level)
+
+
+def publish_zip(
+    destination: Path,
+    members: Iterable[tuple[str, MemberWriter]],
+    compression: BundleCompression | None = None,
+) -> str:
+    """Write a ZIP archive with :func:`write_zip` and record its SHA-256 digest.
+
+    The digest is stored in a ``<name>.sha256`` sidecar (``sha256sum``
+    format). When the new archive is byte-identical to the existing
+    *destination*, the existing file and a matching sidecar are kept, so
+    their modification times and the HTTP validators derived from them do
+    not change.
+
+    Returns:
+        The hex digest of the published archive.
+    """
+
+    destination.parent.mkdir(parents=True, exist_ok=True)
+    descriptor, temp_name = tempfile.mkstemp(dir=destination.parent)
+    os.close(descriptor)
+    temp_path = Path(temp_name)
+    try:
+        write_zip(temp_path, members, compression)
+        digest = file_sha256(temp_path)
+        unchanged = destination.exists() and file_sha256(destination) == digest
+        if unchanged:
+            temp_path.unlink()
+        else:
+            temp_path.replace(destination)
+    except Exception:
+        temp_path.unlink(missing_ok=True)
+        raise
+
+    # The sidecar is a validator too; leave it alone when it already matches.
+    if not unchanged or read_checksum(destination) != digest:
+        atomic_write_text(checksum_path(destination), f"{digest}  {destination.name}\n")
+    return digest
+
+
+def checksum_path(path: Path) -> Path:
+    """Return the location of the SHA-256 sidecar for *path*."""
+
+    return path.with_name(f"{path.name}{CHECKSUM_SUFFIX}")
+
+
+def read_checksum(path: Path) -> str | None:
+    """Return the digest recorded next to *path*, if any."""
+
+    try:
+        content = checksum_path(path).read_text(encoding="utf-8")
+    except FileNotFoundError:
+        return None
+    digest, _, _ = content.partition(" ")
+    return digest.strip() or None
+
+
+def file_sha256(path: Path) -> str:
+    digest = hashlib.sha256()
+    with path.open("rb") as handle:
+        while chunk := handle.read(_COPY_CHUNK_SIZE):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _append_entries(
+    archive: zipfile.ZipFile,
+    entries: Iterable[tuple[zipfile.ZipInfo, IO[bytes], int]],
+) -> None:
+    """Append precompressed local entries and register them in the central directory."""
+
+    for info, buffer, local_end in entries:
+        info.header_offset = archive.fp.tell()
+        with buffer:
+            buffer.seek(0)
+            remaining = local_end
+            while remaining:
+                chunk = buffer.read(min(remaining, _COPY_CHUNK_SIZE))
+                archive.fp.write(chunk)
+                remaining -= len(chunk)
+        archive.filelist.append(info)
+        archive.NameToInfo[info.filename] = info
+        archive.start_dir = archive.fp.tell()
@@ -1,25 +1,121 @@
 from __future__ import annotations
 
-import json
+import logging
+from dataclasses import dataclass
 from pathlib import Path
+from typing import Any, Union
 
+from google.protobuf.internal import api_implementation
 from google.protobuf.json_format import MessageToDict
 from google.transit import gtfs_realtime_pb2
 
 from ..utils.io import atomic_dump_json
 
+LOGGER = logging.getLogger(__name__)
+
+# The pure-Python runtime parses and serializes an order of magnitude slower
+# than the native ``upb`` and ``cpp`` backends.
+SLOW_PROTOBUF_BACKENDS = frozenset({"python"})
+
 
 class RealtimeFeedError(RuntimeError):
     """Raised when a realtime protobuf feed cannot be processed."""
 
 
-def convert_feed_to_json(pb_path: Path, json_path: Path | None = None) -> Path:
+@dataclass(frozen=True, slots=True)
+class FeedView:
+    """A feed assembled from a header and entities owned by other messages.
+
+    It reads like a ``FeedMessage`` through ``header`` and ``entity``, so a
+    merged feed can be rendered from its parsed inputs instead of decoding
+    the serialized output again.
+    """
+
+    header: gtfs_realtime_pb2.FeedHeader
+    entity: tuple[gtfs_realtime_pb2.FeedEntity, ...]
+
+
+# A parsed feed, either decoded as a whole or viewed through its parts.
+ParsedFeed = Union[gtfs_realtime_pb2.FeedMessage, FeedView]
+
+
+def protobuf_backend() -> str:
+    """Name of the active protobuf runtime: ``"upb"``, ``"cpp"`` or ``"python"``."""
+
+    return api_implementation.Type()
+
+
+def check_protobuf_backend() -> str:
+    """Log the active protobuf runtime, warning when it is the slow pure-Python one."""
+
+    backend = protobuf_backend()
+    if backend in SLOW_PROTOBUF_BACKENDS:
+        LOGGER.warning(
+            "protobuf is using the pure-Python backend; realtime parsing and merging "
+            "will be several times slower. Install a protobuf wheel with the upb "
+            "backend and unset PROTOCOL_BUFFERS_PYTHON_IMPLEMENTATION."
+        )
+    else:
+        LOGGER.info("protobuf is using the %s backend", backend)
+    return backend
+
+
+def read_feed(pb_path: Path) -> gtfs_realtime_pb2.FeedMessage:
+    """Parse a GTFS-realtime protobuf file.
+
+    Raises:
+        RealtimeFeedError: If the file cannot be read or parsed.
+    """
+
+    try:
+        data = pb_path.read_bytes()
+    except OSError as exc:
+        raise RealtimeFeedError(f"Failed to read GTFS-realtime file: {pb_path}") from exc
+    return parse_feed(data, pb_path)
+
+
+def parse_feed(data: bytes, source: Path | None = None) -> gtfs_realtime_pb2.FeedMessage:
+    """Parse a serialized GTFS-realtime feed; *source* is only used in error messages."""
+
+    feed = gtfs_realtime_pb2.FeedMessage()
+    try:
+        feed.ParseFromString(data)
+    except Exception as exc:  # pragma: no cover - defensive
+        raise RealtimeFeedError(
+            f"Failed to parse GTFS-realtime file: {source or '<memory>'}"
+        ) from exc
+    return feed
+
+
+def feed_to_dict(feed: ParsedFeed) -> dict[str, Any]:
+    """Render a parsed feed with the field names used by the JSON outputs."""
+
+    if not isinstance(feed, FeedView):
+        return MessageToDict(feed, preserving_proto_field_name=True)
+    payload: dict[str, Any] = {
+        "header": MessageToDict(feed.header, preserving_proto_field_name=True)
+    }
+    if feed.entity:
+        payload["entity"] = [
+            MessageToDict(entity, preserving_proto_field_name=True) for entity in feed.entity
+        ]
+    return payload
+
+
+def convert_feed_to_json(
+    pb_path: Path,
+    json_path: Path | None = None,
+    *,
+    feed: ParsedFeed | None = None,
+) -> Path:
     """Parse a GTFS-realtime protobuf file and store it as formatted JSON.
 
     Args:
         pb_path: Path to the protobuf file on disk.
         json_path: Optional path for the resulting JSON file. If omitted, a
             sibling file with the ``.json`` suffix will be created.
+        feed: The already parsed contents of *pb_path*. When given, the file
+            is not read again.
 
     Returns:
         The path to the generated JSON file.
@@ -32,15 +128,11 @@ def convert_feed_to_json(pb_path: Path, json_path: Path | None = None) -> Path:
     if json_path is None:
         json_path = pb_path.with_suffix(".json")
 
-    feed = gtfs_realtime_pb2.FeedMessage()
-    try:
-        feed.ParseFromString(pb_path.read_bytes())
-    except Exception as exc:  # pragma: no cover - defensive
-        raise RealtimeFeedError(f"Failed to parse GTFS-realtime file: {pb_path}") from exc
+    if feed is None:
+        feed = read_feed(pb_path)
 
     try:
-        data = MessageToDict(feed, preserving_proto_field_name=True)
-        atomic_dump_json(json_path, data)
+        atomic_dump_json(json_path, feed_to_dict(feed))
     except Exception as exc:  # pragma: no cover - defensive
         raise RealtimeFeedError(f"Failed to serialize realtime feed to JSON: {json_path}") from exc
 
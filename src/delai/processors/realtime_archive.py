@@ -0,0 +1,207 @@
+from __future__ import annotations
+
+import bisect
+import struct
+import time
+import zlib
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Iterator
+
+from .realtime_wire import summarize_feed
+
+SEGMENT_SUFFIX = ".pbz"
+INDEX_SUFFIX = ".idx"
+# Index entries: snapshot timestamp, offset and compressed length in the segment.
+_INDEX_ENTRY = struct.Struct("<qQI")
+# Close to zlib's default ratio on protobuf snapshots at a third of the cost.
+_COMPRESSION_LEVEL = 3
+
+
+class RealtimeArchiveError(RuntimeError):
+    """Raised when the realtime history archive cannot be written or read."""
+
+
+@dataclass(frozen=True, slots=True)
+class HistorySettings:
+    """Retention and rotation of the realtime snapshot archive.
+
+    Snapshots are appended to one segment per ``segment_seconds`` of feed
+    time; segments entirely older than ``retention_days`` are deleted when a
+    new segment is started.
+    """
+
+    retention_days: float = 7.0
+    segment_seconds: int = 3600
+
+    def __post_init__(self) -> None:
+        if self.retention_days <= 0:
+            raise ValueError("History retention must be positive")
+        if self.segment_seconds <= 0:
+            raise ValueError("History segments must span a positive duration")
+
+    @property
+    def retention_seconds(self) -> int:
+        return int(self.retention_days * 86400)
+
+
+@dataclass(frozen=True, slots=True)
+class ArchivedSnapshot:
+    """A snapshot read back from the archive; ``data`` is the serialized feed."""
+
+    timestamp: int
+    data: bytes
+
+
+class RealtimeArchive:
+    """Append-only archive of consolidated realtime snapshots.
+
+    Each segment ``<start>.pbz`` holds zlib-compressed snapshots back to back
+    and is paired with ``<start>.idx``, a fixed-width time index. Range
+    queries only open the segments overlapping the range and seek straight
+    to the matching snapshots.
+    """
+
+    def __init__(self, directory: Path, settings: HistorySettings | None = None) -> None:
+        self.directory = Path(directory)
+        self.settings = settings or HistorySettings()
+        self._last_timestamp: int | None = None
+        self._current_segment: int | None = None
+
+    def append(self, data: bytes, timestamp: int | None = None) -> bool:
+        """Archive a serialized feed, stamped with its header timestamp by default.
+
+        Snapshots that are not newer than the last archived one are skipped.
+        Returns whether the snapshot was written.
+        """
+
+        if timestamp is None:
+            timestamp = summarize_feed(data)[0].timestamp or int(time.time())
+        if self._last_timestamp is None:
+            self._last_timestamp = self._read_last_timestamp()
+        if self._last_timestamp is not None and timestamp <= self._last_timestamp:
+            return False
+
+        segment = timestamp - timestamp % self.settings.segment_seconds
+        if segment != self._current_segment:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            self.prune(timestamp)
+            self._current_segment = segment
+
+        payload = zlib.compress(data, _COMPRESSION_LEVEL)
+        segment_path, index_path = self._paths(segment)
+        try:
+            with segment_path.open("ab") as handle:
+                offset = handle.tell()
+                handle.write(payload)
+            # The index entry is written last so readers never see a partial snapshot.
+            with index_path.open("ab") as handle:
+                handle.write(_INDEX_ENTRY.pack(timestamp, offset, len(payload)))
+        except OSError as exc:
+            raise RealtimeArchiveError(f"Failed to archive snapshot in {segment_path}") from exc
+
+        self._last_timestamp = timestamp
+        return True
+
+    def segments(self) -> list[int]:
+        """Start timestamps of the stored segments, oldest first."""
+
+        if not self.directory.exists():
+            return []
+        starts: list[int] = []
+        for path in self.directory.glob(f"*{INDEX_SUFFIX}"):
+            try:
+                starts.append(int(path.stem))
+            except ValueError:
+                continue
+        return sorted(starts)
+
+    def timestamps(self, start: int, end: int) -> list[int]:
+        """Timestamps of the snapshots archived in ``[start, end)``."""
+
+        return [timestamp for timestamp, _, _, _ in self._located_entries(start, end)]
+
+    def iter_range(self, start: int, end: int) -> Iterator[ArchivedSnapshot]:
+        """Yield the snapshots archived in ``[start, end)``, oldest first, one at a time."""
+
+        current: int | None = None
+        handle = None
+        try:
+            for timestamp, offset, length, segment in self._located_entries(start, end):
+                if segment != current:
+                    if handle is not None:
+                        handle.close()
+                    handle = self._paths(segment)[0].open("rb")
+                    current = segment
+                handle.seek(offset)
+                try:
+                    data = zlib.decompress(handle.read(length))
+                except zlib.error as exc:
+                    raise RealtimeArchiveError(
+                        f"Corrupt snapshot at {timestamp} in segment {segment}"
+                    ) from exc
+                yield ArchivedSnapshot(timestamp, data)
+        finally:
+            if handle is not None:
+                handle.close()
+
+    def latest(self) -> ArchivedSnapshot | None:
+        """The most recent snapshot, if any."""
+
+        timestamp = self._read_last_timestamp()
+        if timestamp is None:
+            return None
+        return next(self.iter_range(timestamp, timestamp + 1), None)
+
+    def prune(self, now: int | None = None) -> list[int]:
+        """Delete segments that ended before the retention window; returns their starts."""
+
+        if now is None:
+            now = int(time.time())
+        cutoff = now - self.settings.retention_seconds
+        removed: list[int] = []
+        for segment in self.segments():
+            if segment + self.settings.segment_seconds > cutoff:
+                break
+            for path in self._paths(segment):
+                path.unlink(missing_ok=True)
+            removed.append(segment)
+        return removed
+
+    def _paths(self, segment: int) -> tuple[Path, Path]:
+        return (
+            self.directory / f"{segment}{SEGMENT_SUFFIX}",
+            self.directory / f"{segment}{INDEX_SUFFIX}",
+        )
+
+    def _read_index(self, segment: int) -> list[tuple[int, int, int]]:
+        try:
+            raw = self._paths(segment)[1].read_bytes()
+        except FileNotFoundError:
+            return []
+        # A trailing partial entry belongs to a write still in progress.
+        usable = len(raw) - len(raw) % _INDEX_ENTRY.size
+        return list(_INDEX_ENTRY.iter_unpack(raw[:usable]))
+
+    def _read_last_timestamp(self) -> int | None:
+        for segment in reversed(self.segments()):
+            entries = self._read_index(segment)
+            if entries:
+                return entries[-1][0]
+        return None
+
+    def _located_entries(self, start: int, end: int) -> Iterator[tuple[int, int, int, int]]:
+        segments = self.segments()
+        for position, segment in enumerate(segments):
+            if segment >= end:
+                break
+            # A segment holds the snapshots up to the start of the next one.
+            following = segments[position + 1] if position + 1 < len(segments) else None
+            if following is not None and following <= start:
+                continue
+            entries = self._read_index(segment)
+            timestamps = [entry[0] for entry in entries]
+            first = bisect.bisect_left(timestamps, start)
+            last = bisect.bisect_left(timestamps, end)
+            for timestamp, offset, length in entries[first:last]:
+                yield timestamp, offset, length, segment
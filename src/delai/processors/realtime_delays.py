@@ -0,0 +1,300 @@
+from __future__ import annotations
+
+import base64
+import json
+import sys
+from array import array
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Iterator
+from zoneinfo import ZoneInfo
+
+from .realtime import ParsedFeed
+
+DELAY_DIMENSIONS = ("route", "stop", "hour")
+# Delay histogram: 30-second bins from 10 minutes early to 30 minutes late,
+# plus one bin on each side for everything beyond.
+_BIN_WIDTH = 30
+_LOWEST_DELAY = -600
+_HIGHEST_DELAY = 1800
+_BIN_COUNT = (_HIGHEST_DELAY - _LOWEST_DELAY) // _BIN_WIDTH + 2
+# Observation weights grow instead of old ones decaying; rebase before floats get coarse.
+_MAX_GROWTH = 2.0**64
+_ARRAYS = ("weights", "sums", "on_time", "bins")
+_EMPTY_HISTOGRAM = array("d", [0.0]) * _BIN_COUNT
+
+
+class DelayStatisticsError(RuntimeError):
+    """Raised when persisted delay statistics cannot be read."""
+
+
+@dataclass(frozen=True, slots=True)
+class DelaySettings:
+    """How delays observed in TripUpdates are aggregated.
+
+    Every refreshed feed contributes the delay each trip reports at its next
+    stop. Route and stop aggregates fade with ``half_life_minutes``; the
+    hour-of-day profile (in ``timezone``) fades with ``hourly_half_life_days``
+    so it keeps comparing days. A delay within
+    ``[-on_time_early, on_time_late)`` seconds counts as on time.
+    """
+
+    half_life_minutes: float = 60.0
+    hourly_half_life_days: float = 7.0
+    on_time_early: int = 60
+    on_time_late: int = 180
+    timezone: str = "Europe/Warsaw"
+
+    def __post_init__(self) -> None:
+        if self.half_life_minutes <= 0 or self.hourly_half_life_days <= 0:
+            raise ValueError("Delay half-lives must be positive")
+
+    def half_life_seconds(self, dimension: str) -> float:
+        if dimension == "hour":
+            return self.hourly_half_life_days * 86400
+        return self.half_life_minutes * 60
+
+
+@dataclass(frozen=True, slots=True)
+class DelaySummary:
+    """Decayed delay aggregate of one route, stop or hour of the day."""
+
+    observations: float
+    mean: float
+    p50: float
+    p90: float
+    on_time_share: float
+
+    def to_payload(self) -> dict[str, Any]:
+        return {
+            "observations": round(self.observations, 1),
+            "mean": round(self.mean, 1),
+            "p50": round(self.p50),
+            "p90": round(self.p90),
+            "on_time_share": round(self.on_time_share, 3),
+        }
+
+
+@dataclass(slots=True)
+class _DelayAggregate:
+    # One slot per key in each array; ``bins`` holds _BIN_COUNT slots per key.
+    # Weights are relative to ``reference``, the timestamp of weight 1.
+    half_life: float
+    reference: int = 0
+    keys: dict[str, int] = field(default_factory=dict)
+    weights: array = field(default_factory=lambda: array("d"))
+    sums: array = field(default_factory=lambda: array("d"))
+    on_time: array = field(default_factory=lambda: array("d"))
+    bins: array = field(default_factory=lambda: array("d"))
+
+    def add(self, key: str, delay: int, weight: float, on_time: bool) -> None:
+        slot = self.keys.get(key)
+        if slot is None:
+            slot = self.keys[key] = len(self.keys)
+            self.weights.append(0.0)
+            self.sums.append(0.0)
+            self.on_time.append(0.0)
+            self.bins.extend(_EMPTY_HISTOGRAM)
+        self.weights[slot] += weight
+        self.sums[slot] += weight * delay
+        if on_time:
+            self.on_time[slot] += weight
+        self.bins[slot * _BIN_COUNT + _bin_index(delay)] += weight
+
+    def growth(self, timestamp: int) -> float:
+        return 2.0 ** ((timestamp - self.reference) / self.half_life)
+
+    def weight_at(self, timestamp: int) -> float:
+        """Weight of an observation made at *timestamp*, rebasing when it grows too large."""
+
+        if not self.reference:
+            self.reference = timestamp
+        weight = self.growth(timestamp)
+        if weight <= _MAX_GROWTH:
+            return weight
+        for name in _ARRAYS:
+            setattr(self, name, array("d", (value / weight for value in getattr(self, name))))
+        self.reference = timestamp
+        return 1.0
+
+    def summarize(self, slot: int, decay: float) -> DelaySummary:
+        weight = self.weights[slot]
+        histogram = self.bins[slot * _BIN_COUNT : (slot + 1) * _BIN_COUNT]
+        return DelaySummary(
+            observations=weight * decay,
+            mean=self.sums[slot] / weight,
+            p50=_percentile(histogram, weight, 0.5),
+            p90=_percentile(histogram, weight, 0.9),
+            on_time_share=self.on_time[slot] / weight,
+        )
+
+
+class DelayStatistics:
+    """Rolling delay aggregates per route, stop and hour of the day.
+
+    Each aggregate is a sum, an on-time count and a fixed 30-second
+    histogram held in flat ``array`` buffers. Instead of decaying every
+    aggregate on each tick, new observations are weighted by
+    ``2 ** (elapsed / half_life)``, so an update only touches the slots of
+    the observed trips; summaries divide the weight back out.
+    """
+
+    def __init__(self, settings: DelaySettings | None = None) -> None:
+        self.settings = settings or DelaySettings()
+        self.timestamp = 0
+        self._aggregates = {
+            name: _DelayAggregate(self.settings.half_life_seconds(name))
+            for name in DELAY_DIMENSIONS
+        }
+        self._zone = ZoneInfo(self.settings.timezone)
+
+    def update(self, feed: ParsedFeed, timestamp: int | None = None) -> int:
+        """Add the delays of a consolidated TripUpdates feed; returns the number of observations.
+
+        Feeds that are not newer than the last update are ignored.
+        """
+
+        if timestamp is None:
+            timestamp = feed.header.timestamp
+        if not timestamp or timestamp <= self.timestamp:
+            return 0
+
+        hour = f"{datetime.fromtimestamp(timestamp, self._zone).hour:02d}"
+        early = -self.settings.on_time_early
+        late = self.settings.on_time_late
+        routes = self._aggregates["route"]
+        stops = self._aggregates["stop"]
+        hours = self._aggregates["hour"]
+        route_weight = routes.weight_at(timestamp)
+        stop_weight = stops.weight_at(timestamp)
+        hour_weight = hours.weight_at(timestamp)
+        observations = 0
+        for route_id, stop_id, delay in _iter_delays(feed):
+            on_time = early <= delay < late
+            if route_id:
+                routes.add(route_id, delay, route_weight, on_time)
+            if stop_id:
+                stops.add(stop_id, delay, stop_weight, on_time)
+            hours.add(hour, delay, hour_weight, on_time)
+            observations += 1
+
+        self.timestamp = timestamp
+        return observations
+
+    def summary(self, dimension: str, min_observations: float = 1.0) -> dict[str, DelaySummary]:
+        """Summaries of every key of *dimension* with enough recent observations."""
+
+        aggregate = self._aggregates.get(dimension)
+        if aggregate is None:
+            raise KeyError(dimension)
+        # Weights are relative to the reference; this brings them back to "now".
+        decay = 1 / aggregate.growth(self.timestamp) if self.timestamp else 1.0
+        summaries: dict[str, DelaySummary] = {}
+        for key, slot in sorted(aggregate.keys.items()):
+            if aggregate.weights[slot] * decay >= min_observations:
+                summaries[key] = aggregate.summarize(slot, decay)
+        return summaries
+
+    def to_payload(self) -> dict[str, Any]:
+        return {
+            "settings": {
+                "half_life_minutes": self.settings.half_life_minutes,
+                "hourly_half_life_days": self.settings.hourly_half_life_days,
+                "on_time_early": self.settings.on_time_early,
+                "on_time_late": self.settings.on_time_late,
+                "timezone": self.settings.timezone,
+            },
+            "timestamp": self.timestamp,
+            "byteorder": sys.byteorder,
+            "dimensions": {
+                name: {
+                    "reference": aggregate.reference,
+                    "keys": list(aggregate.keys),
+                    **{
+                        array_name: _encode_array(getattr(aggregate, array_name))
+                        for array_name in _ARRAYS
+                    },
+                }
+                for name, aggregate in self._aggregates.items()
+            },
+        }
+
+    @classmethod
+    def from_payload(cls, payload: dict[str, Any]) -> DelayStatistics:
+        statistics = cls(DelaySettings(**payload["settings"]))
+        statistics.timestamp = int(payload["timestamp"])
+        swap = payload["byteorder"] != sys.byteorder
+        for name in DELAY_DIMENSIONS:
+            item = payload["dimensions"][name]
+            aggregate = statistics._aggregates[name]
+            aggregate.reference = int(item["reference"])
+            aggregate.keys = {key: slot for slot, key in enumerate(item["keys"])}
+            for array_name in _ARRAYS:
+                values = array("d")
+                values.frombytes(base64.b64decode(item[array_name]))
+                if swap:
+                    values.byteswap()
+                setattr(aggregate, array_name, values)
+            if len(aggregate.bins) != len(aggregate.keys) * _BIN_COUNT:
+                raise ValueError(f"Histogram size mismatch in {name} delays")
+        return statistics
+
+
+def load_delay_statistics(path: Path) -> DelayStatistics:
+    """Read statistics previously persisted from :meth:`DelayStatistics.to_payload`."""
+
+    try:
+        with path.open("r", encoding="utf-8") as handle:
+            return DelayStatistics.from_payload(json.load(handle))
+    except Exception as exc:
+        raise DelayStatisticsError(f"Failed to load delay statistics from {path}") from exc
+
+
+def _iter_delays(feed: ParsedFeed) -> Iterator[tuple[str, str, int]]:
+    # The first stop time update is the stop a trip is heading for; stops it
+    # has passed are no longer listed.
+    for entity in feed.entity:
+        if not entity.HasField("trip_update"):
+            continue
+        trip_update = entity.trip_update
+        stop_id = ""
+        delay: int | None = None
+        if trip_update.stop_time_update:
+            update = trip_update.stop_time_update[0]
+            stop_id = update.stop_id
+            if update.HasField("arrival") and update.arrival.HasField("delay"):
+                delay = update.arrival.delay
+            elif update.HasField("departure") and update.departure.HasField("delay"):
+                delay = update.departure.delay
+        if delay is None and trip_update.HasField("delay"):
+            delay = trip_update.delay
+        if delay is not None:
+            yield trip_update.trip.route_id, stop_id, delay
+
+
+def _encode_array(values: array) -> str:
+    return base64.b64encode(values.tobytes()).decode("ascii")
+
+
+def _bin_index(delay: int) -> int:
+    if delay < _LOWEST_DELAY:
+        return 0
+    if delay >= _HIGHEST_DELAY:
+        return _BIN_COUNT - 1
+    return 1 + (delay - _LOWEST_DELAY) // _BIN_WIDTH
+
+
+def _percentile(histogram: array, total: float, fraction: float) -> float:
+    target = total * fraction
+    cumulative = 0.0
+    for index, weight in enumerate(histogram):
+        if weight and cumulative + weight >= target:
+            if index == 0:
+                return float(_LOWEST_DELAY)
+            if index == _BIN_COUNT - 1:
+                return float(_HIGHEST_DELAY)
+            lower = _LOWEST_DELAY + (index - 1) * _BIN_WIDTH
+            return lower + _BIN_WIDTH * (target - cumulative) / weight
+        cumulative += weight
+    return float(_HIGHEST_DELAY)
@@ -0,0 +1,93 @@
+from __future__ import annotations
+
+from collections import defaultdict
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Mapping
+
+from google.protobuf.json_format import MessageToDict
+from google.transit import gtfs_realtime_pb2
+
+from .realtime import read_feed
+
+INDEXED_FIELDS = ("trip_id", "route_id", "stop_id", "vehicle_id")
+
+
+@dataclass(slots=True)
+class RealtimeIndex:
+    """Entities of a consolidated realtime feed, indexed by the ids clients look up.
+
+    Each key maps to the positions of the matching entities, so a lookup is
+    a dictionary access per filter and only the matching entities are ever
+    rendered.
+    """
+
+    timestamp: int
+    entities: list[gtfs_realtime_pb2.FeedEntity]
+    keys: dict[str, dict[str, list[int]]] = field(default_factory=dict)
+
+    def lookup(self, filters: Mapping[str, str | None]) -> list[gtfs_realtime_pb2.FeedEntity]:
+        """Entities matching every non-empty filter, in feed order."""
+
+        selected: set[int] | None = None
+        for name, value in filters.items():
+            if not value:
+                continue
+            positions = self.keys.get(name, {}).get(value, ())
+            selected = set(positions) if selected is None else selected.intersection(positions)
+            if not selected:
+                return []
+        if selected is None:
+            return []
+        return [self.entities[position] for position in sorted(selected)]
+
+    def to_payload(self, entities: list[gtfs_realtime_pb2.FeedEntity]) -> dict[str, Any]:
+        return {
+            "timestamp": self.timestamp,
+            "entities": [
+                MessageToDict(entity, preserving_proto_field_name=True) for entity in entities
+            ],
+        }
+
+
+def build_realtime_index(feed: gtfs_realtime_pb2.FeedMessage) -> RealtimeIndex:
+    """Index the TripUpdates and VehiclePositions entities of *feed*."""
+
+    keys: dict[str, defaultdict[str, list[int]]] = {
+        name: defaultdict(list) for name in INDEXED_FIELDS
+    }
+    entities = list(feed.entity)
+    for position, entity in enumerate(entities):
+        values: dict[str, set[str]] = {name: set() for name in INDEXED_FIELDS}
+        if entity.HasField("trip_update"):
+            trip_update = entity.trip_update
+            values["trip_id"].add(trip_update.trip.trip_id)
+            values["route_id"].add(trip_update.trip.route_id)
+            values["vehicle_id"].add(trip_update.vehicle.id)
+            values["stop_id"].update(update.stop_id for update in trip_update.stop_time_update)
+        if entity.HasField("vehicle"):
+            vehicle = entity.vehicle
+            values["trip_id"].add(vehicle.trip.trip_id)
+            values["route_id"].add(vehicle.trip.route_id)
+            values["vehicle_id"].add(vehicle.vehicle.id)
+            values["stop_id"].add(vehicle.stop_id)
+        for name, found in values.items():
+            for value in found:
+                if value:
+                    keys[name][value].append(position)
+
+    return RealtimeIndex(
+        timestamp=feed.header.timestamp,
+        entities=entities,
+        keys={name: dict(index) for name, index in keys.items()},
+    )
+
+
+def load_realtime_index(path: Path) -> RealtimeIndex:
+    """Parse a consolidated feed from disk and index it.
+
+    Raises:
+        RealtimeFeedError: If the feed cannot be read.
+    """
+
+    return build_realtime_index(read_feed(path))
@@ -1,12 +1,24 @@
 from __future__ import annotations
 
-from dataclasses import dataclass
+import json
+from dataclasses import dataclass, field, replace
 from pathlib import Path
-from typing import Sequence
+from typing import Any, Callable, Mapping, Sequence, Union
 
 from google.transit import gtfs_realtime_pb2
 
-from ..utils.io import atomic_write_bytes
+from ..utils.io import atomic_dump_json, atomic_write_bytes
+from .realtime import FeedView, ParsedFeed, RealtimeFeedError, parse_feed, read_feed
+from .realtime_wire import (
+    encode_entity,
+    iter_entities,
+    rename_entity,
+    splice_feed,
+    summarize_feed,
+)
+
+# Sidecar recording which inputs a consolidated feed was built from.
+INPUTS_SUFFIX = ".inputs.json"
 
 _VARIANT_TO_AGENCY: dict[str, str] = {
     "A": "A1",
@@ -21,6 +33,7 @@ class ServiceAlertInput:
 
     path: Path
     agency_id: str
+    feed: gtfs_realtime_pb2.FeedMessage | None = field(default=None, compare=False, repr=False)
 
 
 @dataclass(frozen=True, slots=True)
@@ -29,6 +42,7 @@ class TripUpdateInput:
 
     path: Path
     agency_id: str
+    feed: gtfs_realtime_pb2.FeedMessage | None = field(default=None, compare=False, repr=False)
 
 
 @dataclass(frozen=True, slots=True)
@@ -37,6 +51,7 @@ class VehiclePositionInput:
 
     path: Path
     agency_id: str
+    feed: gtfs_realtime_pb2.FeedMessage | None = field(default=None, compare=False, repr=False)
 
 
 def agency_id_from_filename(path: Path, index: int) -> str:
@@ -46,12 +61,20 @@ def agency_id_from_filename(path: Path, index: int) -> str:
     return _VARIANT_TO_AGENCY.get(variant, f"A{index + 1}")
 
 
-def _ensure_prefixed(value: str, prefix: str) -> str:
-    if not value:
-        return value
-    if value.startswith(prefix):
-        return value
-    return f"{prefix}{value}"
+# ``feed`` of an input holds the parsed contents of ``path`` when the caller
+# already decoded it; otherwise the file is read during the merge. The merge
+# rewrites the identifiers of ``feed`` in place.
+FeedInput = Union[ServiceAlertInput, TripUpdateInput, VehiclePositionInput]
+# Rewrites the identifiers of one entity in place; returns whether anything changed.
+FeedRewrite = Callable[[gtfs_realtime_pb2.FeedEntity, str], bool]
+
+
+def _prefix_field(message: object, name: str, prefix: str) -> bool:
+    value = getattr(message, name)
+    if not value or value.startswith(prefix):
+        return False
+    setattr(message, name, f"{prefix}{value}")
+    return True
 
 
 def consolidate_service_alerts(
@@ -60,42 +83,21 @@ def consolidate_service_alerts(
 ) -> Path:
     """Merge multiple ServiceAlerts feeds into a single protobuf file."""
 
-    merged = gtfs_realtime_pb2.FeedMessage()
-    latest_timestamp = 0
-    version: str | None = None
-    incrementality: int | None = None
+    consolidate_feed(feeds, output_path, splice_service_alerts)
+    return output_path
 
-    for feed in feeds:
-        message = gtfs_realtime_pb2.FeedMessage()
-        message.ParseFromString(feed.path.read_bytes())
 
-        if message.header.gtfs_realtime_version:
-            version = message.header.gtfs_realtime_version
-        if message.header.HasField("incrementality"):
-            incrementality = message.header.incrementality
-        if message.header.timestamp > latest_timestamp:
-            latest_timestamp = message.header.timestamp
+def merge_service_alerts(feeds: Sequence[ServiceAlertInput]) -> ParsedFeed:
+    """Merge multiple ServiceAlerts feeds into a single in-memory feed."""
 
-        for entity in message.entity:
-            new_entity = merged.entity.add()
-            new_entity.CopyFrom(entity)
-            if new_entity.HasField("alert"):
-                for informed in new_entity.alert.informed_entity:
-                    if informed.agency_id:
-                        informed.agency_id = feed.agency_id
+    feeds = _parsed_inputs(feeds)
+    return merged_feed(feeds, splice_service_alerts(feeds))
 
-    header = merged.header
-    header.gtfs_realtime_version = version or "2.0"
-    header.incrementality = (
-        incrementality
-        if incrementality is not None
-        else gtfs_realtime_pb2.FeedHeader.FULL_DATASET
-    )
-    if latest_timestamp:
-        header.timestamp = latest_timestamp
 
-    atomic_write_bytes(output_path, merged.SerializeToString())
-    return output_path
+def splice_service_alerts(feeds: Sequence[ServiceAlertInput]) -> bytes:
+    """Merge multiple ServiceAlerts feeds into a serialized ``FeedMessage``."""
+
+    return _splice_feeds(feeds, _rewrite_alert_agency)
 
 
 def consolidate_trip_updates(
@@ -104,89 +106,197 @@ def consolidate_trip_updates(
 ) -> Path:
     """Merge multiple TripUpdates feeds into a single protobuf file."""
 
-    merged = gtfs_realtime_pb2.FeedMessage()
-    latest_timestamp = 0
-    version: str | None = None
-    incrementality: int | None = None
+    consolidate_feed(feeds, output_path, splice_trip_updates)
+    return output_path
 
-    for feed in feeds:
-        message = gtfs_realtime_pb2.FeedMessage()
-        message.ParseFromString(feed.path.read_bytes())
 
-        if message.header.gtfs_realtime_version:
-            version = message.header.gtfs_realtime_version
-        if message.header.HasField("incrementality"):
-            incrementality = message.header.incrementality
-        if message.header.timestamp > latest_timestamp:
-            latest_timestamp = message.header.timestamp
+def merge_trip_updates(feeds: Sequence[TripUpdateInput]) -> ParsedFeed:
+    """Merge multiple TripUpdates feeds into a single in-memory feed."""
+
+    feeds = _parsed_inputs(feeds)
+    return merged_feed(feeds, splice_trip_updates(feeds))
+
+
+def splice_trip_updates(feeds: Sequence[TripUpdateInput]) -> bytes:
+    """Merge multiple TripUpdates feeds into a serialized ``FeedMessage``."""
+
+    return _splice_feeds(feeds, _prefix_trip_update)
 
-        prefix = f"{feed.agency_id}_"
 
-        for entity in message.entity:
-            new_entity = merged.entity.add()
-            new_entity.CopyFrom(entity)
+def consolidate_vehicle_positions(
+    feeds: Sequence[VehiclePositionInput],
+    output_path: Path,
+) -> Path:
+    """Merge multiple VehiclePositions feeds into a single protobuf file."""
 
-            if new_entity.id:
-                new_entity.id = _ensure_prefixed(new_entity.id, prefix)
+    consolidate_feed(feeds, output_path, splice_vehicle_positions)
+    return output_path
+
+
+def merge_vehicle_positions(feeds: Sequence[VehiclePositionInput]) -> ParsedFeed:
+    """Merge multiple VehiclePositions feeds into a single in-memory feed."""
 
-            if not new_entity.HasField("trip_update"):
-                continue
+    feeds = _parsed_inputs(feeds)
+    return merged_feed(feeds, splice_vehicle_positions(feeds))
 
-            trip_update = new_entity.trip_update
 
-            if trip_update.trip.trip_id:
-                trip_update.trip.trip_id = _ensure_prefixed(
-                    trip_update.trip.trip_id,
-                    prefix,
-                )
+def splice_vehicle_positions(feeds: Sequence[VehiclePositionInput]) -> bytes:
+    """Merge multiple VehiclePositions feeds into a serialized ``FeedMessage``."""
 
-            if trip_update.trip.route_id:
-                trip_update.trip.route_id = _ensure_prefixed(
-                    trip_update.trip.route_id,
-                    prefix,
-                )
+    return _splice_feeds(feeds, _prefix_vehicle_position)
 
-            if trip_update.vehicle.id:
-                trip_update.vehicle.id = _ensure_prefixed(
-                    trip_update.vehicle.id,
-                    prefix,
-                )
 
-            for stop_update in trip_update.stop_time_update:
-                if stop_update.stop_id:
-                    stop_update.stop_id = _ensure_prefixed(
-                        stop_update.stop_id,
-                        prefix,
-                    )
+def splice_combined_feed(feeds: Mapping[str, bytes | memoryview]) -> bytes:
+    """Concatenate consolidated feeds of different kinds into one ``FULL_DATASET`` feed.
 
-    header = merged.header
+    *feeds* maps a short kind name (e.g. ``"vehicle"``) to a serialized
+    consolidated feed. Entities are spliced as they are; an entity whose id
+    was already used by an earlier feed gets ``-<kind>`` appended so ids stay
+    unique within the combined feed.
+    """
+
+    latest_timestamp = 0
+    version: str | None = None
+    seen: set[str] = set()
+    bodies: list[bytes | memoryview] = []
+
+    for kind, data in feeds.items():
+        header, _ = summarize_feed(data)
+        if header.gtfs_realtime_version:
+            version = header.gtfs_realtime_version
+        if header.timestamp > latest_timestamp:
+            latest_timestamp = header.timestamp
+
+        for entity_id, entity in iter_entities(data):
+            if entity_id in seen:
+                entity_id = f"{entity_id}-{kind}"
+                entity = rename_entity(entity, entity_id)
+            seen.add(entity_id)
+            bodies.append(entity)
+
+    header = gtfs_realtime_pb2.FeedHeader()
     header.gtfs_realtime_version = version or "2.0"
-    header.incrementality = (
-        incrementality
-        if incrementality is not None
-        else gtfs_realtime_pb2.FeedHeader.FULL_DATASET
-    )
+    header.incrementality = gtfs_realtime_pb2.FeedHeader.FULL_DATASET
     if latest_timestamp:
         header.timestamp = latest_timestamp
 
-    atomic_write_bytes(output_path, merged.SerializeToString())
-    return output_path
+    return splice_feed(header, bodies)
 
 
-def consolidate_vehicle_positions(
-    feeds: Sequence[VehiclePositionInput],
+def merged_feed(feeds: Sequence[FeedInput], data: bytes | memoryview) -> ParsedFeed:
+    """The feed *data* spliced from *feeds*, without decoding it again.
+
+    The splice rewrites pre-parsed inputs in place, so their entities are
+    exactly the merged ones; only the header is read from *data*. When an
+    input was read from disk during the splice, *data* is parsed instead.
+    """
+
+    if any(feed.feed is None for feed in feeds):
+        return parse_feed(data)
+    header, _ = summarize_feed(data)
+    return FeedView(header, tuple(entity for feed in feeds for entity in feed.feed.entity))
+
+
+def inputs_path(output_path: Path) -> Path:
+    """Location of the input manifest kept next to a consolidated feed."""
+
+    return output_path.with_name(f"{output_path.name}{INPUTS_SUFFIX}")
+
+
+def describe_inputs(feeds: Sequence[FeedInput]) -> dict[str, Any]:
+    """Summarize each input by agency, header timestamp, entity count and size.
+
+    Pre-parsed feeds are read from memory; otherwise only the header of the
+    file is decoded and its entities are counted on the wire.
+    """
+
+    described: dict[str, Any] = {}
+    for feed in feeds:
+        if feed.feed is not None:
+            timestamp = feed.feed.header.timestamp
+            entities = len(feed.feed.entity)
+            size = feed.path.stat().st_size
+        else:
+            data = feed.path.read_bytes()
+            header, entities = summarize_feed(data)
+            timestamp = header.timestamp
+            size = len(data)
+        described[feed.path.name] = {
+            "agency_id": feed.agency_id,
+            "timestamp": timestamp,
+            "entities": entities,
+            "size": size,
+        }
+    return described
+
+
+def inputs_unchanged(described: dict[str, Any], output_path: Path) -> bool:
+    """Whether *output_path* was consolidated from inputs described the same way.
+
+    *described* comes from :func:`describe_inputs`. Inputs without a header
+    timestamp are always treated as changed, since they cannot be told apart
+    from a new snapshot.
+    """
+
+    if not described or not output_path.exists():
+        return False
+    if any(not item["timestamp"] for item in described.values()):
+        return False
+    try:
+        with inputs_path(output_path).open("r", encoding="utf-8") as handle:
+            return json.load(handle) == described
+    except (FileNotFoundError, ValueError):
+        return False
+
+
+def record_inputs(described: dict[str, Any], output_path: Path) -> Path:
+    """Write the input manifest checked by :func:`inputs_unchanged`."""
+
+    return atomic_dump_json(inputs_path(output_path), described)
+
+
+def consolidate_feed(
+    feeds: Sequence[FeedInput],
     output_path: Path,
-) -> Path:
-    """Merge multiple VehiclePositions feeds into a single protobuf file."""
+    splice: Callable[[Sequence[Any]], bytes],
+) -> bytes | None:
+    """Write the feed merged by *splice* unless every input is unchanged since the last run.
+
+    Returns the merged bytes, or ``None`` when the previous output was kept.
+    An unchanged output keeps its bytes and modification time, so HTTP
+    validators derived from it stay valid.
+    """
+
+    described = describe_inputs(feeds)
+    if inputs_unchanged(described, output_path):
+        return None
+    spliced = splice(feeds)
+    atomic_write_bytes(output_path, spliced)
+    record_inputs(described, output_path)
+    return spliced
+
+
+def _splice_feeds(feeds: Sequence[FeedInput], rewrite: FeedRewrite) -> bytes:
+    """Concatenate the entities of *feeds* behind one freshly built header.
+
+    Identifiers are rewritten entity by entity on the parsed feeds, in
+    place. Only the entities the rewrite changed are serialized again; the
+    others are spliced from the input bytes as downloaded. Raw downloads
+    never carry the agency prefix, so in practice every entity is encoded
+    again; splicing only avoids building and copying a merged message.
+    """
 
-    merged = gtfs_realtime_pb2.FeedMessage()
     latest_timestamp = 0
     version: str | None = None
     incrementality: int | None = None
+    bodies: list[bytes | memoryview] = []
 
     for feed in feeds:
-        message = gtfs_realtime_pb2.FeedMessage()
-        message.ParseFromString(feed.path.read_bytes())
+        data: bytes | None = None
+        message = feed.feed
+        if message is None:
+            data = feed.path.read_bytes()
+            message = parse_feed(data, feed.path)
 
         if message.header.gtfs_realtime_version:
             version = message.header.gtfs_realtime_version
@@ -195,33 +305,20 @@ def consolidate_vehicle_positions(
         if message.header.timestamp > latest_timestamp:
             latest_timestamp = message.header.timestamp
 
-        prefix = f"{feed.agency_id}_"
-
-        for entity in message.entity:
-            new_entity = merged.entity.add()
-            new_entity.CopyFrom(entity)
-
-            if new_entity.id:
-                new_entity.id = _ensure_prefixed(new_entity.id, prefix)
-
-            if not new_entity.HasField("vehicle"):
-                continue
-
-            vehicle = new_entity.vehicle
+        changed = [rewrite(entity, feed.agency_id) for entity in message.entity]
+        if all(changed):
+            bodies.extend(encode_entity(entity) for entity in message.entity)
+            continue
 
-            if vehicle.stop_id:
-                vehicle.stop_id = _ensure_prefixed(vehicle.stop_id, prefix)
+        if data is None:
+            data = feed.path.read_bytes()
+        originals = [entity for _, entity in iter_entities(data)]
+        if len(originals) != len(changed):
+            raise RealtimeFeedError(f"Parsed feed does not match the contents of {feed.path}")
+        for entity, original, modified in zip(message.entity, originals, changed):
+            bodies.append(encode_entity(entity) if modified else original)
 
-            if vehicle.trip.trip_id:
-                vehicle.trip.trip_id = _ensure_prefixed(vehicle.trip.trip_id, prefix)
-
-            if vehicle.trip.route_id:
-                vehicle.trip.route_id = _ensure_prefixed(vehicle.trip.route_id, prefix)
-
-            if vehicle.vehicle.id:
-                vehicle.vehicle.id = _ensure_prefixed(vehicle.vehicle.id, prefix)
-
-    header = merged.header
+    header = gtfs_realtime_pb2.FeedHeader()
     header.gtfs_realtime_version = version or "2.0"
     header.incrementality = (
         incrementality
@@ -231,5 +328,52 @@ def consolidate_vehicle_positions(
     if latest_timestamp:
         header.timestamp = latest_timestamp
 
-    atomic_write_bytes(output_path, merged.SerializeToString())
-    return output_path
+    return splice_feed(header, bodies)
+
+
+def _parsed_inputs(feeds: Sequence[FeedInput]) -> list[FeedInput]:
+    # Inputs are parsed up front so merged_feed() can view the rewritten entities.
+    return [
+        feed if feed.feed is not None else replace(feed, feed=read_feed(feed.path))
+        for feed in feeds
+    ]
+
+
+def _rewrite_alert_agency(entity: gtfs_realtime_pb2.FeedEntity, agency_id: str) -> bool:
+    if not entity.HasField("alert"):
+        return False
+    changed = False
+    for informed in entity.alert.informed_entity:
+        if informed.agency_id and informed.agency_id != agency_id:
+            informed.agency_id = agency_id
+            changed = True
+    return changed
+
+
+def _prefix_trip_update(entity: gtfs_realtime_pb2.FeedEntity, agency_id: str) -> bool:
+    prefix = f"{agency_id}_"
+    changed = _prefix_field(entity, "id", prefix)
+    if not entity.HasField("trip_update"):
+        return changed
+
+    trip_update = entity.trip_update
+    changed |= _prefix_field(trip_update.trip, "trip_id", prefix)
+    changed |= _prefix_field(trip_update.trip, "route_id", prefix)
+    changed |= _prefix_field(trip_update.vehicle, "id", prefix)
+    for stop_update in trip_update.stop_time_update:
+        changed |= _prefix_field(stop_update, "stop_id", prefix)
+    return changed
+
+
+def _prefix_vehicle_position(entity: gtfs_realtime_pb2.FeedEntity, agency_id: str) -> bool:
+    prefix = f"{agency_id}_"
+    changed = _prefix_field(entity, "id", prefix)
+    if not entity.HasField("vehicle"):
+        return changed
+
+    vehicle = entity.vehicle
+    changed |= _prefix_field(vehicle, "stop_id", prefix)
+    changed |= _prefix_field(vehicle.trip, "trip_id", prefix)
+    changed |= _prefix_field(vehicle.trip, "route_id", prefix)
+    changed |= _prefix_field(vehicle.vehicle, "id", prefix)
+    return changed
@@ -0,0 +1,93 @@
+from __future__ import annotations
+
+from collections import defaultdict
+from dataclasses import dataclass, field
+from pathlib import Path
+from urllib.parse import quote
+
+from google.transit import gtfs_realtime_pb2
+
+from ..utils.io import atomic_write_bytes
+from .realtime_wire import entity_route_id, iter_entities, splice_feed, summarize_feed
+
+AGENCY_PARTITIONS_DIRNAME = "agencies"
+ROUTE_PARTITIONS_DIRNAME = "routes"
+PARTITION_SUFFIX = ".pb"
+
+
+@dataclass(slots=True)
+class FeedPartitions:
+    """Serialized entities of a consolidated feed grouped by agency and by route."""
+
+    header: gtfs_realtime_pb2.FeedHeader
+    agencies: dict[str, list[memoryview]] = field(default_factory=dict)
+    routes: dict[str, list[memoryview]] = field(default_factory=dict)
+
+
+def partition_path(directory: Path, key: str) -> Path:
+    """File holding the partition *key* (an agency or route id) inside *directory*."""
+
+    return directory / f"{quote(key, safe='')}{PARTITION_SUFFIX}"
+
+
+def partition_feed(data: bytes | memoryview, *, routes: bool = False) -> FeedPartitions:
+    """Group the entities of a consolidated feed without decoding them.
+
+    The agency is the prefix the merge gave every entity id (``A1_...``);
+    with *routes* the ``route_id`` of each trip update or vehicle is read
+    from the wire as well.
+    """
+
+    header, _ = summarize_feed(data)
+    agencies: defaultdict[str, list[memoryview]] = defaultdict(list)
+    by_route: defaultdict[str, list[memoryview]] = defaultdict(list)
+    for entity_id, entity in iter_entities(data):
+        agency_id, separator, _ = entity_id.partition("_")
+        if separator:
+            agencies[agency_id].append(entity)
+        if routes:
+            route_id = entity_route_id(entity)
+            if route_id:
+                by_route[route_id].append(entity)
+    return FeedPartitions(header, dict(agencies), dict(by_route))
+
+
+def write_partitions(
+    data: bytes | memoryview,
+    feed_path: Path,
+    *,
+    routes: bool = False,
+) -> list[Path]:
+    """Write the per-agency (and with *routes* per-route) feeds next to *feed_path*.
+
+    Each partition is a complete feed with the consolidated header. Partitions
+    that no longer have entities are removed, so clients never receive stale
+    vehicles.
+    """
+
+    partitions = partition_feed(data, routes=routes)
+    groups = {AGENCY_PARTITIONS_DIRNAME: partitions.agencies}
+    if routes:
+        groups[ROUTE_PARTITIONS_DIRNAME] = partitions.routes
+
+    written: list[Path] = []
+    for dirname, entities in groups.items():
+        directory = feed_path.parent / dirname
+        current: set[Path] = set()
+        for key, bodies in entities.items():
+            path = partition_path(directory, key)
+            atomic_write_bytes(path, splice_feed(partitions.header, bodies))
+            current.add(path)
+        if directory.exists():
+            for stale in directory.glob(f"*{PARTITION_SUFFIX}"):
+                if stale not in current:
+                    stale.unlink(missing_ok=True)
+        written.extend(sorted(current))
+    return written
+
+
+def empty_partition(data: bytes | memoryview) -> bytes:
+    """A feed with the header of *data* and no entities, for keys without any."""
+
+    header, _ = summarize_feed(data)
+    return splice_feed(header, [])
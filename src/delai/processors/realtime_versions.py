@@ -0,0 +1,176 @@
+from __future__ import annotations
+
+import hashlib
+import json
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any
+
+from google.transit import gtfs_realtime_pb2
+
+from ..utils.io import atomic_dump_json
+from .realtime import RealtimeFeedError
+from .realtime_wire import encode_entity, iter_entities, splice_feed, summarize_feed
+
+# Journal kept next to a consolidated feed, e.g. ``RawTripUpdates.pb.versions.json``.
+VERSIONS_SUFFIX = ".versions.json"
+# Ten minutes of 15-second ticks; older clients receive the full dataset.
+DEFAULT_HISTORY_LENGTH = 40
+
+
+@dataclass(frozen=True, slots=True)
+class FeedChange:
+    """Entities added or modified and entities removed by one feed version."""
+
+    version: int
+    changed: tuple[str, ...]
+    deleted: tuple[str, ...]
+
+
+@dataclass(slots=True)
+class FeedVersions:
+    """Per-entity digests of the latest feed and the recent history of changes.
+
+    ``version`` grows by one whenever a consolidated feed differs from the
+    previous one in at least one entity.
+    """
+
+    version: int = 0
+    digests: dict[str, str] = field(default_factory=dict)
+    history: list[FeedChange] = field(default_factory=list)
+
+    def changes_since(self, since: int) -> tuple[set[str], set[str]] | None:
+        """Ids changed and deleted after version *since*.
+
+        Returns ``None`` when *since* is not covered by the retained history,
+        in which case the client needs the full dataset.
+        """
+
+        if since > self.version:
+            return None
+        if since < self.version and (not self.history or since < self.history[0].version - 1):
+            return None
+
+        changed: set[str] = set()
+        deleted: set[str] = set()
+        for change in self.history:
+            if change.version <= since:
+                continue
+            changed.update(change.changed)
+            deleted.difference_update(change.changed)
+            deleted.update(change.deleted)
+            changed.difference_update(change.deleted)
+        return changed, deleted
+
+    def to_payload(self) -> dict[str, Any]:
+        return {
+            "version": self.version,
+            "digests": self.digests,
+            "history": [
+                {"version": change.version, "changed": change.changed, "deleted": change.deleted}
+                for change in self.history
+            ],
+        }
+
+    @classmethod
+    def from_payload(cls, payload: dict[str, Any]) -> FeedVersions:
+        return cls(
+            version=int(payload["version"]),
+            digests=dict(payload["digests"]),
+            history=[
+                FeedChange(
+                    int(item["version"]),
+                    tuple(item["changed"]),
+                    tuple(item["deleted"]),
+                )
+                for item in payload["history"]
+            ],
+        )
+
+
+def versions_path(feed_path: Path) -> Path:
+    return feed_path.with_name(f"{feed_path.name}{VERSIONS_SUFFIX}")
+
+
+def entity_digests(data: bytes) -> dict[str, str]:
+    """Hash the serialized bytes of every entity of a feed, keyed by entity id."""
+
+    return {
+        entity_id: hashlib.blake2b(payload, digest_size=12).hexdigest()
+        for entity_id, payload in iter_entities(data)
+    }
+
+
+def load_feed_versions(feed_path: Path) -> FeedVersions:
+    """Read the journal of *feed_path*; a missing journal is an empty history."""
+
+    try:
+        with versions_path(feed_path).open("r", encoding="utf-8") as handle:
+            return FeedVersions.from_payload(json.load(handle))
+    except FileNotFoundError:
+        return FeedVersions()
+    except Exception as exc:
+        raise RealtimeFeedError(f"Failed to load feed versions for {feed_path}") from exc
+
+
+def record_feed_version(
+    data: bytes,
+    feed_path: Path,
+    history_length: int = DEFAULT_HISTORY_LENGTH,
+) -> FeedVersions:
+    """Compare the freshly written feed *data* with the previous one and journal the difference.
+
+    Must be called after *feed_path* has been replaced, so readers that load
+    the journal first always find a feed at least as new.
+    """
+
+    try:
+        previous = load_feed_versions(feed_path)
+    except RealtimeFeedError:
+        previous = FeedVersions()
+
+    digests = entity_digests(data)
+    changed = tuple(
+        sorted(
+            entity_id
+            for entity_id, digest in digests.items()
+            if previous.digests.get(entity_id) != digest
+        )
+    )
+    deleted = tuple(sorted(set(previous.digests) - set(digests)))
+    if not changed and not deleted and previous.version:
+        return previous
+
+    version = previous.version + 1
+    history = [*previous.history, FeedChange(version, changed, deleted)][-history_length:]
+    versions = FeedVersions(version, digests, history)
+    atomic_dump_json(versions_path(feed_path), versions.to_payload(), indent=None, sort_keys=False)
+    return versions
+
+
+def build_differential_feed(data: bytes, versions: FeedVersions, since: int) -> bytes | None:
+    """Build a ``DIFFERENTIAL`` feed holding what changed in *data* after version *since*.
+
+    Changed entities are spliced from *data* without decoding them; deleted
+    ones are sent as ``is_deleted`` tombstones. Returns ``None`` when the
+    history no longer reaches back to *since*.
+    """
+
+    changes = versions.changes_since(since)
+    if changes is None:
+        return None
+    changed, deleted = changes
+
+    source_header, _ = summarize_feed(data)
+    header = gtfs_realtime_pb2.FeedHeader()
+    header.gtfs_realtime_version = source_header.gtfs_realtime_version or "2.0"
+    header.incrementality = gtfs_realtime_pb2.FeedHeader.DIFFERENTIAL
+    if source_header.timestamp:
+        header.timestamp = source_header.timestamp
+
+    bodies: list[bytes | memoryview] = []
+    if changed:
+        bodies.extend(payload for entity_id, payload in iter_entities(data) if entity_id in changed)
+    for entity_id in sorted(deleted):
+        bodies.append(encode_entity(gtfs_realtime_pb2.FeedEntity(id=entity_id, is_deleted=True)))
+    return splice_feed(header, bodies)
@@ -0,0 +1,213 @@
+from __future__ import annotations
+
+from typing import Iterable, Iterator
+
+from google.transit import gtfs_realtime_pb2
+
+from .realtime import RealtimeFeedError
+
+_VARINT = 0
+_FIXED64 = 1
+_LENGTH_DELIMITED = 2
+_FIXED32 = 5
+
+HEADER_FIELD = gtfs_realtime_pb2.FeedMessage.DESCRIPTOR.fields_by_name["header"].number
+ENTITY_FIELD = gtfs_realtime_pb2.FeedMessage.DESCRIPTOR.fields_by_name["entity"].number
+ENTITY_ID_FIELD = gtfs_realtime_pb2.FeedEntity.DESCRIPTOR.fields_by_name["id"].number
+# Paths from a FeedEntity down to the route_id of the trip it describes.
+_ROUTE_ID_PATHS = tuple(
+    (
+        gtfs_realtime_pb2.FeedEntity.DESCRIPTOR.fields_by_name[name].number,
+        message.DESCRIPTOR.fields_by_name["trip"].number,
+        gtfs_realtime_pb2.TripDescriptor.DESCRIPTOR.fields_by_name["route_id"].number,
+    )
+    for name, message in (
+        ("trip_update", gtfs_realtime_pb2.TripUpdate),
+        ("vehicle", gtfs_realtime_pb2.VehiclePosition),
+    )
+)
+
+
+def strip_field(data: bytes | memoryview, number: int) -> list[memoryview]:
+    """Return the runs of *data* left after removing every top-level field *number*.
+
+    Only the top-level tags are decoded; nested messages are skipped by
+    length, so the cost is one step per field rather than per byte.
+    """
+
+    view = memoryview(data)
+    runs: list[memoryview] = []
+    kept = 0
+    for field_number, start, end in _iter_fields(view):
+        if field_number == number:
+            if start > kept:
+                runs.append(view[kept:start])
+            kept = end
+    if len(view) > kept:
+        runs.append(view[kept:])
+    return runs
+
+
+def summarize_feed(data: bytes | memoryview) -> tuple[gtfs_realtime_pb2.FeedHeader, int]:
+    """Decode only the header of a serialized feed and count its entities."""
+
+    view = memoryview(data)
+    header = gtfs_realtime_pb2.FeedHeader()
+    entities = 0
+    for field_number, start, end in _iter_fields(view):
+        if field_number == ENTITY_FIELD:
+            entities += 1
+        elif field_number == HEADER_FIELD:
+            header.MergeFromString(bytes(view[_payload_start(view, start):end]))
+    return header, entities
+
+
+def iter_entities(data: bytes | memoryview) -> Iterator[tuple[str, memoryview]]:
+    """Yield the id and the serialized field, tag included, of every entity.
+
+    The returned spans can be passed to :func:`splice_feed` as they are.
+    """
+
+    view = memoryview(data)
+    for field_number, start, end in _iter_fields(view):
+        if field_number != ENTITY_FIELD:
+            continue
+        payload = view[_payload_start(view, start):end]
+        entity_id = ""
+        for nested_number, nested_start, nested_end in _iter_fields(payload):
+            if nested_number == ENTITY_ID_FIELD:
+                entity_id = str(payload[_payload_start(payload, nested_start):nested_end], "utf-8")
+                break
+        yield entity_id, view[start:end]
+
+
+def entity_route_id(field: bytes | memoryview) -> str:
+    """Route id of the trip update or vehicle in a serialized entity *field*, tag included.
+
+    Only the fields on the way to ``trip.route_id`` are walked; the rest of
+    the entity is skipped by length. Returns ``""`` when the entity has none.
+    """
+
+    view = memoryview(field)
+    entity = view[_payload_start(view, 0):]
+    for path in _ROUTE_ID_PATHS:
+        payload: memoryview | None = entity
+        for number in path:
+            payload = _field_payload(payload, number)
+            if payload is None:
+                break
+        if payload is not None:
+            return str(payload, "utf-8")
+    return ""
+
+
+def splice_feed(header: gtfs_realtime_pb2.FeedHeader, bodies: Iterable[bytes | memoryview]) -> bytes:
+    """Serialize *header* followed by header-less feed bodies as one ``FeedMessage``.
+
+    Repeated fields may simply be concatenated on the wire, so serialized
+    entities of several feeds are merged without decoding them.
+    """
+
+    payload = header.SerializeToString()
+    return b"".join(
+        (
+            encode_varint(HEADER_FIELD << 3 | _LENGTH_DELIMITED),
+            encode_varint(len(payload)),
+            payload,
+            *bodies,
+        )
+    )
+
+
+def rename_entity(field: bytes | memoryview, entity_id: str) -> bytes:
+    """Return the serialized entity *field*, tag included, with its id replaced by *entity_id*."""
+
+    view = memoryview(field)
+    payload = view[_payload_start(view, 0):]
+    encoded_id = entity_id.encode("utf-8")
+    renamed = b"".join(
+        (
+            encode_varint(ENTITY_ID_FIELD << 3 | _LENGTH_DELIMITED),
+            encode_varint(len(encoded_id)),
+            encoded_id,
+            *strip_field(payload, ENTITY_ID_FIELD),
+        )
+    )
+    return b"".join(
+        (encode_varint(ENTITY_FIELD << 3 | _LENGTH_DELIMITED), encode_varint(len(renamed)), renamed)
+    )
+
+
+def encode_entity(entity: gtfs_realtime_pb2.FeedEntity) -> bytes:
+    """Serialize *entity* as a ``FeedMessage.entity`` field ready for splicing."""
+
+    payload = entity.SerializeToString()
+    return b"".join(
+        (encode_varint(ENTITY_FIELD << 3 | _LENGTH_DELIMITED), encode_varint(len(payload)), payload)
+    )
+
+
+def encode_varint(value: int) -> bytes:
+    encoded = bytearray()
+    while value >= 0x80:
+        encoded.append(value & 0x7F | 0x80)
+        value >>= 7
+    encoded.append(value)
+    return bytes(encoded)
+
+
+def _iter_fields(view: memoryview) -> Iterator[tuple[int, int, int]]:
+    """Yield ``(field number, start, end)`` spans, tag included, of the top-level fields."""
+
+    position = 0
+    size = len(view)
+    while position < size:
+        start = position
+        tag, position = _read_varint(view, position)
+        wire_type = tag & 7
+        if wire_type == _LENGTH_DELIMITED:
+            length, position = _read_varint(view, position)
+            position += length
+        elif wire_type == _VARINT:
+            position = _read_varint(view, position)[1]
+        elif wire_type == _FIXED64:
+            position += 8
+        elif wire_type == _FIXED32:
+            position += 4
+        else:
+            raise RealtimeFeedError(f"Unsupported wire type {wire_type} in realtime feed")
+        if position > size:
+            raise RealtimeFeedError("Truncated field in realtime feed")
+        yield tag >> 3, start, position
+
+
+def _field_payload(view: memoryview, number: int) -> memoryview | None:
+    """Payload of the first length-delimited field *number* of *view*, if any."""
+
+    for field_number, start, end in _iter_fields(view):
+        if field_number == number:
+            return view[_payload_start(view, start):end]
+    return None
+
+
+def _payload_start(view: memoryview, start: int) -> int:
+    """Offset of the payload of the length-delimited field whose tag begins at *start*."""
+
+    return _read_varint(view, _read_varint(view, start)[1])[1]
+
+
+def _read_varint(data: memoryview, position: int) -> tuple[int, int]:
+    value = 0
+    shift = 0
+    while True:
+        try:
+            byte = data[position]
+        except IndexError as exc:
+            raise RealtimeFeedError("Truncated varint in realtime feed") from exc
+        position += 1
+        value |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return value, position
+        shift += 7
+        if shift > 63:
+            raise RealtimeFeedError("Malformed varint in realtime feed")
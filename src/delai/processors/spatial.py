@@ -0,0 +1,61 @@
+from __future__ import annotations
+
+import math
+from collections import defaultdict
+from typing import Iterator, Sequence
+
+EARTH_RADIUS = 6371008.8  # metres
+
+# Cells compared with each cell; the mirrored half is covered from the other side.
+_NEIGHBOUR_OFFSETS = ((0, 0), (1, -1), (1, 0), (1, 1), (0, 1))
+
+
+def haversine_distance(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    """Great-circle distance between two WGS84 points, in metres."""
+
+    phi1 = math.radians(lat1)
+    phi2 = math.radians(lat2)
+    half_dphi = (phi2 - phi1) / 2
+    half_dlambda = math.radians(lon2 - lon1) / 2
+    a = math.sin(half_dphi) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(half_dlambda) ** 2
+    return 2 * EARTH_RADIUS * math.asin(math.sqrt(min(1.0, a)))
+
+
+def iter_nearby_pairs(
+    points: Sequence[tuple[float, float]],
+    radius: float,
+) -> Iterator[tuple[int, int, float]]:
+    """Yield ``(i, j, distance)`` for every pair of points at most *radius* metres apart.
+
+    Points are ``(lat, lon)`` tuples and ``i < j``. Points are bucketed into a
+    uniform grid with cells of *radius* metres, so each point is only compared
+    with the points of its own and the adjacent cells.
+    """
+
+    if not points or radius <= 0:
+        return
+
+    # Sizing longitude cells at the most poleward point keeps every cell at least radius wide.
+    widest = math.radians(max(abs(lat) for lat, _ in points))
+    metres_per_degree = math.radians(1) * EARTH_RADIUS
+    lat_cell = radius / metres_per_degree
+    lon_cell = radius / (metres_per_degree * max(math.cos(widest), 1e-6))
+
+    cells: dict[tuple[int, int], list[int]] = defaultdict(list)
+    for index, (lat, lon) in enumerate(points):
+        cells[(math.floor(lon / lon_cell), math.floor(lat / lat_cell))].append(index)
+
+    for (cell_x, cell_y), members in cells.items():
+        for offset_x, offset_y in _NEIGHBOUR_OFFSETS:
+            same_cell = offset_x == 0 and offset_y == 0
+            others = members if same_cell else cells.get((cell_x + offset_x, cell_y + offset_y))
+            if not others:
+                continue
+            for position, first in enumerate(members):
+                lat1, lon1 = points[first]
+                candidates = others[position + 1 :] if same_cell else others
+                for second in candidates:
+                    lat2, lon2 = points[second]
+                    distance = haversine_distance(lat1, lon1, lat2, lon2)
+                    if distance <= radius:
+                        yield min(first, second), max(first, second), distance
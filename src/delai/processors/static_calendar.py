@@ -0,0 +1,261 @@
+from __future__ import annotations
+
+import base64
+import json
+import zipfile
+from collections import defaultdict
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from typing import Any, Iterable, Iterator
+
+from ..utils.io import atomic_dump_json
+from .archive import iter_bundle_table
+
+_WEEKDAY_COLUMNS = ("monday", "tuesday", "wednesday", "thursday", "friday", "saturday", "sunday")
+_DATE_FORMAT = "%Y%m%d"
+
+_SERVICE_ADDED = "1"
+_SERVICE_REMOVED = "2"
+
+
+class ServiceCalendarError(RuntimeError):
+    """Raised when the service-day index cannot be built or read."""
+
+
+@dataclass(frozen=True, slots=True)
+class ServiceCalendar:
+    """Service-day index of a consolidated bundle.
+
+    Every ``service_id`` maps to a bitset over the feed validity window where
+    bit ``n`` is set when the service runs on ``start_date + n`` days, so
+    checking a single service on a date is a shift and a mask.
+    """
+
+    start_date: date
+    days: int
+    services: dict[str, int]
+    trips: dict[str, tuple[str, ...]]
+
+    def is_active(self, service_id: str, day: date) -> bool:
+        offset = self._offset(day)
+        if offset is None:
+            return False
+        return bool(self.services.get(service_id, 0) >> offset & 1)
+
+    def active_services(self, day: date) -> list[str]:
+        offset = self._offset(day)
+        if offset is None:
+            return []
+        return sorted(
+            service_id for service_id, mask in self.services.items() if mask >> offset & 1
+        )
+
+    def active_trips(self, day: date) -> list[str]:
+        return sorted(
+            trip_id
+            for service_id in self.active_services(day)
+            for trip_id in self.trips.get(service_id, ())
+        )
+
+    def services_active_within(self, first_day: date, days: int) -> set[str]:
+        """Return the services running on any of *days* days starting at *first_day*."""
+
+        if days <= 0:
+            return set()
+        offset = (first_day - self.start_date).days
+        window = (1 << days) - 1
+        window = window << offset if offset >= 0 else window >> -offset
+        return {service_id for service_id, mask in self.services.items() if mask & window}
+
+    def to_payload(self) -> dict[str, Any]:
+        return {
+            "start_date": self.start_date.strftime(_DATE_FORMAT),
+            "days": self.days,
+            "services": {
+                service_id: _encode_mask(mask, self.days)
+                for service_id, mask in self.services.items()
+            },
+            "trips": {service_id: list(trip_ids) for service_id, trip_ids in self.trips.items()},
+        }
+
+    @classmethod
+    def from_payload(cls, payload: dict[str, Any]) -> ServiceCalendar:
+        return cls(
+            start_date=_parse_date(payload["start_date"]),
+            days=int(payload["days"]),
+            services={
+                service_id: _decode_mask(encoded)
+                for service_id, encoded in payload["services"].items()
+            },
+            trips={service_id: tuple(trip_ids) for service_id, trip_ids in payload["trips"].items()},
+        )
+
+    def _offset(self, day: date) -> int | None:
+        offset = (day - self.start_date).days
+        if 0 <= offset < self.days:
+            return offset
+        return None
+
+
+def build_service_calendar(bundle_path: Path) -> ServiceCalendar:
+    """Expand ``calendar.txt`` and ``calendar_dates.txt`` into a service-day index.
+
+    Raises:
+        ServiceCalendarError: If the bundle cannot be read.
+    """
+
+    try:
+        with zipfile.ZipFile(bundle_path) as archive:
+            calendar = expand_service_days(
+                iter_bundle_table(archive, "calendar.txt"),
+                iter_bundle_table(archive, "calendar_dates.txt"),
+            )
+            trips = _trips_by_service(iter_bundle_table(archive, "trips.txt"))
+    except Exception as exc:
+        raise ServiceCalendarError(f"Failed to read service calendar from {bundle_path}") from exc
+
+    return ServiceCalendar(
+        start_date=calendar.start_date,
+        days=calendar.days,
+        services=calendar.services,
+        trips=trips,
+    )
+
+
+def write_service_calendar(bundle_path: Path, output_path: Path | None = None) -> Path:
+    """Build the service-day index for *bundle_path* and persist it as JSON.
+
+    The index defaults to ``GTFS-calendar.json`` next to the bundle.
+    """
+
+    if output_path is None:
+        output_path = bundle_path.with_name(f"{bundle_path.stem}-calendar.json")
+
+    calendar = build_service_calendar(bundle_path)
+    return atomic_dump_json(output_path, calendar.to_payload(), indent=None)
+
+
+def load_service_calendar(path: Path) -> ServiceCalendar:
+    """Read an index previously written by :func:`write_service_calendar`."""
+
+    try:
+        with path.open("r", encoding="utf-8") as handle:
+            return ServiceCalendar.from_payload(json.load(handle))
+    except Exception as exc:
+        raise ServiceCalendarError(f"Failed to load service calendar from {path}") from exc
+
+
+def expand_service_days(
+    calendar_rows: Iterable[list[str]],
+    calendar_date_rows: Iterable[list[str]],
+) -> ServiceCalendar:
+    """Build service bitsets from ``calendar.txt`` and ``calendar_dates.txt`` rows.
+
+    Both iterables yield the header first. The returned calendar carries no
+    trips; the window spans every date referenced by either table.
+    """
+
+    weekly = list(_iter_weekly_services(iter(calendar_rows)))
+    exceptions = list(_iter_service_exceptions(iter(calendar_date_rows)))
+
+    dates = [day for _, start, end, _ in weekly for day in (start, end)]
+    dates.extend(day for _, day, _ in exceptions)
+    if not dates:
+        return ServiceCalendar(start_date=date.today(), days=0, services={}, trips={})
+
+    start_date = min(dates)
+    days = (max(dates) - start_date).days + 1
+
+    services: dict[str, int] = defaultdict(int)
+    for service_id, start, end, weekdays in weekly:
+        mask = services[service_id]
+        offset = (start - start_date).days
+        current = start
+        while current <= end:
+            if weekdays[current.weekday()]:
+                mask |= 1 << offset
+            current += timedelta(days=1)
+            offset += 1
+        services[service_id] = mask
+
+    # Exceptions are applied after the weekly patterns so they always win.
+    for service_id, day, exception_type in exceptions:
+        bit = 1 << (day - start_date).days
+        if exception_type == _SERVICE_ADDED:
+            services[service_id] |= bit
+        elif exception_type == _SERVICE_REMOVED:
+            services[service_id] &= ~bit
+
+    return ServiceCalendar(start_date=start_date, days=days, services=dict(services), trips={})
+
+
+def _iter_weekly_services(
+    rows: Iterator[list[str]],
+) -> Iterator[tuple[str, date, date, tuple[bool, ...]]]:
+    header = next(rows, [])
+    if not {"service_id", "start_date", "end_date", *_WEEKDAY_COLUMNS} <= set(header):
+        return
+
+    service_position = header.index("service_id")
+    start_position = header.index("start_date")
+    end_position = header.index("end_date")
+    weekday_positions = [header.index(column) for column in _WEEKDAY_COLUMNS]
+    width = max(service_position, start_position, end_position, *weekday_positions) + 1
+
+    for row in rows:
+        if len(row) < width or not row[service_position]:
+            continue
+        try:
+            start = _parse_date(row[start_position])
+            end = _parse_date(row[end_position])
+        except ValueError:
+            continue
+        weekdays = tuple(row[position].strip() == "1" for position in weekday_positions)
+        yield row[service_position], start, end, weekdays
+
+
+def _iter_service_exceptions(rows: Iterator[list[str]]) -> Iterator[tuple[str, date, str]]:
+    header = next(rows, [])
+    if not {"service_id", "date", "exception_type"} <= set(header):
+        return
+
+    service_position = header.index("service_id")
+    date_position = header.index("date")
+    type_position = header.index("exception_type")
+    width = max(service_position, date_position, type_position) + 1
+
+    for row in rows:
+        if len(row) < width or not row[service_position]:
+            continue
+        try:
+            day = _parse_date(row[date_position])
+        except ValueError:
+            continue
+        yield row[service_position], day, row[type_position].strip()
+
+
+def _trips_by_service(rows: Iterator[list[str]]) -> dict[str, tuple[str, ...]]:
+    header = next(rows, [])
+    if "service_id" not in header or "trip_id" not in header:
+        return {}
+
+    service_position = header.index("service_id")
+    trip_position = header.index("trip_id")
+    trips: dict[str, list[str]] = defaultdict(list)
+    for row in rows:
+        if row and row[trip_position]:
+            trips[row[service_position]].append(row[trip_position])
+    return {service_id: tuple(trip_ids) for service_id, trip_ids in trips.items()}
+
+
+def _parse_date(value: str) -> date:
+    return datetime.strptime(value.strip(), _DATE_FORMAT).date()
+
+
+def _encode_mask(mask: int, days: int) -> str:
+    return base64.b64encode(mask.to_bytes((days + 7) // 8, "little")).decode("ascii")
+
+
+def _decode_mask(encoded: str) -> int:
+    return int.from_bytes(base64.b64decode(encoded), "little")
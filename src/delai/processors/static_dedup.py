@@ -0,0 +1,106 @@
+from __future__ import annotations
+
+import hashlib
+from collections import defaultdict
+from dataclasses import dataclass
+from itertools import groupby
+from typing import Iterable, Sequence
+
+
+@dataclass(frozen=True, slots=True)
+class DeduplicationStats:
+    """Outcome of a shape and trip-pattern deduplication pass."""
+
+    shapes: int
+    duplicate_shapes: int
+    rewritten_trips: int
+    trips: int
+    stop_patterns: int
+
+
+def shape_fingerprints(
+    header: Sequence[str],
+    rows: Iterable[Sequence[str]],
+) -> dict[str, bytes]:
+    """Fingerprint the ordered point sequence of every shape in ``shapes.txt``.
+
+    Coordinates and ``shape_dist_traveled`` are compared numerically, so
+    ``50.0`` and ``50.00`` match. Shapes whose points cannot be parsed get no
+    fingerprint and are never treated as duplicates.
+    """
+
+    columns = {name: position for position, name in enumerate(header)}
+    shape_position = columns["shape_id"]
+    lat_position = columns["shape_pt_lat"]
+    lon_position = columns["shape_pt_lon"]
+    sequence_position = columns["shape_pt_sequence"]
+    distance_position = columns.get("shape_dist_traveled")
+
+    points: dict[str, list[tuple[int, float, float, float | None]]] = defaultdict(list)
+    invalid: set[str] = set()
+    for row in rows:
+        shape_id = row[shape_position]
+        try:
+            distance_value = row[distance_position] if distance_position is not None else ""
+            points[shape_id].append(
+                (
+                    int(row[sequence_position]),
+                    float(row[lat_position]),
+                    float(row[lon_position]),
+                    float(distance_value) if distance_value else None,
+                )
+            )
+        except ValueError:
+            invalid.add(shape_id)
+
+    fingerprints: dict[str, bytes] = {}
+    for shape_id, shape_points in points.items():
+        if shape_id in invalid:
+            continue
+        shape_points.sort()
+        digest = hashlib.blake2b(digest_size=16)
+        for _, lat, lon, distance in shape_points:
+            digest.update(f"{lat!r},{lon!r},{distance!r};".encode("ascii"))
+        fingerprints[shape_id] = digest.digest()
+    return fingerprints
+
+
+def canonical_shapes(fingerprints: dict[str, bytes]) -> dict[str, str]:
+    """Map every duplicate ``shape_id`` to the smallest id with the same fingerprint."""
+
+    groups: dict[bytes, list[str]] = defaultdict(list)
+    for shape_id, fingerprint in fingerprints.items():
+        groups[fingerprint].append(shape_id)
+
+    replacements: dict[str, str] = {}
+    for shape_ids in groups.values():
+        if len(shape_ids) < 2:
+            continue
+        canonical, *duplicates = sorted(shape_ids)
+        for shape_id in duplicates:
+            replacements[shape_id] = canonical
+    return replacements
+
+
+def stop_pattern_fingerprints(
+    header: Sequence[str],
+    rows: Iterable[Sequence[str]],
+) -> dict[str, bytes]:
+    """Fingerprint each trip's stop sequence from ``stop_times.txt`` rows.
+
+    Rows must be ordered by ``(trip_id, stop_sequence)``, as in the
+    consolidated bundle.
+    """
+
+    columns = {name: position for position, name in enumerate(header)}
+    trip_position = columns["trip_id"]
+    stop_position = columns["stop_id"]
+
+    fingerprints: dict[str, bytes] = {}
+    for trip_id, trip_rows in groupby(rows, key=lambda row: row[trip_position]):
+        digest = hashlib.blake2b(digest_size=16)
+        for row in trip_rows:
+            digest.update(row[stop_position].encode("utf-8"))
+            digest.update(b"\x1f")
+        fingerprints[trip_id] = digest.digest()
+    return fingerprints
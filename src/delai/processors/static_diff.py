@@ -0,0 +1,280 @@
+from __future__ import annotations
+
+import csv
+import zipfile
+from itertools import groupby
+from operator import itemgetter
+from pathlib import Path
+from typing import Any, Iterator
+
+from ..utils.io import atomic_dump_json
+from .archive import iter_bundle_table
+
+# Column identifying the entity each row belongs to, per compared table.
+_ENTITY_COLUMNS: dict[str, str] = {
+    "agency.txt": "agency_id",
+    "calendar.txt": "service_id",
+    "calendar_dates.txt": "service_id",
+    "frequencies.txt": "trip_id",
+    "routes.txt": "route_id",
+    "shapes.txt": "shape_id",
+    "stop_times.txt": "trip_id",
+    "stops.txt": "stop_id",
+    "trips.txt": "trip_id",
+}
+
+_READ_CHUNK_SIZE = 1024 * 1024  # 1 MiB
+
+
+class StaticDiffError(RuntimeError):
+    """Raised when two static bundles cannot be compared."""
+
+
+class _MissingKeyColumn(StaticDiffError):
+    """Raised when a table lacks the column its entities are keyed by."""
+
+
+def diff_static_bundles(previous_zip: Path, current_zip: Path) -> dict[str, Any]:
+    """Compare two consolidated GTFS bundles table by table.
+
+    Every row is hashed and the hashes are summed per entity (``trip_id``
+    for ``stop_times.txt``, ``shape_id`` for ``shapes.txt`` and so on), so
+    an entity is reported as modified when any of its rows changed,
+    regardless of row order. Counts are therefore per entity, not per row.
+    Tables without their key column (``agency_id`` is optional, for one)
+    are listed under ``skipped`` instead of being compared.
+
+    Returns:
+        A JSON-serializable document with per-table counts, the skipped
+        tables and the IDs of added, removed and modified routes, stops,
+        trips, services and shapes.
+
+    Raises:
+        StaticDiffError: If either bundle cannot be read.
+    """
+
+    tables: dict[str, dict[str, list[str]]] = {}
+    skipped: list[str] = []
+    try:
+        with zipfile.ZipFile(previous_zip) as previous, zipfile.ZipFile(current_zip) as current:
+            for name in sorted(_ENTITY_COLUMNS):
+                try:
+                    table_diff = _diff_table(previous, current, name)
+                except _MissingKeyColumn:
+                    skipped.append(name)
+                    continue
+                if table_diff is not None:
+                    tables[name] = table_diff
+    except StaticDiffError:
+        raise
+    except Exception as exc:
+        raise StaticDiffError(
+            f"Failed to diff static bundles {previous_zip} and {current_zip}"
+        ) from exc
+
+    summary = {
+        "routes": _merge_changes(tables, "routes.txt"),
+        "stops": _merge_changes(tables, "stops.txt"),
+        "trips": _merge_changes(tables, "trips.txt", "stop_times.txt", "frequencies.txt"),
+        "services": _merge_changes(tables, "calendar.txt", "calendar_dates.txt"),
+        "shapes": _merge_changes(tables, "shapes.txt"),
+    }
+
+    counts = {
+        name: {change: len(ids) for change, ids in table_diff.items()}
+        for name, table_diff in tables.items()
+    }
+
+    return {
+        "changed": any(any(table_diff.values()) for table_diff in tables.values()),
+        "summary": summary,
+        "tables": counts,
+        "skipped": skipped,
+    }
+
+
+def write_static_diff(previous_zip: Path, current_zip: Path, output_path: Path) -> Path:
+    """Diff two bundles and store the summary as JSON at *output_path*."""
+
+    atomic_dump_json(output_path, diff_static_bundles(previous_zip, current_zip))
+    return output_path
+
+
+def _diff_table(
+    previous: zipfile.ZipFile,
+    current: zipfile.ZipFile,
+    name: str,
+) -> dict[str, list[str]] | None:
+    previous_header = _read_header(previous, name)
+    current_header = _read_header(current, name)
+    if previous_header is None and current_header is None:
+        return None
+
+    column = _ENTITY_COLUMNS[name]
+    if previous_header == current_header:
+        projection = None
+    else:
+        projection = sorted(set(previous_header or ()) | set(current_header or ()))
+
+    before = _entity_digests(previous, name, previous_header, column, projection)
+    after = _entity_digests(current, name, current_header, column, projection)
+
+    return {
+        "added": sorted(key.decode("utf-8") for key in after.keys() - before.keys()),
+        "removed": sorted(key.decode("utf-8") for key in before.keys() - after.keys()),
+        "modified": sorted(
+            key.decode("utf-8")
+            for key, digest in after.items()
+            if key in before and before[key] != digest
+        ),
+    }
+
+
+def _merge_changes(
+    tables: dict[str, dict[str, list[str]]],
+    name: str,
+    *children: str,
+) -> dict[str, list[str]]:
+    """Summarize an entity table, counting changes in child tables as modifications."""
+
+    table_diff = tables.get(name, {})
+    added = set(table_diff.get("added", ()))
+    removed = set(table_diff.get("removed", ()))
+    modified = set(table_diff.get("modified", ()))
+    for child in children:
+        for ids in tables.get(child, {}).values():
+            modified.update(ids)
+    return {
+        "added": sorted(added),
+        "removed": sorted(removed),
+        "modified": sorted(modified - added - removed),
+    }
+
+
+def _read_header(archive: zipfile.ZipFile, name: str) -> list[str] | None:
+    rows = iter_bundle_table(archive, name)
+    header = next(rows, None)
+    rows.close()
+    return header
+
+
+def _entity_digests(
+    archive: zipfile.ZipFile,
+    name: str,
+    header: list[str] | None,
+    column: str,
+    projection: list[str] | None,
+) -> dict[bytes, int]:
+    if not header:
+        return {}
+    if column not in header:
+        raise _MissingKeyColumn(f"{name} has no {column} column")
+
+    position = header.index(column)
+    if projection is not None:
+        return _projected_digests(archive, name, header, position, projection)
+
+    # Hash records and group them in C; Python-level work happens per entity run.
+    # ``hash`` is salted per process, which is fine as both bundles are read here.
+    split_at = position + 1
+    digests: dict[bytes, int] = {}
+    for records, quoted in _iter_record_batches(archive, name):
+        if quoted:
+            keys = [_record_key(record, position) for record in records]
+        else:
+            try:
+                keys = [record.split(b",", split_at)[position] for record in records]
+            except IndexError:
+                keys = [_record_key(record, position) for record in records]
+        for key, group in groupby(zip(keys, map(hash, records)), key=itemgetter(0)):
+            digests[key] = digests.get(key, 0) + sum(map(itemgetter(1), group))
+    return digests
+
+
+def _record_key(record: bytes, position: int) -> bytes:
+    fields = next(csv.reader([record.decode("utf-8")]))
+    return fields[position].encode("utf-8") if position < len(fields) else b""
+
+
+def _projected_digests(
+    archive: zipfile.ZipFile,
+    name: str,
+    header: list[str],
+    position: int,
+    projection: list[str],
+) -> dict[bytes, int]:
+    """Digest rows over a common column order, for bundles whose headers differ."""
+
+    positions = {column: index for index, column in enumerate(header)}
+    indexes = [positions.get(column) for column in projection]
+    digests: dict[bytes, int] = {}
+    rows = iter_bundle_table(archive, name)
+    next(rows, None)
+    for row in rows:
+        if not row:
+            continue
+        values = tuple(
+            row[index] if index is not None and index < len(row) else "" for index in indexes
+        )
+        key = row[position].encode("utf-8")
+        digests[key] = digests.get(key, 0) + hash(values)
+    return digests
+
+
+def _iter_record_batches(
+    archive: zipfile.ZipFile,
+    name: str,
+) -> Iterator[tuple[list[bytes], bool]]:
+    """Yield the raw data records of a table in batches, header excluded.
+
+    Line breaks inside quoted values are joined back into their record and
+    ``\r\n`` terminators are normalized, so each item is one CSV record.
+    Each batch is flagged when it contains quoted values.
+    """
+
+    with archive.open(name) as handle:
+        remainder = b""
+        header_seen = False
+        while True:
+            chunk = handle.read(_READ_CHUNK_SIZE)
+            if not chunk:
+                break
+            data = remainder + chunk
+            cut = data.rfind(b"\n")
+            if cut < 0:
+                remainder = data
+                continue
+            data, remainder = data[:cut], data[cut + 1 :]
+            if data.endswith(b"\r"):
+                data = data[:-1]
+            quoted = b'"' in data
+            if quoted:
+                # Keep a record with an open quote together with the next chunk.
+                records = _join_quoted(data.replace(b"\r\n", b"\n").split(b"\n"))
+                if records and records[-1].count(b'"') % 2:
+                    remainder = records.pop() + b"\n" + remainder
+            else:
+                records = data.replace(b"\r\n", b"\n").split(b"\n")
+            if not header_seen and records:
+                header_seen = True
+                records = records[1:]
+            yield [record for record in records if record], quoted
+        remainder = remainder.rstrip(b"\r\n")
+        if header_seen and remainder:
+            yield [remainder], b'"' in remainder
+
+
+def _join_quoted(lines: list[bytes]) -> list[bytes]:
+    records: list[bytes] = []
+    pending: bytes | None = None
+    for line in lines:
+        if pending is not None:
+            line = pending + b"\n" + line
+            pending = None
+        if line.count(b'"') % 2:
+            pending = line
+            continue
+        records.append(line)
+    if pending is not None:
+        records.append(pending)
+    return records
@@ -0,0 +1,251 @@
+from __future__ import annotations
+
+import math
+import zipfile
+from collections import defaultdict
+from pathlib import Path
+from typing import Any, Sequence
+
+from ..utils.io import atomic_dump_json
+from .archive import iter_bundle_table
+
+DEFAULT_ZOOM_LEVELS: tuple[int, ...] = (10, 13, 16)
+
+# Web Mercator ground resolution at the equator for zoom level 0 (metres per pixel).
+_EQUATOR_RESOLUTION = 156543.03392
+_EARTH_RADIUS = 6371008.8
+_POLYLINE_PRECISION = 5
+
+
+class RouteGeometryError(RuntimeError):
+    """Raised when route geometry cannot be derived from a static bundle."""
+
+
+def build_route_geometry(
+    bundle_path: Path,
+    output_dir: Path,
+    zoom_levels: Sequence[int] = DEFAULT_ZOOM_LEVELS,
+) -> list[Path]:
+    """Export simplified, quantized shape geometry for each zoom level.
+
+    Each shape in ``shapes.txt`` is simplified with Douglas–Peucker using a
+    tolerance of one screen pixel at the given zoom, and its coordinates are
+    rounded to a precision matching that zoom. For every zoom level two files
+    are written to *output_dir*: ``routes-z<zoom>.geojson`` (a
+    FeatureCollection of LineStrings) and ``routes-z<zoom>.polyline.json``
+    (Google encoded polylines). Features carry the ``shape_id`` and the
+    ``route_ids`` of the trips using the shape.
+
+    Raises:
+        RouteGeometryError: If the bundle cannot be read.
+    """
+
+    try:
+        with zipfile.ZipFile(bundle_path) as archive:
+            shapes = _read_shapes(archive)
+            routes_by_shape = _read_shape_routes(archive)
+    except Exception as exc:
+        raise RouteGeometryError(f"Failed to read shapes from {bundle_path}") from exc
+
+    # Significance is tolerance independent, so simplification runs once per shape.
+    ranked = {
+        shape_id: (points, _rank_points(points)) for shape_id, points in sorted(shapes.items())
+    }
+    latitude = _mean_latitude(shapes)
+
+    generated: list[Path] = []
+    for zoom in zoom_levels:
+        tolerance = _EQUATOR_RESOLUTION * math.cos(math.radians(latitude)) / (2**zoom)
+        decimals = 4 if zoom < 12 else 5
+
+        features: list[dict[str, Any]] = []
+        polylines: list[dict[str, Any]] = []
+        for shape_id, (points, significance) in ranked.items():
+            simplified = _quantize(
+                [point for point, weight in zip(points, significance) if weight > tolerance],
+                decimals,
+            )
+            if len(simplified) < 2:
+                continue
+            route_ids = sorted(routes_by_shape.get(shape_id, ()))
+            features.append(
+                {
+                    "type": "Feature",
+                    "properties": {"shape_id": shape_id, "route_ids": route_ids},
+                    "geometry": {
+                        "type": "LineString",
+                        "coordinates": [[lon, lat] for lat, lon in simplified],
+                    },
+                }
+            )
+            polylines.append(
+                {
+                    "shape_id": shape_id,
+                    "route_ids": route_ids,
+                    "polyline": encode_polyline(simplified),
+                }
+            )
+
+        generated.append(
+            atomic_dump_json(
+                output_dir / f"routes-z{zoom}.geojson",
+                {"type": "FeatureCollection", "features": features},
+                indent=None,
+            )
+        )
+        generated.append(
+            atomic_dump_json(
+                output_dir / f"routes-z{zoom}.polyline.json",
+                {"zoom": zoom, "precision": _POLYLINE_PRECISION, "shapes": polylines},
+                indent=None,
+            )
+        )
+
+    return generated
+
+
+def encode_polyline(points: Sequence[tuple[float, float]]) -> str:
+    """Encode ``(lat, lon)`` pairs using the Google polyline algorithm."""
+
+    factor = 10**_POLYLINE_PRECISION
+    chunks: list[str] = []
+    previous_lat = previous_lon = 0
+    for lat, lon in points:
+        scaled_lat = round(lat * factor)
+        scaled_lon = round(lon * factor)
+        chunks.append(_encode_value(scaled_lat - previous_lat))
+        chunks.append(_encode_value(scaled_lon - previous_lon))
+        previous_lat, previous_lon = scaled_lat, scaled_lon
+    return "".join(chunks)
+
+
+def _encode_value(value: int) -> str:
+    value = ~(value << 1) if value < 0 else value << 1
+    chunks: list[str] = []
+    while value >= 0x20:
+        chunks.append(chr((0x20 | (value & 0x1F)) + 63))
+        value >>= 5
+    chunks.append(chr(value + 63))
+    return "".join(chunks)
+
+
+def _read_shapes(archive: zipfile.ZipFile) -> dict[str, list[tuple[float, float]]]:
+    rows = iter_bundle_table(archive, "shapes.txt")
+    header = next(rows, [])
+    if not header:
+        return {}
+
+    shape_position = header.index("shape_id")
+    lat_position = header.index("shape_pt_lat")
+    lon_position = header.index("shape_pt_lon")
+    sequence_position = header.index("shape_pt_sequence")
+
+    collected: dict[str, list[tuple[int, float, float]]] = defaultdict(list)
+    for row in rows:
+        if not row:
+            continue
+        try:
+            collected[row[shape_position]].append(
+                (int(row[sequence_position]), float(row[lat_position]), float(row[lon_position]))
+            )
+        except ValueError:
+            continue
+
+    return {
+        shape_id: [(lat, lon) for _, lat, lon in sorted(points)]
+        for shape_id, points in collected.items()
+    }
+
+
+def _read_shape_routes(archive: zipfile.ZipFile) -> dict[str, set[str]]:
+    rows = iter_bundle_table(archive, "trips.txt")
+    header = next(rows, [])
+    if "shape_id" not in header or "route_id" not in header:
+        return {}
+
+    shape_position = header.index("shape_id")
+    route_position = header.index("route_id")
+    routes: dict[str, set[str]] = defaultdict(set)
+    for row in rows:
+        if row and row[shape_position]:
+            routes[row[shape_position]].add(row[route_position])
+    return routes
+
+
+def _rank_points(points: list[tuple[float, float]]) -> list[float]:
+    """Compute the Douglas–Peucker significance of every point.
+
+    A point survives simplification with tolerance ``t`` exactly when its
+    significance exceeds ``t``. Endpoints are always kept.
+    """
+
+    count = len(points)
+    significance = [0.0] * count
+    if count == 0:
+        return significance
+    significance[0] = significance[-1] = math.inf
+    if count < 3:
+        return significance
+
+    projected = _project(points)
+    stack = [(0, count - 1, math.inf)]
+    while stack:
+        first, last, ceiling = stack.pop()
+        if last - first < 2:
+            continue
+        index, distance = _farthest_point(projected, first, last)
+        # A point is only kept if the segment it splits was kept as well.
+        weight = min(distance, ceiling)
+        significance[index] = weight
+        stack.append((first, index, weight))
+        stack.append((index, last, weight))
+
+    return significance
+
+
+def _farthest_point(
+    projected: list[tuple[float, float]],
+    first: int,
+    last: int,
+) -> tuple[int, float]:
+    ax, ay = projected[first]
+    bx, by = projected[last]
+    dx = bx - ax
+    dy = by - ay
+    length_squared = dx * dx + dy * dy
+
+    best_index = first + 1
+    best_distance = -1.0
+    for index in range(first + 1, last):
+        px, py = projected[index]
+        if length_squared == 0:
+            distance = math.hypot(px - ax, py - ay)
+        else:
+            t = ((px - ax) * dx + (py - ay) * dy) / length_squared
+            t = 0.0 if t < 0 else 1.0 if t > 1 else t
+            distance = math.hypot(px - (ax + t * dx), py - (ay + t * dy))
+        if distance > best_distance:
+            best_index, best_distance = index, distance
+    return best_index, best_distance
+
+
+def _project(points: list[tuple[float, float]]) -> list[tuple[float, float]]:
+    """Project to local equirectangular metres, accurate at city scale."""
+
+    scale = math.cos(math.radians(points[0][0]))
+    factor = math.radians(1) * _EARTH_RADIUS
+    return [(lon * factor * scale, lat * factor) for lat, lon in points]
+
+
+def _quantize(points: list[tuple[float, float]], decimals: int) -> list[tuple[float, float]]:
+    quantized: list[tuple[float, float]] = []
+    for lat, lon in points:
+        point = (round(lat, decimals), round(lon, decimals))
+        if not quantized or quantized[-1] != point:
+            quantized.append(point)
+    return quantized
+
+
+def _mean_latitude(shapes: dict[str, list[tuple[float, float]]]) -> float:
+    latitudes = [points[0][0] for points in shapes.values() if points]
+    return sum(latitudes) / len(latitudes) if latitudes else 0.0
@@ -1,13 +1,29 @@
 from __future__ import annotations
 
 import csv
+import heapq
 import io
-import zipfile
-from dataclasses import dataclass
+import logging
+import tempfile
+from dataclasses import dataclass, field
+from datetime import date
 from pathlib import Path
-from typing import Iterable, Sequence
-
-from ..utils.io import atomic_write
+from typing import IO, Any, Callable, Iterable, Iterator, Sequence
+
+from ..utils.io import atomic_dump_json
+from .archive import BundleCompression, publish_zip
+from .static_calendar import expand_service_days
+from .static_dedup import (
+    DeduplicationStats,
+    canonical_shapes,
+    shape_fingerprints,
+    stop_pattern_fingerprints,
+)
+from .static_stations import ClusterStop, StationSettings, cluster_statistics, cluster_stops
+from .static_transfers import TransferSettings, TransferStop, generate_transfers
+from .static_validation import StaticValidationError, validate_references
+
+LOGGER = logging.getLogger(__name__)
 
 _STATIC_VARIANT_MAP = {
     "A": "A1",
@@ -20,6 +36,52 @@ _STATIC_STEM_MAP = {
     "ALD-GTFS": "A5",
 }
 
+# Identifier columns that receive the ``<agency>_`` prefix, per table.
+_PREFIXED_COLUMNS: dict[str, tuple[str, ...]] = {
+    "calendar.txt": ("service_id",),
+    "calendar_dates.txt": ("service_id",),
+    "routes.txt": ("route_id",),
+    "shapes.txt": ("shape_id",),
+    "stops.txt": ("stop_id", "parent_station"),
+    "stop_times.txt": ("trip_id", "stop_id"),
+    "trips.txt": ("trip_id", "route_id", "service_id", "block_id", "shape_id"),
+}
+
+_AGENCY_TABLES = (
+    "agency.txt",
+    "calendar.txt",
+    "calendar_dates.txt",
+    "routes.txt",
+    "shapes.txt",
+    "stops.txt",
+    "stop_times.txt",
+    "trips.txt",
+)
+
+_SKIPPED_EXTRA_TABLES = frozenset({*_AGENCY_TABLES, "feed_info.txt", "blocks.txt"})
+
+# Columns that must reference retained entities for a row to stay in the window bundle.
+_WINDOW_KEYS: dict[str, dict[str, str]] = {
+    "calendar.txt": {"service_id": "service_id"},
+    "calendar_dates.txt": {"service_id": "service_id"},
+    "trips.txt": {"trip_id": "trip_id"},
+    "stop_times.txt": {"trip_id": "trip_id"},
+    "frequencies.txt": {"trip_id": "trip_id"},
+    "routes.txt": {"route_id": "route_id"},
+    "shapes.txt": {"shape_id": "shape_id"},
+    "stops.txt": {"stop_id": "stop_id"},
+    "transfers.txt": {"from_stop_id": "stop_id", "to_stop_id": "stop_id"},
+}
+
+_STATION_COLUMNS = ("stop_id", "stop_name", "stop_lat", "stop_lon", "location_type", "parent_station")
+_TRANSFER_COLUMNS = ("from_stop_id", "to_stop_id", "transfer_type", "min_transfer_time")
+
+_RENDER_CHUNK_SIZE = 1024 * 1024  # 1 MiB
+
+# Rough CPython footprint of a buffered row: list header plus one str per field.
+_ROW_OVERHEAD = 56
+_FIELD_OVERHEAD = 57
+
 
 @dataclass(frozen=True, slots=True)
 class StaticFeedInput:
@@ -30,6 +92,122 @@ class StaticFeedInput:
     agency_id: str
 
 
+@dataclass(slots=True)
+class _Table:
+    """Rows of a consolidated table, stored as lists aligned to ``header``.
+
+    Rows appended before a later feed widened the header are shorter than
+    ``header``; they are padded when the table is written.
+    """
+
+    header: list[str] = field(default_factory=list)
+    columns: dict[str, int] = field(default_factory=dict)
+    rows: list[list[str]] = field(default_factory=list)
+
+    def extend(self, header: Sequence[str], rows: Iterable[list[str]]) -> None:
+        positions: list[int] = []
+        for column in header:
+            position = self.columns.get(column)
+            if position is None:
+                position = len(self.header)
+                self.columns[column] = position
+                self.header.append(column)
+            positions.append(position)
+
+        if positions != list(range(len(positions))):
+            rows = _remapped(rows, positions, len(self.header))
+        self._store(rows)
+
+    def _store(self, rows: Iterable[list[str]]) -> None:
+        self.rows.extend(rows)
+
+    def iter_rows(self) -> Iterable[list[str]]:
+        return _padded(self.rows, len(self.header))
+
+    def render(self) -> bytes | Iterable[bytes]:
+        buffer = io.StringIO()
+        writer = csv.writer(buffer, lineterminator="\n")
+        writer.writerow(self.header)
+        writer.writerows(self.iter_rows())
+        return buffer.getvalue().encode("utf-8")
+
+    def close(self) -> None:
+        pass
+
+
+@dataclass(slots=True)
+class _SortedTable(_Table):
+    """Table emitted in ``(trip_id, stop_sequence)`` order via an external merge sort.
+
+    When ``memory_limit`` (in bytes) is set, buffered rows are sorted and
+    spilled to temporary run files in ``spill_dir`` whenever their estimated
+    footprint reaches the limit. The runs are k-way merged while the table
+    is written, so only one row per run is held in memory at that point.
+    """
+
+    memory_limit: int | None = None
+    spill_dir: Path | None = None
+    runs: list[IO[str]] = field(default_factory=list)
+    buffered_bytes: int = 0
+
+    def _store(self, rows: Iterable[list[str]]) -> None:
+        if self.memory_limit is None:
+            self.rows.extend(rows)
+            return
+
+        for row in rows:
+            self.rows.append(row)
+            self.buffered_bytes += _ROW_OVERHEAD + _FIELD_OVERHEAD * len(row) + sum(map(len, row))
+            if self.buffered_bytes >= self.memory_limit:
+                self._spill()
+
+    def _spill(self) -> None:
+        self.rows.sort(key=self._sort_key())
+        run = tempfile.TemporaryFile(
+            "w+",
+            encoding="utf-8",
+            newline="",
+            dir=self.spill_dir,
+            prefix="stop_times-",
+            suffix=".run",
+        )
+        csv.writer(run, lineterminator="\n").writerows(self.rows)
+        self.runs.append(run)
+        self.rows.clear()
+        self.buffered_bytes = 0
+
+    def _sort_key(self) -> Callable[[list[str]], tuple[str, int]]:
+        trip_position = self.columns.get("trip_id")
+        sequence_position = self.columns.get("stop_sequence")
+
+        def _key(row: list[str]) -> tuple[str, int]:
+            return (
+                _value_at(row, trip_position),
+                _sequence_number(_value_at(row, sequence_position)),
+            )
+
+        return _key
+
+    def iter_rows(self) -> Iterable[list[str]]:
+        key = self._sort_key()
+        self.rows.sort(key=key)
+        sources: list[Iterable[list[str]]] = []
+        for run in self.runs:
+            run.seek(0)
+            sources.append(csv.reader(run))
+        # Earlier runs first keeps the merge stable for rows with equal keys.
+        sources.append(self.rows)
+        return _padded(heapq.merge(*sources, key=key), len(self.header))
+
+    def render(self) -> Iterable[bytes]:
+        return _encode_rows(self.header, self.iter_rows())
+
+    def close(self) -> None:
+        for run in self.runs:
+            run.close()
+        self.runs.clear()
+
+
 def determine_agency_id(zip_path: Path, index: int) -> str:
     """Derive a deterministic agency identifier for the consolidated bundle."""
 
@@ -46,16 +224,336 @@ def determine_agency_id(zip_path: Path, index: int) -> str:
 def consolidate_static_feeds(
     feeds: Sequence[StaticFeedInput],
     output_zip: Path | None = None,
+    *,
+    compression: BundleCompression | None = None,
+    stop_times_memory_limit: int | None = None,
+    window_days: int | None = None,
+    window_start: date | None = None,
+    transfers: TransferSettings | None = None,
+    stations: StationSettings | None = None,
+    deduplicate_shapes: bool = False,
+    validate: bool = True,
+    strict_validation: bool = False,
 ) -> Path:
-    """Merge multiple static GTFS bundles into a single consolidated archive."""
+    """Merge multiple static GTFS bundles into a single consolidated archive.
+
+    ``compression`` selects the codec, level and number of parallel
+    compression workers used for the output members. ``stop_times.txt`` is
+    always written ordered by ``(trip_id, stop_sequence)``; when
+    ``stop_times_memory_limit`` (bytes) is given, its rows are sorted
+    externally in runs spilled next to ``output_zip`` instead of being kept
+    in memory.
+
+    The archive is reproducible: members are sorted and carry fixed
+    timestamps, so identical inputs yield identical bytes. Its SHA-256 is
+    recorded in ``<name>.sha256`` and an unchanged archive is not rewritten.
+
+    When ``window_days`` is given, a second ``<stem>-window.zip`` bundle is
+    written next to ``output_zip`` with only the trips whose service runs on
+    at least one of the ``window_days`` days starting at ``window_start``
+    (today by default), plus the calendars, routes, shapes, stops and
+    stop_times they reference.
+
+    When ``transfers`` is given, walking transfers between nearby stops of
+    different agencies are appended to ``transfers.txt``.
+
+    When ``stations`` is given, nearby equally named stops of different
+    agencies are grouped under synthesized ``location_type=1`` stations via
+    ``parent_station``; original ``stop_id``s are kept. Cluster statistics
+    are written to ``<stem>-stations.json`` next to ``output_zip``.
+
+    When ``deduplicate_shapes`` is set, shapes with identical point sequences
+    are collapsed onto the smallest ``shape_id`` and ``trips.txt`` is
+    rewritten accordingly; distinct trip stop patterns are counted and logged.
+
+    Unless ``validate`` is false, foreign keys of the consolidated tables are
+    checked and the findings written to ``<stem>-validation.json``. With
+    ``strict_validation``, dangling references raise
+    :class:`StaticValidationError` and ``output_zip`` is left untouched.
+    """
 
     if not feeds:
         raise ValueError("No static feeds provided for consolidation")
 
     if output_zip is None:
         output_zip = feeds[0].zip_path.parent / "GTFS.zip"
+    output_zip.parent.mkdir(parents=True, exist_ok=True)
+
+    tables: dict[str, _Table] = {
+        "stop_times.txt": _SortedTable(
+            memory_limit=stop_times_memory_limit,
+            spill_dir=output_zip.parent,
+        )
+    }
+    try:
+        _collect_tables(feeds, tables)
+        if deduplicate_shapes:
+            stats = _deduplicate_shapes(tables)
+            LOGGER.info(
+                "Collapsed %d of %d shapes (%d trips rewritten); %d trips share %d stop patterns",
+                stats.duplicate_shapes,
+                stats.shapes,
+                stats.rewritten_trips,
+                stats.trips,
+                stats.stop_patterns,
+            )
+        if stations is not None:
+            atomic_dump_json(
+                output_zip.with_name(f"{output_zip.stem}-stations.json"),
+                _add_parent_stations(tables, stations),
+            )
+        if transfers is not None:
+            _add_transfers(tables, transfers)
+        if validate:
+            report = validate_references(lambda name: _iter_table(tables.get(name)))
+            atomic_dump_json(
+                output_zip.with_name(f"{output_zip.stem}-validation.json"),
+                report.to_payload(),
+            )
+            if not report.valid:
+                LOGGER.warning("Consolidated bundle has dangling references: %s", report.summary())
+                if strict_validation:
+                    raise StaticValidationError(
+                        f"Refusing to publish {output_zip.name}: {report.summary()}"
+                    )
+
+        members = [
+            (filename, table.render)
+            for filename, table in sorted(tables.items())
+            if table.header
+        ]
+
+        publish_zip(output_zip, members, compression)
+
+        if window_days is not None:
+            # The full bundle is already published; a broken window must not undo that.
+            window_zip = output_zip.with_name(f"{output_zip.stem}-window.zip")
+            try:
+                window_members = _window_members(tables, window_start or date.today(), window_days)
+                publish_zip(window_zip, window_members, compression)
+            except Exception:
+                LOGGER.exception("Failed to publish time-windowed bundle %s", window_zip.name)
+    finally:
+        for table in tables.values():
+            table.close()
+
+    return output_zip
+
+
+def _deduplicate_shapes(tables: dict[str, _Table]) -> DeduplicationStats:
+    replacements: dict[str, str] = {}
+    fingerprints: dict[str, bytes] = {}
+
+    shapes = tables.get("shapes.txt")
+    trips = tables.get("trips.txt")
+    shape_columns = {"shape_id", "shape_pt_lat", "shape_pt_lon", "shape_pt_sequence"}
+    if shapes is not None and trips is not None and "shape_id" in trips.columns:
+        if shape_columns <= shapes.columns.keys():
+            fingerprints = shape_fingerprints(shapes.header, shapes.iter_rows())
+            replacements = canonical_shapes(fingerprints)
+
+    rewritten = 0
+    if replacements:
+        shape_position = shapes.columns["shape_id"]
+        shapes.rows[:] = [
+            row for row in shapes.rows if _value_at(row, shape_position) not in replacements
+        ]
+        trip_shape_position = trips.columns["shape_id"]
+        for row in trips.rows:
+            canonical = replacements.get(_value_at(row, trip_shape_position))
+            if canonical is not None:
+                row[trip_shape_position] = canonical
+                rewritten += 1
+
+    patterns: dict[str, bytes] = {}
+    stop_times = tables.get("stop_times.txt")
+    if stop_times is not None and {"trip_id", "stop_id"} <= stop_times.columns.keys():
+        patterns = stop_pattern_fingerprints(stop_times.header, stop_times.iter_rows())
+
+    return DeduplicationStats(
+        shapes=len(fingerprints),
+        duplicate_shapes=len(replacements),
+        rewritten_trips=rewritten,
+        trips=len(patterns),
+        stop_patterns=len(set(patterns.values())),
+    )
+
+
+def _add_parent_stations(tables: dict[str, _Table], settings: StationSettings) -> dict[str, Any]:
+    stops = tables.get("stops.txt")
+    if stops is None or not {"stop_id", "stop_lat", "stop_lon"} <= stops.columns.keys():
+        return cluster_statistics([], 0)
+
+    stop_position = stops.columns["stop_id"]
+    name_position = stops.columns.get("stop_name")
+    lat_position = stops.columns["stop_lat"]
+    lon_position = stops.columns["stop_lon"]
+    type_position = stops.columns.get("location_type")
+    parent_position = stops.columns.get("parent_station")
+
+    candidates: list[ClusterStop] = []
+    rows_by_id: dict[str, list[str]] = {}
+    for row in stops.rows:
+        # Stops already assigned to a station by their agency keep that grouping.
+        if _value_at(row, type_position) not in ("", "0") or _value_at(row, parent_position):
+            continue
+        try:
+            lat = float(row[lat_position])
+            lon = float(row[lon_position])
+        except (IndexError, ValueError):
+            continue
+        stop_id = row[stop_position]
+        rows_by_id[stop_id] = row
+        candidates.append(
+            ClusterStop(stop_id, stop_id.partition("_")[0], _value_at(row, name_position), lat, lon)
+        )
+
+    clusters = cluster_stops(candidates, settings)
+    if clusters:
+        stops.extend(
+            _STATION_COLUMNS,
+            [
+                [cluster.station_id, cluster.name, str(cluster.lat), str(cluster.lon), "1", ""]
+                for cluster in clusters
+            ],
+        )
+        parent_position = stops.columns["parent_station"]
+        width = len(stops.header)
+        for cluster in clusters:
+            for member in cluster.members:
+                row = rows_by_id[member.stop_id]
+                if len(row) < width:
+                    row.extend([""] * (width - len(row)))
+                row[parent_position] = cluster.station_id
+
+    return cluster_statistics(clusters, len(candidates))
+
+
+def _add_transfers(tables: dict[str, _Table], settings: TransferSettings) -> None:
+    stops = tables.get("stops.txt")
+    if stops is None or not {"stop_id", "stop_lat", "stop_lon"} <= stops.columns.keys():
+        return
+
+    stop_position = stops.columns["stop_id"]
+    lat_position = stops.columns["stop_lat"]
+    lon_position = stops.columns["stop_lon"]
+    type_position = stops.columns.get("location_type")
 
-    aggregated: dict[str, dict[str, list]] = {}
+    candidates: list[TransferStop] = []
+    for row in stops.iter_rows():
+        # Only boarding locations; stations and entrances are reached through pathways.
+        if _value_at(row, type_position) not in ("", "0"):
+            continue
+        try:
+            lat = float(row[lat_position])
+            lon = float(row[lon_position])
+        except ValueError:
+            continue
+        stop_id = row[stop_position]
+        agency_id = stop_id.partition("_")[0]
+        candidates.append(TransferStop(stop_id, agency_id, lat, lon))
+
+    rows = [list(row) for row in generate_transfers(candidates, settings)]
+    if rows:
+        tables.setdefault("transfers.txt", _Table()).extend(_TRANSFER_COLUMNS, rows)
+
+
+def _window_members(
+    tables: dict[str, _Table],
+    first_day: date,
+    days: int,
+) -> list[tuple[str, Callable[[], Iterable[bytes]]]]:
+    """Describe the members of the time-windowed bundle as filtered table renders."""
+
+    calendar = expand_service_days(
+        _iter_table(tables.get("calendar.txt")),
+        _iter_table(tables.get("calendar_dates.txt")),
+    )
+    retained: dict[str, set[str]] = {
+        "service_id": calendar.services_active_within(first_day, days),
+        "trip_id": set(),
+        "route_id": set(),
+        "shape_id": set(),
+        "stop_id": set(),
+    }
+
+    trips = tables.get("trips.txt")
+    if trips is not None:
+        service_position = trips.columns.get("service_id")
+        trip_position = trips.columns.get("trip_id")
+        route_position = trips.columns.get("route_id")
+        shape_position = trips.columns.get("shape_id")
+        for row in trips.iter_rows():
+            if _value_at(row, service_position) in retained["service_id"]:
+                retained["trip_id"].add(_value_at(row, trip_position))
+                retained["route_id"].add(_value_at(row, route_position))
+                retained["shape_id"].add(_value_at(row, shape_position))
+
+    stop_times = tables.get("stop_times.txt")
+    if stop_times is not None:
+        trip_position = stop_times.columns.get("trip_id")
+        stop_position = stop_times.columns.get("stop_id")
+        retained["stop_id"].update(
+            _value_at(row, stop_position)
+            for row in stop_times.iter_rows()
+            if _value_at(row, trip_position) in retained["trip_id"]
+        )
+
+    stops = tables.get("stops.txt")
+    if stops is not None and "parent_station" in stops.columns:
+        # Parent stations are kept with their platforms so pathways stay navigable.
+        stop_position = stops.columns.get("stop_id")
+        parent_position = stops.columns["parent_station"]
+        parents = {
+            _value_at(row, stop_position): _value_at(row, parent_position)
+            for row in stops.iter_rows()
+        }
+        pending = list(retained["stop_id"])
+        while pending:
+            parent = parents.get(pending.pop(), "")
+            if parent and parent not in retained["stop_id"]:
+                retained["stop_id"].add(parent)
+                pending.append(parent)
+
+    members: list[tuple[str, Callable[[], Iterable[bytes]]]] = []
+    for filename, table in sorted(tables.items()):
+        if not table.header:
+            continue
+        filters = [
+            (table.columns[column], retained[key])
+            for column, key in _WINDOW_KEYS.get(filename, {}).items()
+            if column in table.columns
+        ]
+        members.append((filename, _window_render(table, filters)))
+    return members
+
+
+def _window_render(
+    table: _Table,
+    filters: Sequence[tuple[int, set[str]]],
+) -> Callable[[], Iterable[bytes]]:
+    def _render() -> Iterable[bytes]:
+        rows = table.iter_rows()
+        if filters:
+            # Empty references (e.g. trip-level transfers without stops) do not exclude a row.
+            rows = (
+                row
+                for row in rows
+                if all(not row[position] or row[position] in keys for position, keys in filters)
+            )
+        return _encode_rows(table.header, rows)
+
+    return _render
+
+
+def _iter_table(table: _Table | None) -> Iterator[list[str]]:
+    if table is None or not table.header:
+        return
+    yield table.header
+    yield from table.iter_rows()
+
+
+def _collect_tables(feeds: Sequence[StaticFeedInput], tables: dict[str, _Table]) -> None:
     blocks_captured = False
 
     for feed in feeds:
@@ -63,191 +561,161 @@ def consolidate_static_feeds(
         if not directory.exists():
             continue
 
-        _process_agency(directory / "agency.txt", feed.agency_id, aggregated)
-        _process_calendar(directory / "calendar.txt", feed.agency_id, aggregated)
-        _process_calendar_dates(directory / "calendar_dates.txt", feed.agency_id, aggregated)
-        _process_routes(directory / "routes.txt", feed.agency_id, aggregated)
-        _process_shapes(directory / "shapes.txt", feed.agency_id, aggregated)
-        _process_stops(directory / "stops.txt", feed.agency_id, aggregated)
-        _process_stop_times(directory / "stop_times.txt", feed.agency_id, aggregated)
-        _process_trips(directory / "trips.txt", feed.agency_id, aggregated)
+        _process_agency(directory / "agency.txt", feed.agency_id, tables)
+        for name in _AGENCY_TABLES[1:]:
+            _process_table(directory / name, name, feed.agency_id, tables)
 
         if not blocks_captured and (directory / "blocks.txt").exists():
-            _process_generic(directory / "blocks.txt", "blocks.txt", aggregated)
+            _process_generic(directory / "blocks.txt", "blocks.txt", tables)
             blocks_captured = True
 
-    # Copy any other ancillary GTFS files without modification
-        for extra_path in directory.glob("*.txt"):
+        # Copy any other ancillary GTFS files without modification
+        for extra_path in sorted(directory.glob("*.txt")):
             name = extra_path.name
-            if name in {
-                "agency.txt",
-                "calendar.txt",
-                "calendar_dates.txt",
-        "feed_info.txt",
-                "routes.txt",
-                "shapes.txt",
-                "stops.txt",
-                "stop_times.txt",
-                "trips.txt",
-                "blocks.txt",
-            }:
+            if name in _SKIPPED_EXTRA_TABLES:
                 continue
-            _process_generic(extra_path, name, aggregated)
-
-    def _write_bundle(temp_path: Path) -> None:
-        with zipfile.ZipFile(temp_path, "w", compression=zipfile.ZIP_DEFLATED) as bundle:
-            for filename, data in sorted(aggregated.items()):
-                header = data.get("header", [])
-                rows = data.get("rows", [])
-                if not header:
-                    continue
-                buffer = io.StringIO()
-                writer = csv.DictWriter(buffer, fieldnames=header, lineterminator="\n")
-                writer.writeheader()
-                for row in rows:
-                    writer.writerow({field: row.get(field, "") for field in header})
-                bundle.writestr(filename, buffer.getvalue())
-
-    atomic_write(output_zip, _write_bundle)
-
-    return output_zip
+            _process_generic(extra_path, name, tables)
 
 
-def _process_agency(path: Path, agency_id: str, aggregated: dict[str, dict[str, list]]) -> None:
-    header, rows = _read_csv(path)
+def _process_agency(path: Path, agency_id: str, tables: dict[str, _Table]) -> None:
+    reader = _read_csv(path)
+    header = next(reader, [])
     if not header:
         return
+    rows = list(reader)
 
     if "agency_email" not in header:
         header.append("agency_email")
+        for row in rows:
+            row.append("")
 
-    for row in rows:
-        row.setdefault("agency_email", "")
-        row["agency_id"] = agency_id
+    if "agency_id" in header:
+        position = header.index("agency_id")
+        for row in rows:
+            row[position] = agency_id
 
-    _add_rows("agency.txt", header, rows, aggregated)
+    _add_rows("agency.txt", header, rows, tables)
 
 
-def _process_calendar(path: Path, agency_id: str, aggregated: dict[str, dict[str, list]]) -> None:
-    header, rows = _read_csv(path)
+def _process_table(path: Path, name: str, agency_id: str, tables: dict[str, _Table]) -> None:
+    rows = _read_csv(path)
+    header = next(rows, [])
     if not header:
         return
 
-    for row in rows:
-        _apply_prefix(row, "service_id", agency_id)
-
-    _add_rows("calendar.txt", header, rows, aggregated)
-
-
-def _process_calendar_dates(path: Path, agency_id: str, aggregated: dict[str, dict[str, list]]) -> None:
-    header, rows = _read_csv(path)
-    if not header:
-        return
+    positions = _column_positions(header, _PREFIXED_COLUMNS.get(name, ()))
+    if positions:
+        rows = _apply_prefix(rows, positions, agency_id)
 
-    for row in rows:
-        _apply_prefix(row, "service_id", agency_id)
+    if name == "routes.txt" and "agency_id" in header:
+        rows = _replace_agency(rows, header.index("agency_id"), agency_id)
 
-    _add_rows("calendar_dates.txt", header, rows, aggregated)
+    _add_rows(name, header, rows, tables)
 
 
-def _process_routes(path: Path, agency_id: str, aggregated: dict[str, dict[str, list]]) -> None:
-    header, rows = _read_csv(path)
+def _process_generic(path: Path, name: str, tables: dict[str, _Table]) -> None:
+    rows = _read_csv(path)
+    header = next(rows, [])
     if not header:
         return
+    _add_rows(name, header, rows, tables)
 
-    for row in rows:
-        _apply_prefix(row, "route_id", agency_id)
-        if row.get("agency_id"):
-            row["agency_id"] = agency_id
-
-    _add_rows("routes.txt", header, rows, aggregated)
 
+def _read_csv(path: Path) -> Iterator[list[str]]:
+    """Stream a CSV file as lists, header first, with rows padded to the header width."""
 
-def _process_shapes(path: Path, agency_id: str, aggregated: dict[str, dict[str, list]]) -> None:
-    header, rows = _read_csv(path)
-    if not header:
+    if not path.exists():
         return
 
-    for row in rows:
-        _apply_prefix(row, "shape_id", agency_id)
-
-    _add_rows("shapes.txt", header, rows, aggregated)
-
+    with path.open("r", encoding="utf-8-sig", newline="") as handle:
+        reader = csv.reader(handle)
+        header = next(reader, [])
+        yield header
+        width = len(header)
+        for row in reader:
+            if not row:
+                continue
+            if len(row) != width:
+                row = (row + [""] * width)[:width]
+            yield row
 
-def _process_stops(path: Path, agency_id: str, aggregated: dict[str, dict[str, list]]) -> None:
-    header, rows = _read_csv(path)
-    if not header:
-        return
 
-    for row in rows:
-        _apply_prefix(row, "stop_id", agency_id)
-        if row.get("parent_station"):
-            _apply_prefix(row, "parent_station", agency_id)
+def _add_rows(
+    name: str,
+    header: Sequence[str],
+    rows: Iterable[list[str]],
+    tables: dict[str, _Table],
+) -> None:
+    table = tables.get(name)
+    if table is None:
+        table = tables[name] = _Table()
+    table.extend(header, rows)
 
-    _add_rows("stops.txt", header, rows, aggregated)
 
+def _column_positions(header: Sequence[str], columns: Iterable[str]) -> tuple[int, ...]:
+    index = {column: position for position, column in enumerate(header)}
+    return tuple(index[column] for column in columns if column in index)
 
-def _process_stop_times(path: Path, agency_id: str, aggregated: dict[str, dict[str, list]]) -> None:
-    header, rows = _read_csv(path)
-    if not header:
-        return
 
+def _apply_prefix(
+    rows: Iterable[list[str]],
+    positions: Sequence[int],
+    prefix: str,
+) -> Iterator[list[str]]:
+    qualifier = f"{prefix}_"
     for row in rows:
-        _apply_prefix(row, "trip_id", agency_id)
-        _apply_prefix(row, "stop_id", agency_id)
+        for position in positions:
+            value = row[position]
+            if value and not value.startswith(qualifier):
+                row[position] = qualifier + value
+        yield row
 
-    _add_rows("stop_times.txt", header, rows, aggregated)
-
-
-def _process_trips(path: Path, agency_id: str, aggregated: dict[str, dict[str, list]]) -> None:
-    header, rows = _read_csv(path)
-    if not header:
-        return
 
+def _replace_agency(rows: Iterable[list[str]], position: int, agency_id: str) -> Iterator[list[str]]:
     for row in rows:
-        _apply_prefix(row, "trip_id", agency_id)
-        _apply_prefix(row, "route_id", agency_id)
-        _apply_prefix(row, "service_id", agency_id)
-        _apply_prefix(row, "block_id", agency_id)
-        _apply_prefix(row, "shape_id", agency_id)
-
-    _add_rows("trips.txt", header, rows, aggregated)
+        if row[position]:
+            row[position] = agency_id
+        yield row
 
 
-def _process_generic(path: Path, name: str, aggregated: dict[str, dict[str, list]]) -> None:
-    header, rows = _read_csv(path)
-    if not header:
-        return
-    _add_rows(name, header, rows, aggregated)
-
-
-def _read_csv(path: Path) -> tuple[list[str], list[dict[str, str]]]:
-    if not path.exists():
-        return [], []
-
-    with path.open("r", encoding="utf-8-sig", newline="") as handle:
-        reader = csv.DictReader(handle)
-        header = list(reader.fieldnames or [])
-        rows = [dict(row) for row in reader]
-    return header, rows
+def _remapped(rows: Iterable[list[str]], positions: Sequence[int], width: int) -> Iterator[list[str]]:
+    mapping = tuple(enumerate(positions))
+    for row in rows:
+        remapped = [""] * width
+        for source, target in mapping:
+            remapped[target] = row[source]
+        yield remapped
 
 
-def _add_rows(
-    name: str,
-    header: Iterable[str],
-    rows: Iterable[dict[str, str]],
-    aggregated: dict[str, dict[str, list]],
-) -> None:
-    target = aggregated.setdefault(name, {"header": [], "rows": []})
-    for column in header:
-        if column not in target["header"]:
-            target["header"].append(column)
-    target["rows"].extend(dict(row) for row in rows)
+def _padded(rows: Iterable[list[str]], width: int) -> Iterator[list[str]]:
+    for row in rows:
+        if len(row) < width:
+            row = row + [""] * (width - len(row))
+        yield row
 
 
-def _apply_prefix(row: dict[str, str], field: str, prefix: str) -> None:
-    value = row.get(field, "")
-    if not value:
-        return
-    qualified = f"{prefix}_{value}" if not value.startswith(f"{prefix}_") else value
-    row[field] = qualified
+def _encode_rows(header: Sequence[str], rows: Iterable[list[str]]) -> Iterator[bytes]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator="\n")
+    writer.writerow(header)
+    for row in rows:
+        writer.writerow(row)
+        if buffer.tell() >= _RENDER_CHUNK_SIZE:
+            yield buffer.getvalue().encode("utf-8")
+            buffer.seek(0)
+            buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode("utf-8")
+
+
+def _value_at(row: list[str], position: int | None) -> str:
+    if position is None or position >= len(row):
+        return ""
+    return row[position]
+
+
+def _sequence_number(value: str) -> int:
+    try:
+        return int(value)
+    except ValueError:
+        return 0
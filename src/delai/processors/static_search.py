@@ -0,0 +1,233 @@
+from __future__ import annotations
+
+import json
+import zipfile
+from collections import defaultdict
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Iterator
+
+from ..utils.io import atomic_dump_json
+from .archive import iter_bundle_table, read_checksum
+from .static_stations import ClusterStop, StationSettings, cluster_stops, normalize_stop_name
+
+# Platforms sharing a name within this distance are offered as one place.
+_GROUP_DISTANCE = 400.0
+# Longer query words are looked up by this prefix and then verified.
+_MAX_PREFIX = 6
+DEFAULT_SEARCH_LIMIT = 10
+
+
+class StopSearchError(RuntimeError):
+    """Raised when the stop search index cannot be built or read."""
+
+
+@dataclass(frozen=True, slots=True)
+class StopSearchEntry:
+    """A searchable place: one or more platforms sharing a name."""
+
+    name: str
+    stop_ids: tuple[str, ...]
+    lat: float
+    lon: float
+    routes: int
+
+    def to_payload(self) -> dict[str, Any]:
+        return {
+            "name": self.name,
+            "stop_ids": list(self.stop_ids),
+            "lat": self.lat,
+            "lon": self.lon,
+            "routes": self.routes,
+        }
+
+
+@dataclass(slots=True)
+class StopSearchIndex:
+    """Word-prefix index over stop names, ranked by the number of routes served.
+
+    Names and queries are folded with :func:`normalize_stop_name`, so
+    ``"lagiewniki"`` finds ``"Łagiewniki"``. Every query word must prefix a
+    word of the name, in any order.
+    """
+
+    entries: list[StopSearchEntry]
+    words: list[tuple[str, ...]] = field(default_factory=list)
+    prefixes: dict[str, list[int]] = field(default_factory=dict)
+
+    def __post_init__(self) -> None:
+        # Entries are kept in rank order so posting lists are rank-ordered too.
+        self.entries.sort(key=lambda entry: (-entry.routes, entry.name, entry.stop_ids))
+        self.words = [tuple(normalize_stop_name(entry.name).split()) for entry in self.entries]
+        prefixes: dict[str, list[int]] = defaultdict(list)
+        for position, words in enumerate(self.words):
+            keys = {
+                word[:length]
+                for word in words
+                for length in range(1, min(len(word), _MAX_PREFIX) + 1)
+            }
+            for key in keys:
+                prefixes[key].append(position)
+        self.prefixes = dict(prefixes)
+
+    def search(self, query: str, limit: int = DEFAULT_SEARCH_LIMIT) -> list[StopSearchEntry]:
+        terms = normalize_stop_name(query).split()
+        if not terms or limit <= 0:
+            return []
+
+        # The longest term has the most selective posting list.
+        anchor = max(terms, key=len)
+        candidates = self.prefixes.get(anchor[:_MAX_PREFIX], [])
+        results: list[StopSearchEntry] = []
+        for position in candidates:
+            words = self.words[position]
+            if all(any(word.startswith(term) for word in words) for term in terms):
+                results.append(self.entries[position])
+                if len(results) >= limit:
+                    break
+        return results
+
+    def to_payload(self, bundle_sha256: str | None = None) -> dict[str, Any]:
+        return {
+            "bundle_sha256": bundle_sha256,
+            "entries": [entry.to_payload() for entry in self.entries],
+        }
+
+    @classmethod
+    def from_payload(cls, payload: dict[str, Any]) -> StopSearchIndex:
+        return cls(
+            [
+                StopSearchEntry(
+                    name=item["name"],
+                    stop_ids=tuple(item["stop_ids"]),
+                    lat=float(item["lat"]),
+                    lon=float(item["lon"]),
+                    routes=int(item["routes"]),
+                )
+                for item in payload["entries"]
+            ]
+        )
+
+
+def build_stop_search_index(bundle_path: Path) -> StopSearchIndex:
+    """Build the stop search index from a consolidated bundle.
+
+    Raises:
+        StopSearchError: If the bundle cannot be read.
+    """
+
+    try:
+        with zipfile.ZipFile(bundle_path) as archive:
+            stops = list(_iter_boarding_stops(iter_bundle_table(archive, "stops.txt")))
+            route_by_trip = _routes_by_trip(iter_bundle_table(archive, "trips.txt"))
+            routes_by_stop = _routes_by_stop(
+                iter_bundle_table(archive, "stop_times.txt"),
+                route_by_trip,
+            )
+    except Exception as exc:
+        raise StopSearchError(f"Failed to read stops from {bundle_path}") from exc
+
+    clusters = cluster_stops(stops, StationSettings(max_distance=_GROUP_DISTANCE, min_agencies=1))
+    entries: list[StopSearchEntry] = []
+    for cluster in clusters:
+        routes: set[str] = set()
+        for member in cluster.members:
+            routes.update(routes_by_stop.get(member.stop_id, ()))
+        entries.append(
+            StopSearchEntry(
+                name=cluster.name,
+                stop_ids=tuple(member.stop_id for member in cluster.members),
+                lat=cluster.lat,
+                lon=cluster.lon,
+                routes=len(routes),
+            )
+        )
+    return StopSearchIndex(entries)
+
+
+def write_stop_search_index(bundle_path: Path, output_path: Path | None = None) -> Path:
+    """Persist the stop search index for *bundle_path* as JSON.
+
+    The index records the bundle's SHA-256 (from its ``.sha256`` sidecar);
+    when an existing index was built from the same bundle it is kept as is.
+    """
+
+    if output_path is None:
+        output_path = bundle_path.with_name(f"{bundle_path.stem}-stops-search.json")
+
+    digest = read_checksum(bundle_path)
+    if digest is not None and _indexed_digest(output_path) == digest:
+        return output_path
+
+    index = build_stop_search_index(bundle_path)
+    return atomic_dump_json(output_path, index.to_payload(digest), indent=None, sort_keys=False)
+
+
+def load_stop_search_index(path: Path) -> StopSearchIndex:
+    """Read an index previously written by :func:`write_stop_search_index`."""
+
+    try:
+        with path.open("r", encoding="utf-8") as handle:
+            return StopSearchIndex.from_payload(json.load(handle))
+    except Exception as exc:
+        raise StopSearchError(f"Failed to load stop search index from {path}") from exc
+
+
+def _indexed_digest(path: Path) -> str | None:
+    try:
+        with path.open("r", encoding="utf-8") as handle:
+            return json.load(handle).get("bundle_sha256")
+    except (FileNotFoundError, ValueError, AttributeError):
+        return None
+
+
+def _iter_boarding_stops(rows: Iterator[list[str]]) -> Iterator[ClusterStop]:
+    header = next(rows, [])
+    if not {"stop_id", "stop_name", "stop_lat", "stop_lon"} <= set(header):
+        return
+
+    stop_position = header.index("stop_id")
+    name_position = header.index("stop_name")
+    lat_position = header.index("stop_lat")
+    lon_position = header.index("stop_lon")
+    type_position = header.index("location_type") if "location_type" in header else None
+
+    for row in rows:
+        if not row or not row[name_position]:
+            continue
+        if type_position is not None and row[type_position] not in ("", "0"):
+            continue
+        try:
+            lat = float(row[lat_position])
+            lon = float(row[lon_position])
+        except ValueError:
+            continue
+        stop_id = row[stop_position]
+        yield ClusterStop(stop_id, stop_id.partition("_")[0], row[name_position], lat, lon)
+
+
+def _routes_by_trip(rows: Iterator[list[str]]) -> dict[str, str]:
+    header = next(rows, [])
+    if "trip_id" not in header or "route_id" not in header:
+        return {}
+
+    trip_position = header.index("trip_id")
+    route_position = header.index("route_id")
+    return {row[trip_position]: row[route_position] for row in rows if row}
+
+
+def _routes_by_stop(rows: Iterator[list[str]], route_by_trip: dict[str, str]) -> dict[str, set[str]]:
+    header = next(rows, [])
+    if "trip_id" not in header or "stop_id" not in header:
+        return {}
+
+    trip_position = header.index("trip_id")
+    stop_position = header.index("stop_id")
+    routes: dict[str, set[str]] = defaultdict(set)
+    for row in rows:
+        if not row:
+            continue
+        route_id = route_by_trip.get(row[trip_position])
+        if route_id is not None:
+            routes[row[stop_position]].add(route_id)
+    return routes
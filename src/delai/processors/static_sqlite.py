@@ -0,0 +1,154 @@
+from __future__ import annotations
+
+import sqlite3
+import zipfile
+from pathlib import Path
+from typing import Iterable, Iterator
+
+from ..utils.io import atomic_write
+from .archive import iter_bundle_table
+
+# Declared column affinities; SQLite converts numeric-looking text on insert.
+_INTEGER_COLUMNS = frozenset(
+    {
+        "bikes_allowed",
+        "continuous_drop_off",
+        "continuous_pickup",
+        "direction_id",
+        "drop_off_type",
+        "exception_type",
+        "exact_times",
+        "friday",
+        "headway_secs",
+        "location_type",
+        "min_transfer_time",
+        "monday",
+        "pickup_type",
+        "route_sort_order",
+        "route_type",
+        "saturday",
+        "shape_pt_sequence",
+        "stop_sequence",
+        "sunday",
+        "thursday",
+        "timepoint",
+        "transfer_type",
+        "tuesday",
+        "wednesday",
+        "wheelchair_accessible",
+        "wheelchair_boarding",
+    }
+)
+
+_REAL_COLUMNS = frozenset(
+    {
+        "shape_dist_traveled",
+        "shape_pt_lat",
+        "shape_pt_lon",
+        "stop_lat",
+        "stop_lon",
+    }
+)
+
+_INDEXED_COLUMNS = ("stop_id", "trip_id", "route_id", "service_id")
+
+
+class StaticIndexError(RuntimeError):
+    """Raised when the SQLite index cannot be built."""
+
+
+def build_sqlite_index(bundle_path: Path, output_path: Path | None = None) -> Path:
+    """Load every table of a consolidated GTFS bundle into a SQLite database.
+
+    Args:
+        bundle_path: Path to the consolidated ``GTFS.zip``.
+        output_path: Optional database path. Defaults to a sibling file with
+            the ``.sqlite`` suffix.
+
+    Returns:
+        The path to the generated database.
+
+    Raises:
+        StaticIndexError: If the bundle cannot be read or loaded.
+    """
+
+    if output_path is None:
+        output_path = bundle_path.with_suffix(".sqlite")
+
+    def _writer(temp_path: Path) -> None:
+        connection = sqlite3.connect(temp_path)
+        try:
+            connection.execute("PRAGMA journal_mode = OFF")
+            connection.execute("PRAGMA synchronous = OFF")
+            with zipfile.ZipFile(bundle_path) as archive, connection:
+                for name in sorted(archive.namelist()):
+                    if name.endswith(".txt"):
+                        _load_table(connection, archive, name)
+        finally:
+            connection.close()
+
+    try:
+        atomic_write(output_path, _writer)
+    except Exception as exc:
+        raise StaticIndexError(f"Failed to build SQLite index from {bundle_path}") from exc
+
+    return output_path
+
+
+def _load_table(connection: sqlite3.Connection, archive: zipfile.ZipFile, name: str) -> None:
+    rows = iter_bundle_table(archive, name)
+    header = next(rows, [])
+    if not header:
+        return
+
+    table = name[: -len(".txt")]
+    columns = ", ".join(f"{_quote(column)} {_affinity(column)}" for column in header)
+    connection.execute(f"CREATE TABLE {_quote(table)} ({columns})")
+
+    placeholders = ", ".join("?" for _ in header)
+    connection.executemany(
+        f"INSERT INTO {_quote(table)} VALUES ({placeholders})",
+        _normalized(rows, len(header)),
+    )
+
+    for statement in _index_statements(table, header):
+        connection.execute(statement)
+
+
+def _normalized(rows: Iterable[list[str]], width: int) -> Iterator[list[str | None]]:
+    for row in rows:
+        if not row:
+            continue
+        if len(row) != width:
+            row = (row + [""] * width)[:width]
+        yield [value if value != "" else None for value in row]
+
+
+def _index_statements(table: str, header: list[str]) -> Iterator[str]:
+    if table == "stop_times" and "trip_id" in header and "stop_sequence" in header:
+        yield (
+            'CREATE INDEX "idx_stop_times_trip_id" '
+            'ON "stop_times" ("trip_id", "stop_sequence")'
+        )
+        indexed = [column for column in _INDEXED_COLUMNS if column != "trip_id"]
+    else:
+        indexed = list(_INDEXED_COLUMNS)
+
+    for column in indexed:
+        if column in header:
+            yield (
+                f"CREATE INDEX {_quote(f'idx_{table}_{column}')} "
+                f"ON {_quote(table)} ({_quote(column)})"
+            )
+
+
+def _affinity(column: str) -> str:
+    if column in _INTEGER_COLUMNS:
+        return "INTEGER"
+    if column in _REAL_COLUMNS:
+        return "REAL"
+    return "TEXT"
+
+
+def _quote(identifier: str) -> str:
+    return '"' + identifier.replace('"', '""') + '"'
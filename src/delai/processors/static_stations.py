@@ -0,0 +1,162 @@
+from __future__ import annotations
+
+import re
+import unicodedata
+from collections import Counter, defaultdict
+from dataclasses import dataclass
+from typing import Any, Iterable, Sequence
+
+from .spatial import haversine_distance, iter_nearby_pairs
+
+# Letters that Unicode decomposition leaves untouched.
+_FOLDED_LETTERS = str.maketrans(
+    {"ł": "l", "Ł": "L", "đ": "d", "Đ": "D", "ø": "o", "Ø": "O", "ß": "ss"}
+)
+_NON_ALPHANUMERIC = re.compile(r"[^0-9a-z]+")
+
+STATION_ID_PREFIX = "ST_"
+
+
+@dataclass(frozen=True, slots=True)
+class StationSettings:
+    """Parameters used to group stops of several agencies into parent stations.
+
+    Stops are joined when they are at most ``max_distance`` metres apart and
+    their names match after :func:`normalize_stop_name`. Only groups served
+    by at least ``min_agencies`` agencies become stations.
+    """
+
+    max_distance: float = 100.0
+    min_agencies: int = 2
+
+    def __post_init__(self) -> None:
+        if self.max_distance <= 0:
+            raise ValueError("Station clustering distance must be positive")
+        if self.min_agencies < 1:
+            raise ValueError("Stations need at least one agency")
+
+
+@dataclass(frozen=True, slots=True)
+class ClusterStop:
+    """A boarding location considered for station clustering."""
+
+    stop_id: str
+    agency_id: str
+    name: str
+    lat: float
+    lon: float
+
+
+@dataclass(frozen=True, slots=True)
+class StopCluster:
+    """A synthesized parent station and the stops grouped under it."""
+
+    station_id: str
+    name: str
+    lat: float
+    lon: float
+    members: tuple[ClusterStop, ...]
+
+    @property
+    def agencies(self) -> tuple[str, ...]:
+        return tuple(sorted({member.agency_id for member in self.members}))
+
+    @property
+    def spread(self) -> float:
+        """Largest distance in metres between a member and the station centre."""
+
+        return max(
+            haversine_distance(self.lat, self.lon, member.lat, member.lon)
+            for member in self.members
+        )
+
+
+def normalize_stop_name(name: str) -> str:
+    """Fold case, diacritics and punctuation so equivalent stop names compare equal.
+
+    ``"Kraków Główny"``, ``"KRAKOW GLOWNY"`` and ``"Kraków-Główny"`` all
+    normalize to ``"krakow glowny"``.
+    """
+
+    decomposed = unicodedata.normalize("NFKD", name.translate(_FOLDED_LETTERS))
+    stripped = "".join(char for char in decomposed if not unicodedata.combining(char))
+    return _NON_ALPHANUMERIC.sub(" ", stripped.casefold()).strip()
+
+
+def cluster_stops(stops: Iterable[ClusterStop], settings: StationSettings) -> list[StopCluster]:
+    """Group nearby, equally named stops of different agencies.
+
+    Returns one cluster per synthesized station, ordered by station id. The
+    station id is :data:`STATION_ID_PREFIX` followed by the smallest member
+    ``stop_id``, so it is stable as long as that stop exists.
+    """
+
+    stops = list(stops)
+    names = [normalize_stop_name(stop.name) for stop in stops]
+    parents = list(range(len(stops)))
+
+    def _find(index: int) -> int:
+        while parents[index] != index:
+            parents[index] = parents[parents[index]]
+            index = parents[index]
+        return index
+
+    for first, second, _ in iter_nearby_pairs(
+        [(stop.lat, stop.lon) for stop in stops],
+        settings.max_distance,
+    ):
+        if names[first] and names[first] == names[second]:
+            root_first, root_second = _find(first), _find(second)
+            if root_first != root_second:
+                parents[max(root_first, root_second)] = min(root_first, root_second)
+
+    groups: dict[int, list[ClusterStop]] = defaultdict(list)
+    for index, stop in enumerate(stops):
+        groups[_find(index)].append(stop)
+
+    clusters: list[StopCluster] = []
+    for members in groups.values():
+        if len({member.agency_id for member in members}) < settings.min_agencies:
+            continue
+        members.sort(key=lambda member: member.stop_id)
+        # The most common spelling wins; ties go to the alphabetically first one.
+        spellings = Counter(member.name for member in members)
+        name = min(spellings, key=lambda spelling: (-spellings[spelling], spelling))
+        clusters.append(
+            StopCluster(
+                station_id=f"{STATION_ID_PREFIX}{members[0].stop_id}",
+                name=name,
+                lat=round(sum(member.lat for member in members) / len(members), 6),
+                lon=round(sum(member.lon for member in members) / len(members), 6),
+                members=tuple(members),
+            )
+        )
+
+    clusters.sort(key=lambda cluster: cluster.station_id)
+    return clusters
+
+
+def cluster_statistics(clusters: Sequence[StopCluster], candidates: int) -> dict[str, Any]:
+    """Summarize a clustering run for logging and the ``-stations.json`` report."""
+
+    spreads = [cluster.spread for cluster in clusters]
+    member_counts = Counter(len(cluster.members) for cluster in clusters)
+    agency_counts = Counter(len(cluster.agencies) for cluster in clusters)
+    return {
+        "candidates": candidates,
+        "stations": len(clusters),
+        "clustered_stops": sum(len(cluster.members) for cluster in clusters),
+        "members_per_station": dict(sorted(member_counts.items())),
+        "agencies_per_station": dict(sorted(agency_counts.items())),
+        "max_spread_m": round(max(spreads), 1) if spreads else 0.0,
+        "mean_spread_m": round(sum(spreads) / len(spreads), 1) if spreads else 0.0,
+        "clusters": [
+            {
+                "station_id": cluster.station_id,
+                "name": cluster.name,
+                "agencies": list(cluster.agencies),
+                "stop_ids": [member.stop_id for member in cluster.members],
+            }
+            for cluster in clusters
+        ],
+    }
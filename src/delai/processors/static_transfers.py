@@ -0,0 +1,75 @@
+from __future__ import annotations
+
+import math
+from dataclasses import dataclass
+from typing import Iterable, Iterator
+
+from .spatial import iter_nearby_pairs
+
+# transfer_type 2: the transfer requires min_transfer_time seconds.
+_TIMED_TRANSFER = "2"
+
+
+@dataclass(frozen=True, slots=True)
+class TransferSettings:
+    """Parameters used to generate walking transfers between agencies.
+
+    Stops of different agencies at most ``max_distance`` metres apart are
+    linked. The walking time is the straight-line distance stretched by
+    ``detour_factor`` and walked at ``walking_speed`` metres per second, but
+    never less than ``min_transfer_time`` seconds.
+    """
+
+    max_distance: float = 200.0
+    walking_speed: float = 1.2
+    detour_factor: float = 1.3
+    min_transfer_time: int = 60
+
+    def __post_init__(self) -> None:
+        if self.max_distance <= 0:
+            raise ValueError("Transfer distance must be positive")
+        if self.walking_speed <= 0:
+            raise ValueError("Walking speed must be positive")
+        if self.detour_factor < 1:
+            raise ValueError("Detour factor must be at least 1")
+
+    def walking_time(self, distance: float) -> int:
+        seconds = math.ceil(distance * self.detour_factor / self.walking_speed)
+        return max(self.min_transfer_time, seconds)
+
+
+@dataclass(frozen=True, slots=True)
+class TransferStop:
+    """A boarding location considered for cross-agency transfers."""
+
+    stop_id: str
+    agency_id: str
+    lat: float
+    lon: float
+
+
+def generate_transfers(
+    stops: Iterable[TransferStop],
+    settings: TransferSettings,
+) -> Iterator[tuple[str, str, str, str]]:
+    """Yield ``transfers.txt`` rows linking nearby stops of different agencies.
+
+    Rows are ``(from_stop_id, to_stop_id, transfer_type, min_transfer_time)``
+    and are emitted in both directions, ordered by stop ids.
+    """
+
+    stops = list(stops)
+    rows: list[tuple[str, str, str, str]] = []
+    for first, second, distance in iter_nearby_pairs(
+        [(stop.lat, stop.lon) for stop in stops],
+        settings.max_distance,
+    ):
+        origin, destination = stops[first], stops[second]
+        if origin.agency_id == destination.agency_id:
+            continue
+        walking_time = str(settings.walking_time(distance))
+        rows.append((origin.stop_id, destination.stop_id, _TIMED_TRANSFER, walking_time))
+        rows.append((destination.stop_id, origin.stop_id, _TIMED_TRANSFER, walking_time))
+
+    rows.sort()
+    yield from rows
@@ -0,0 +1,164 @@
+from __future__ import annotations
+
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Any, Callable, Iterator
+
+TableReader = Callable[[str], Iterator[list[str]]]
+
+_SAMPLE_SIZE = 5
+
+# Tables in dependency order: every table only references keys collected earlier.
+# Entries are (column, key space, required).
+_REFERENCES: dict[str, tuple[tuple[str, str, bool], ...]] = {
+    "agency.txt": (),
+    "calendar.txt": (),
+    "calendar_dates.txt": (),
+    "shapes.txt": (),
+    "stops.txt": (("parent_station", "stop_id", False),),
+    "routes.txt": (("agency_id", "agency_id", False),),
+    "trips.txt": (
+        ("route_id", "route_id", True),
+        ("service_id", "service_id", True),
+        ("shape_id", "shape_id", False),
+    ),
+    "stop_times.txt": (("trip_id", "trip_id", True), ("stop_id", "stop_id", True)),
+    "frequencies.txt": (("trip_id", "trip_id", True),),
+    "transfers.txt": (
+        ("from_stop_id", "stop_id", False),
+        ("to_stop_id", "stop_id", False),
+    ),
+}
+
+# Key spaces and the tables defining them.
+_PRIMARY_KEYS: dict[str, tuple[str, str]] = {
+    "agency.txt": ("agency_id", "agency_id"),
+    "calendar.txt": ("service_id", "service_id"),
+    "calendar_dates.txt": ("service_id", "service_id"),
+    "shapes.txt": ("shape_id", "shape_id"),
+    "stops.txt": ("stop_id", "stop_id"),
+    "routes.txt": ("route_id", "route_id"),
+    "trips.txt": ("trip_id", "trip_id"),
+}
+
+
+class StaticValidationError(RuntimeError):
+    """Raised when a consolidated bundle has dangling references and must not be published."""
+
+
+@dataclass(slots=True)
+class DanglingReference:
+    """Rows of ``table`` whose ``column`` points at a missing ``target`` key."""
+
+    table: str
+    column: str
+    target: str
+    count: int = 0
+    samples: list[str] = field(default_factory=list)
+
+
+@dataclass(slots=True)
+class ValidationReport:
+    """Referential-integrity findings for a bundle."""
+
+    rows: dict[str, int] = field(default_factory=dict)
+    dangling: list[DanglingReference] = field(default_factory=list)
+
+    @property
+    def valid(self) -> bool:
+        return not self.dangling
+
+    def to_payload(self) -> dict[str, Any]:
+        return {
+            "valid": self.valid,
+            "rows": self.rows,
+            "dangling": [
+                {
+                    "table": reference.table,
+                    "column": reference.column,
+                    "target": reference.target,
+                    "count": reference.count,
+                    "samples": reference.samples,
+                }
+                for reference in self.dangling
+            ],
+        }
+
+    def summary(self) -> str:
+        return ", ".join(
+            f"{reference.table}.{reference.column}: {reference.count}"
+            for reference in self.dangling
+        )
+
+
+def validate_references(read_table: TableReader) -> ValidationReport:
+    """Check the foreign keys of a GTFS bundle in a single pass over each table.
+
+    *read_table* returns the rows of a table, header first (nothing when the
+    table is absent). Primary keys are gathered into hash sets while the
+    tables are streamed in dependency order, so the cost is linear in the
+    size of the feed. Missing key tables make every non-empty reference to
+    them dangling, except that ``routes.agency_id`` is not checked when the
+    bundle has no ``agency_id`` column.
+    """
+
+    keys: dict[str, set[str]] = {target: set() for _, target in _PRIMARY_KEYS.values()}
+    defined: set[str] = set()
+    report = ValidationReport()
+    deferred: list[tuple[DanglingReference, Counter[str]]] = []
+
+    for table, references in _REFERENCES.items():
+        rows = read_table(table)
+        header = next(rows, [])
+        if not header:
+            continue
+        columns = {name: position for position, name in enumerate(header)}
+
+        key_position: int | None = None
+        key_space: set[str] | None = None
+        if table in _PRIMARY_KEYS:
+            column, target = _PRIMARY_KEYS[table]
+            key_position = columns.get(column)
+            if key_position is not None:
+                key_space = keys[target]
+                defined.add(target)
+
+        checks: list[tuple[int, set[str], bool, Counter[str]]] = []
+        for column, target, required in references:
+            position = columns.get(column)
+            if position is None or (target == "agency_id" and "agency_id" not in defined):
+                continue
+            missing: Counter[str] = Counter()
+            checks.append((position, keys[target], required, missing))
+            deferred.append((DanglingReference(table, column, target), missing))
+
+        count = 0
+        self_references: list[tuple[str, Counter[str]]] = []
+        for row in rows:
+            if not row:
+                continue
+            count += 1
+            if key_space is not None and key_position < len(row):
+                key_space.add(row[key_position])
+            for position, space, required, missing in checks:
+                value = row[position] if position < len(row) else ""
+                if not value:
+                    if required:
+                        missing[value] += 1
+                elif value not in space:
+                    if space is key_space:
+                        # Rows may reference keys defined further down the same table.
+                        self_references.append((value, missing))
+                    else:
+                        missing[value] += 1
+        for value, missing in self_references:
+            if value not in key_space:
+                missing[value] += 1
+        report.rows[table] = count
+
+    for reference, missing in deferred:
+        if missing:
+            reference.count = sum(missing.values())
+            reference.samples = sorted(missing)[:_SAMPLE_SIZE]
+            report.dangling.append(reference)
+    return report
@@ -1,9 +1,10 @@
 from __future__ import annotations
 
 import logging
+import os
 import shutil
 import tempfile
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from pathlib import Path
 from typing import Callable, Iterable, Sequence, TYPE_CHECKING
 
@@ -11,32 +12,76 @@ if TYPE_CHECKING:  # pragma: no cover - type checking helper
     from threading import Event
 
 import requests
+from google.transit import gtfs_realtime_pb2
 
 from .processors import (
-    StaticFeedInput,
+    CHECKSUM_SUFFIX,
+    BundleCompression,
+    DelaySettings,
+    DelayStatistics,
+    HistorySettings,
+    ParsedFeed,
+    RealtimeArchive,
     ServiceAlertInput,
+    StaticFeedInput,
+    StationSettings,
+    TransferSettings,
     TripUpdateInput,
     VehiclePositionInput,
+    agency_id_from_filename,
+    build_route_geometry,
+    build_sqlite_index,
+    consolidate_feed,
     consolidate_static_feeds,
-    consolidate_service_alerts,
-    consolidate_trip_updates,
-    consolidate_vehicle_positions,
     convert_feed_to_json,
     determine_agency_id,
     extract_zip,
-    agency_id_from_filename,
+    load_delay_statistics,
+    merged_feed,
     process_service_alerts,
+    read_checksum,
+    read_feed,
+    record_feed_version,
+    splice_combined_feed,
+    splice_service_alerts,
+    splice_trip_updates,
+    splice_vehicle_positions,
+    write_partitions,
+    write_service_calendar,
+    write_static_diff,
+    write_stop_search_index,
 )
 from .sources.base import DataSource, DownloadTarget
+from .utils.io import atomic_dump_json, atomic_write_bytes
 
 LOGGER = logging.getLogger(__name__)
 DEFAULT_TIMEOUT = 60  # seconds
 DEFAULT_CHUNK_SIZE = 1024 * 1024  # 1 MiB
 
 CONSOLIDATED_STATIC_FILENAME = "GTFS.zip"
+CONSOLIDATED_SQLITE_FILENAME = "GTFS.sqlite"
+WINDOW_STATIC_FILENAME = "GTFS-window.zip"
+STATION_CLUSTERS_FILENAME = "GTFS-stations.json"
+VALIDATION_REPORT_FILENAME = "GTFS-validation.json"
+PREVIOUS_STATIC_FILENAME = "GTFS.previous.zip"
+STATIC_DIFF_FILENAME = "GTFS-diff.json"
+ROUTE_GEOMETRY_DIRNAME = "geometry"
+REALTIME_HISTORY_DIRNAME = "history"
+SERVICE_CALENDAR_FILENAME = "GTFS-calendar.json"
+STOP_SEARCH_FILENAME = "GTFS-stops-search.json"
 RAW_SERVICE_ALERTS_FILENAME = "RawServiceAlerts.pb"
 RAW_TRIP_UPDATES_FILENAME = "RawTripUpdates.pb"
 RAW_VEHICLE_POSITIONS_FILENAME = "RawVehiclePositions.pb"
+DELAY_STATISTICS_FILENAME = "RawTripUpdates-delays.json"
+COMBINED_REALTIME_DIRNAME = "realtime"
+COMBINED_REALTIME_FILENAME = "RawRealtime.pb"
+# Entity kinds of the combined realtime feed, in feed order, and where their
+# consolidated feeds live under the source directory.
+_COMBINED_KINDS = {
+    "trip_update": ("tripupdates", RAW_TRIP_UPDATES_FILENAME),
+    "vehicle": ("vehiclepositions", RAW_VEHICLE_POSITIONS_FILENAME),
+    "alert": ("servicealerts", RAW_SERVICE_ALERTS_FILENAME),
+}
 SERVICE_ALERTS_JSON_FILENAME = "alerts.json"
 APPROVED_ALERTS_PB_FILENAME = "approved_all_alerts.pb"
 RAW_INCIDENTS_FILENAME = "raw_incidents.json"
@@ -54,6 +99,8 @@ class DownloadResult:
     output_path: Path
     bytes_written: int
     derived_paths: tuple[Path, ...] = ()
+    # Parsed contents of a realtime download; consolidation rewrites its ids in place.
+    feed: gtfs_realtime_pb2.FeedMessage | None = field(default=None, compare=False, repr=False)
 
 
 class DownloadService:
@@ -68,6 +115,16 @@ class DownloadService:
         timeout: int = DEFAULT_TIMEOUT,
         chunk_size: int = DEFAULT_CHUNK_SIZE,
         cleanup_intermediate_files: bool = False,
+        static_compression: BundleCompression | None = None,
+        stop_times_memory_limit: int | None = None,
+        static_window_days: int | None = None,
+        static_transfers: TransferSettings | None = None,
+        static_stations: StationSettings | None = None,
+        deduplicate_shapes: bool = False,
+        strict_validation: bool = False,
+        realtime_history: HistorySettings | None = None,
+        delay_settings: DelaySettings | None = None,
+        partition_routes: bool = False,
     ) -> None:
         self._sources = list(sources)
         self._output_dir = Path(output_dir)
@@ -75,6 +132,18 @@ class DownloadService:
         self._timeout = timeout
         self._chunk_size = chunk_size
         self._cleanup_enabled = cleanup_intermediate_files
+        self._static_compression = static_compression
+        self._stop_times_memory_limit = stop_times_memory_limit
+        self._static_window_days = static_window_days
+        self._static_transfers = static_transfers
+        self._static_stations = static_stations
+        self._deduplicate_shapes = deduplicate_shapes
+        self._strict_validation = strict_validation
+        self._realtime_history = realtime_history
+        self._realtime_archives: dict[Path, RealtimeArchive] = {}
+        self._delay_settings = delay_settings or DelaySettings()
+        self._delay_statistics: DelayStatistics | None = None
+        self._partition_routes = partition_routes
 
     def run(
         self,
@@ -144,7 +213,10 @@ class DownloadService:
             response.raise_for_status()
             bytes_written = self._write_stream(response.iter_content(self._chunk_size), destination)
 
-        derived_paths = tuple(self._post_process(source, target, destination))
+        feed = None
+        if destination.suffix.lower() == ".pb":
+            feed = self._read_realtime_feed(source, target, destination)
+        derived_paths = tuple(self._post_process(source, target, destination, feed))
 
         LOGGER.info("Saved %s (%s bytes)", destination, bytes_written)
         for generated in derived_paths:
@@ -156,6 +228,7 @@ class DownloadService:
             output_path=destination,
             bytes_written=bytes_written,
             derived_paths=derived_paths,
+            feed=feed,
         )
 
     def _write_stream(self, chunks: Iterable[bytes], destination: Path) -> int:
@@ -175,19 +248,38 @@ class DownloadService:
         tmp_path.replace(destination)
         return bytes_written
 
+    def _read_realtime_feed(
+        self,
+        source: DataSource,
+        target: DownloadTarget,
+        destination: Path,
+    ) -> gtfs_realtime_pb2.FeedMessage | None:
+        try:
+            return read_feed(destination)
+        except Exception:
+            LOGGER.exception(
+                "Failed to parse realtime feed for source %s target %s",
+                source.slug,
+                target.url,
+            )
+            return None
+
     def _post_process(
         self,
         source: DataSource,
         target: DownloadTarget,
         destination: Path,
+        feed: gtfs_realtime_pb2.FeedMessage | None = None,
     ) -> Iterable[Path]:
         generated: list[Path] = []
 
         suffix = destination.suffix.lower()
 
         if suffix == ".pb":
+            if feed is None:
+                return generated
             try:
-                json_path = convert_feed_to_json(destination)
+                json_path = convert_feed_to_json(destination, feed=feed)
             except Exception:
                 LOGGER.exception(
                     "Failed to convert realtime feed for source %s target %s",
@@ -235,23 +327,115 @@ class DownloadService:
         if not feeds:
             return [], []
 
+        output_path = static_results[0].output_path.parent / CONSOLIDATED_STATIC_FILENAME
+        previous_path = self._snapshot_file(
+            output_path,
+            output_path.with_name(PREVIOUS_STATIC_FILENAME),
+        )
+
         try:
             consolidated_path = consolidate_static_feeds(
                 feeds,
-                static_results[0].output_path.parent / CONSOLIDATED_STATIC_FILENAME,
+                output_path,
+                compression=self._static_compression,
+                stop_times_memory_limit=self._stop_times_memory_limit,
+                window_days=self._static_window_days,
+                transfers=self._static_transfers,
+                stations=self._static_stations,
+                deduplicate_shapes=self._deduplicate_shapes,
+                strict_validation=self._strict_validation,
             )
         except Exception:
             LOGGER.exception("Failed to consolidate static GTFS bundles")
             return [], []
 
-        LOGGER.info("Generated consolidated static bundle at %s", consolidated_path)
-        return [consolidated_path], []
+        LOGGER.info(
+            "Generated consolidated static bundle at %s (sha256 %s)",
+            consolidated_path,
+            read_checksum(consolidated_path),
+        )
+        final_artifacts = [
+            consolidated_path,
+            consolidated_path.with_name(CONSOLIDATED_STATIC_FILENAME + CHECKSUM_SUFFIX),
+            consolidated_path.with_name(VALIDATION_REPORT_FILENAME),
+        ]
+
+        if self._static_window_days is not None:
+            window_path = consolidated_path.with_name(WINDOW_STATIC_FILENAME)
+            LOGGER.info("Generated time-windowed static bundle at %s", window_path)
+            final_artifacts.append(window_path)
+            final_artifacts.append(window_path.with_name(WINDOW_STATIC_FILENAME + CHECKSUM_SUFFIX))
+
+        if self._static_stations is not None:
+            final_artifacts.append(consolidated_path.with_name(STATION_CLUSTERS_FILENAME))
+
+        try:
+            sqlite_path = build_sqlite_index(
+                consolidated_path,
+                consolidated_path.with_name(CONSOLIDATED_SQLITE_FILENAME),
+            )
+        except Exception:
+            LOGGER.exception("Failed to build SQLite index for consolidated static bundle")
+        else:
+            LOGGER.info("Generated static SQLite index at %s", sqlite_path)
+            final_artifacts.append(sqlite_path)
+
+        try:
+            calendar_path = write_service_calendar(
+                consolidated_path,
+                consolidated_path.with_name(SERVICE_CALENDAR_FILENAME),
+            )
+        except Exception:
+            LOGGER.exception("Failed to build service calendar for consolidated static bundle")
+        else:
+            LOGGER.info("Generated service calendar index at %s", calendar_path)
+            final_artifacts.append(calendar_path)
+
+        try:
+            search_path = write_stop_search_index(
+                consolidated_path,
+                consolidated_path.with_name(STOP_SEARCH_FILENAME),
+            )
+        except Exception:
+            LOGGER.exception("Failed to build stop search index for consolidated static bundle")
+        else:
+            LOGGER.info("Stop search index available at %s", search_path)
+            final_artifacts.append(search_path)
+
+        try:
+            geometry_paths = build_route_geometry(
+                consolidated_path,
+                consolidated_path.with_name(ROUTE_GEOMETRY_DIRNAME),
+            )
+        except Exception:
+            LOGGER.exception("Failed to export route geometry from consolidated static bundle")
+        else:
+            LOGGER.info("Generated %d route geometry files", len(geometry_paths))
+            final_artifacts.extend(geometry_paths)
+
+        if previous_path is not None:
+            final_artifacts.append(previous_path)
+            try:
+                diff_path = write_static_diff(
+                    previous_path,
+                    consolidated_path,
+                    consolidated_path.with_name(STATIC_DIFF_FILENAME),
+                )
+            except Exception:
+                LOGGER.exception("Failed to diff consolidated static bundle against previous version")
+            else:
+                LOGGER.info("Generated static bundle diff at %s", diff_path)
+                final_artifacts.append(diff_path)
+
+        return final_artifacts, []
 
     def _finalize_realtime_feeds(
         self, results: Sequence[DownloadResult]
     ) -> tuple[list[Path], list[Path]]:
         final_artifacts: list[Path] = []
         extra_intermediate: list[Path] = []
+        # Consolidated outputs of this tick, keyed by entity kind, for the combined feed.
+        combined_parts: dict[str, tuple[Path, bytes | None]] = {}
 
         alerts_inputs: list[ServiceAlertInput] = []
         service_alert_results = sorted(
@@ -266,7 +450,7 @@ class DownloadService:
 
         for index, result in enumerate(service_alert_results):
             agency_id = agency_id_from_filename(result.output_path, index)
-            alerts_inputs.append(ServiceAlertInput(result.output_path, agency_id))
+            alerts_inputs.append(ServiceAlertInput(result.output_path, agency_id, result.feed))
 
         if alerts_inputs:
             alerts_dir = service_alert_results[0].output_path.parent
@@ -275,11 +459,12 @@ class DownloadService:
             )
 
             try:
-                consolidated_alerts = consolidate_service_alerts(alerts_inputs, output_path)
+                consolidated_alerts, spliced_alerts = self._consolidate_realtime(
+                    "ServiceAlerts", alerts_inputs, output_path, splice_service_alerts
+                )
             except Exception:
                 LOGGER.exception("Failed to consolidate ServiceAlerts feeds")
             else:
-                LOGGER.info("Generated consolidated ServiceAlerts feed at %s", consolidated_alerts)
 
                 alerts_json_path = alerts_dir / SERVICE_ALERTS_JSON_FILENAME
                 approved_alerts_path = alerts_dir / APPROVED_ALERTS_FILENAME
@@ -288,7 +473,14 @@ class DownloadService:
                 raw_incidents_path = alerts_dir / RAW_INCIDENTS_FILENAME
                 approved_alerts_pb_path = alerts_dir / APPROVED_ALERTS_PB_FILENAME
 
+                # Dispatcher and incident edits are only applied here, so alerts
+                # are post-processed even when the upstream feeds are unchanged.
                 try:
+                    merged_alerts = (
+                        merged_feed(alerts_inputs, spliced_alerts)
+                        if spliced_alerts is not None
+                        else read_feed(consolidated_alerts)
+                    )
                     alerts_output = process_service_alerts(
                         consolidated_alerts,
                         alerts_json_path,
@@ -297,6 +489,7 @@ class DownloadService:
                         dispatcher_alerts_path,
                         raw_incidents_path,
                         approved_alerts_pb_path,
+                        feed=merged_alerts,
                     )
                 except Exception:
                     LOGGER.exception("Failed to post-process consolidated ServiceAlerts feed")
@@ -305,6 +498,7 @@ class DownloadService:
                     final_artifacts.append(alerts_output.approved_alerts_pb)
 
                 final_artifacts.append(consolidated_alerts)
+                combined_parts["alert"] = (consolidated_alerts, spliced_alerts)
 
         trip_inputs: list[TripUpdateInput] = []
         trip_update_results = sorted(
@@ -319,7 +513,7 @@ class DownloadService:
 
         for index, result in enumerate(trip_update_results):
             agency_id = agency_id_from_filename(result.output_path, index)
-            trip_inputs.append(TripUpdateInput(result.output_path, agency_id))
+            trip_inputs.append(TripUpdateInput(result.output_path, agency_id, result.feed))
 
         if trip_inputs:
             trip_output = trip_update_results[0].output_path.with_name(
@@ -327,20 +521,33 @@ class DownloadService:
             )
 
             try:
-                consolidated_trips = consolidate_trip_updates(trip_inputs, trip_output)
+                consolidated_trips, spliced_trips = self._consolidate_realtime(
+                    "TripUpdates",
+                    trip_inputs,
+                    trip_output,
+                    splice_trip_updates,
+                    track_versions=True,
+                    archive=True,
+                    partition=True,
+                )
             except Exception:
                 LOGGER.exception("Failed to consolidate TripUpdates feeds")
             else:
-                LOGGER.info("Generated consolidated TripUpdates feed at %s", consolidated_trips)
-
-                try:
-                    trips_json = convert_feed_to_json(consolidated_trips)
-                except Exception:
-                    LOGGER.exception("Failed to render consolidated TripUpdates feed as JSON")
-                else:
-                    extra_intermediate.append(trips_json)
+                if spliced_trips is not None:
+                    try:
+                        trips_feed = merged_feed(trip_inputs, spliced_trips)
+                        trips_json = convert_feed_to_json(consolidated_trips, feed=trips_feed)
+                    except Exception:
+                        LOGGER.exception("Failed to render consolidated TripUpdates feed as JSON")
+                    else:
+                        extra_intermediate.append(trips_json)
+                        self._update_delay_statistics(
+                            trips_feed,
+                            consolidated_trips.with_name(DELAY_STATISTICS_FILENAME),
+                        )
 
                 final_artifacts.append(consolidated_trips)
+                combined_parts["trip_update"] = (consolidated_trips, spliced_trips)
 
         vehicle_inputs: list[VehiclePositionInput] = []
         vehicle_results = sorted(
@@ -355,7 +562,7 @@ class DownloadService:
 
         for index, result in enumerate(vehicle_results):
             agency_id = agency_id_from_filename(result.output_path, index)
-            vehicle_inputs.append(VehiclePositionInput(result.output_path, agency_id))
+            vehicle_inputs.append(VehiclePositionInput(result.output_path, agency_id, result.feed))
 
         if vehicle_inputs:
             vehicle_output = vehicle_results[0].output_path.with_name(
@@ -363,22 +570,163 @@ class DownloadService:
             )
 
             try:
-                consolidated_vehicles = consolidate_vehicle_positions(vehicle_inputs, vehicle_output)
+                consolidated_vehicles, spliced_vehicles = self._consolidate_realtime(
+                    "VehiclePositions",
+                    vehicle_inputs,
+                    vehicle_output,
+                    splice_vehicle_positions,
+                    track_versions=True,
+                    archive=True,
+                    partition=True,
+                )
             except Exception:
                 LOGGER.exception("Failed to consolidate VehiclePositions feeds")
             else:
-                LOGGER.info("Generated consolidated VehiclePositions feed at %s", consolidated_vehicles)
+                if spliced_vehicles is not None:
+                    try:
+                        vehicles_json = convert_feed_to_json(
+                            consolidated_vehicles,
+                            feed=merged_feed(vehicle_inputs, spliced_vehicles),
+                        )
+                    except Exception:
+                        LOGGER.exception(
+                            "Failed to render consolidated VehiclePositions feed as JSON"
+                        )
+                    else:
+                        extra_intermediate.append(vehicles_json)
+
+                final_artifacts.append(consolidated_vehicles)
+                combined_parts["vehicle"] = (consolidated_vehicles, spliced_vehicles)
+
+        if combined_parts:
+            try:
+                combined_path = self._combine_realtime(combined_parts)
+            except Exception:
+                LOGGER.exception("Failed to build combined realtime feed")
+            else:
+                final_artifacts.append(combined_path)
+
+        return final_artifacts, extra_intermediate
+
+    def _combine_realtime(self, parts: dict[str, tuple[Path, bytes | None]]) -> Path:
+        """Splice this tick's consolidated feeds into one feed with every entity kind.
+
+        Kinds whose inputs were unchanged, or that failed to consolidate or
+        were not downloaded this tick, contribute the consolidated feed already
+        on disk, so the combined feed never silently drops a kind. When no kind
+        changed the previous combined feed is kept.
+        """
+
+        source_dir = next(iter(parts.values()))[0].parent.parent
+        output_path = source_dir / COMBINED_REALTIME_DIRNAME / COMBINED_REALTIME_FILENAME
+        if output_path.exists() and all(spliced is None for _, spliced in parts.values()):
+            LOGGER.info("Realtime feeds unchanged; keeping %s", output_path)
+            return output_path
+
+        feeds: dict[str, bytes] = {}
+        for kind, (dirname, filename) in _COMBINED_KINDS.items():
+            if kind in parts:
+                path, spliced = parts[kind]
+                feeds[kind] = spliced if spliced is not None else path.read_bytes()
+            elif (source_dir / dirname / filename).is_file():
+                LOGGER.warning("Using the previous consolidated %s feed in the combined feed", kind)
+                feeds[kind] = (source_dir / dirname / filename).read_bytes()
+        atomic_write_bytes(output_path, splice_combined_feed(feeds))
+        LOGGER.info("Generated combined realtime feed at %s", output_path)
+        return output_path
+
+    def _consolidate_realtime(
+        self,
+        label: str,
+        inputs: Sequence[ServiceAlertInput | TripUpdateInput | VehiclePositionInput],
+        output_path: Path,
+        splice: Callable[..., bytes],
+        *,
+        track_versions: bool = False,
+        archive: bool = False,
+        partition: bool = False,
+    ) -> tuple[Path, bytes | None]:
+        """Merge *inputs* into *output_path* unless their headers match the last run.
+
+        Returns the output path and the merged bytes, or ``None`` in place of
+        the bytes when the previous output was kept untouched. With
+        *track_versions* the entity changes are journaled for differential
+        clients; with *archive* new snapshots are appended to the history
+        archive when one is configured; with *partition* per-agency (and
+        optionally per-route) feeds are written next to the output.
+        """
+
+        spliced = consolidate_feed(inputs, output_path, splice)
+        if spliced is None:
+            LOGGER.info("%s inputs unchanged; keeping %s", label, output_path)
+            return output_path, None
+
+        LOGGER.info("Generated consolidated %s feed at %s", label, output_path)
+        if track_versions:
+            try:
+                versions = record_feed_version(spliced, output_path)
+            except Exception:
+                LOGGER.exception("Failed to record %s feed version", label)
+            else:
+                LOGGER.debug("%s feed is at version %d", label, versions.version)
+        if archive and self._realtime_history is not None:
+            try:
+                self._realtime_archive(output_path).append(spliced)
+            except Exception:
+                LOGGER.exception("Failed to archive %s snapshot", label)
+        if partition:
+            try:
+                partitions = write_partitions(
+                    spliced,
+                    output_path,
+                    routes=self._partition_routes,
+                )
+            except Exception:
+                LOGGER.exception("Failed to partition %s feed", label)
+            else:
+                LOGGER.debug("Wrote %d %s partitions", len(partitions), label)
+        return output_path, spliced
 
+    def _update_delay_statistics(
+        self,
+        feed: ParsedFeed,
+        statistics_path: Path,
+    ) -> None:
+        statistics = self._delay_statistics
+        if statistics is None:
+            statistics = DelayStatistics(self._delay_settings)
+            # Resume the aggregates of a previous run when they were built the same way.
+            if statistics_path.exists():
                 try:
-                    vehicles_json = convert_feed_to_json(consolidated_vehicles)
+                    persisted = load_delay_statistics(statistics_path)
                 except Exception:
-                    LOGGER.exception("Failed to render consolidated VehiclePositions feed as JSON")
+                    LOGGER.exception("Failed to load delay statistics from %s", statistics_path)
                 else:
-                    extra_intermediate.append(vehicles_json)
-
-                final_artifacts.append(consolidated_vehicles)
+                    if persisted.settings == self._delay_settings:
+                        statistics = persisted
+            self._delay_statistics = statistics
 
-        return final_artifacts, extra_intermediate
+        try:
+            observations = statistics.update(feed)
+            if observations:
+                atomic_dump_json(
+                    statistics_path,
+                    statistics.to_payload(),
+                    indent=None,
+                    sort_keys=False,
+                )
+        except Exception:
+            LOGGER.exception("Failed to update delay statistics at %s", statistics_path)
+        else:
+            LOGGER.debug("Added %d delay observations to %s", observations, statistics_path)
+
+    def _realtime_archive(self, output_path: Path) -> RealtimeArchive:
+        archive = self._realtime_archives.get(output_path)
+        if archive is None:
+            directory = output_path.parent / REALTIME_HISTORY_DIRNAME / output_path.stem
+            archive = RealtimeArchive(directory, self._realtime_history)
+            self._realtime_archives[output_path] = archive
+        return archive
 
     def _cleanup_artifacts(self, artifacts: Iterable[Path], preserved: Iterable[Path]) -> None:
         preserved_set = {Path(path) for path in preserved}
@@ -401,6 +749,20 @@ class DownloadService:
             except Exception:
                 LOGGER.exception("Failed to remove intermediate artifact at %s", path)
 
+    @staticmethod
+    def _snapshot_file(path: Path, snapshot: Path) -> Path | None:
+        """Preserve the current contents of *path* before it is atomically replaced."""
+
+        if not path.exists():
+            return None
+
+        snapshot.unlink(missing_ok=True)
+        try:
+            os.link(path, snapshot)
+        except OSError:
+            shutil.copy2(path, snapshot)
+        return snapshot
+
     @staticmethod
     def _is_relative_to(child: Path, parent: Path) -> bool:
         try:
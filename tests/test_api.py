@@ -4,20 +4,38 @@ import json
 from pathlib import Path
 
 from fastapi.testclient import TestClient
+from google.transit import gtfs_realtime_pb2
 
 from delai.api import (
+    ACTIVE_SERVICES_ROUTE,
+    DELAYS_ROUTE,
+    RAW_STATIC_CHECKSUM_ROUTE,
+    STOP_SEARCH_ROUTE,
     RAW_SERVICE_ALERTS_ROUTE,
     RAW_STATIC_ROUTE,
+    RAW_STATIC_SQLITE_ROUTE,
+    RAW_STATIC_WINDOW_ROUTE,
     RAW_TRIP_UPDATES_ROUTE,
+    RAW_REALTIME_ROUTE,
     RAW_VEHICLE_POSITIONS_ROUTE,
+    ROUTE_GEOMETRY_ROUTE,
+    TRIP_UPDATES_CHANGES_ROUTE,
+    VEHICLE_POSITIONS_ROUTE,
     create_app,
 )
+from delai.processors import DelayStatistics, record_feed_version, write_partitions
 from delai.service import (
+    COMBINED_REALTIME_FILENAME,
+    CONSOLIDATED_SQLITE_FILENAME,
     CONSOLIDATED_STATIC_FILENAME,
+    DELAY_STATISTICS_FILENAME,
     RAW_SERVICE_ALERTS_FILENAME,
     RAW_TRIP_UPDATES_FILENAME,
     RAW_VEHICLE_POSITIONS_FILENAME,
     SERVICE_ALERTS_JSON_FILENAME,
+    SERVICE_CALENDAR_FILENAME,
+    STATIC_DIFF_FILENAME,
+    WINDOW_STATIC_FILENAME,
 )
 
 
@@ -37,10 +55,15 @@ def test_endpoints_serve_files(tmp_path: Path) -> None:
 
     servicealerts_dir = base_dir / "servicealerts"
     _prepare_file(base_dir / "static" / CONSOLIDATED_STATIC_FILENAME, static_bytes)
+    _prepare_file(base_dir / "static" / CONSOLIDATED_SQLITE_FILENAME, b"sqlite-bytes")
+    _prepare_file(base_dir / "static" / WINDOW_STATIC_FILENAME, b"window-bytes")
+    _prepare_file(base_dir / "static" / STATIC_DIFF_FILENAME, b'{"changed": false}')
+    _prepare_file(base_dir / "static" / "geometry" / "routes-z13.geojson", b'{"features": []}')
     _prepare_file(servicealerts_dir / RAW_SERVICE_ALERTS_FILENAME, service_alert_bytes)
     _prepare_file(servicealerts_dir / SERVICE_ALERTS_JSON_FILENAME, b"{}")
     _prepare_file(base_dir / "tripupdates" / RAW_TRIP_UPDATES_FILENAME, trip_update_bytes)
     _prepare_file(base_dir / "vehiclepositions" / RAW_VEHICLE_POSITIONS_FILENAME, vehicle_bytes)
+    _prepare_file(base_dir / "realtime" / COMBINED_REALTIME_FILENAME, b"combined")
 
     app = create_app(tmp_path, source_slug)
     client = TestClient(app)
@@ -53,6 +76,28 @@ def test_endpoints_serve_files(tmp_path: Path) -> None:
     assert response.headers["content-disposition"].endswith(f'filename="{CONSOLIDATED_STATIC_FILENAME}"')
     assert response.headers["access-control-allow-origin"] == "*"
 
+    response = client.get(RAW_STATIC_SQLITE_ROUTE)
+    assert response.status_code == 200
+    assert response.content == b"sqlite-bytes"
+
+    response = client.get(RAW_STATIC_WINDOW_ROUTE)
+    assert response.status_code == 200
+    assert response.content == b"window-bytes"
+
+    response = client.get("/api/v1/static-diff")
+    assert response.status_code == 200
+    assert response.json() == {"changed": False}
+
+    response = client.get(ROUTE_GEOMETRY_ROUTE, params={"zoom": 13})
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/geo+json")
+
+    response = client.get(ROUTE_GEOMETRY_ROUTE, params={"zoom": 13, "format": "polyline"})
+    assert response.status_code == 404
+
+    response = client.get(ROUTE_GEOMETRY_ROUTE, params={"zoom": 13, "format": "svg"})
+    assert response.status_code == 400
+
     response = client.get(RAW_SERVICE_ALERTS_ROUTE)
     assert response.status_code == 200
     assert response.content == service_alert_bytes
@@ -71,6 +116,10 @@ def test_endpoints_serve_files(tmp_path: Path) -> None:
     assert response.status_code == 200
     assert response.content == vehicle_bytes
 
+    response = client.get(RAW_REALTIME_ROUTE)
+    assert response.status_code == 200
+    assert response.content == b"combined"
+
     incidents_path = servicealerts_dir / "raw_incidents.json"
     response = client.get("/api/v1/incidents")
     assert response.status_code == 200
@@ -98,6 +147,218 @@ def test_endpoints_serve_files(tmp_path: Path) -> None:
     assert json.loads((servicealerts_dir / "dispatcher_alerts.json").read_text(encoding="utf-8")) == []
 
 
+def test_active_services_endpoint(tmp_path: Path) -> None:
+    source_slug = "krakow-gtfs"
+    calendar_path = tmp_path / source_slug / "static" / SERVICE_CALENDAR_FILENAME
+    payload = {
+        "start_date": "20261019",
+        "days": 2,
+        "services": {"A1_svc": "AQ==", "A2_svc": "Ag=="},
+        "trips": {"A1_svc": ["A1_t1"], "A2_svc": ["A2_t1"]},
+    }
+    _prepare_file(calendar_path, json.dumps(payload).encode("utf-8"))
+
+    client = TestClient(create_app(tmp_path, source_slug))
+
+    response = client.get(ACTIVE_SERVICES_ROUTE, params={"date": "2026-10-19"})
+    assert response.status_code == 200
+    assert response.json() == {"date": "2026-10-19", "service_ids": ["A1_svc"]}
+
+    response = client.get(
+        ACTIVE_SERVICES_ROUTE, params={"date": "2026-10-20", "include_trips": "true"}
+    )
+    assert response.json()["trip_ids"] == ["A2_t1"]
+
+
+def test_static_bundle_uses_checksum_etag(tmp_path: Path) -> None:
+    source_slug = "krakow-gtfs"
+    static_dir = tmp_path / source_slug / "static"
+    _prepare_file(static_dir / CONSOLIDATED_STATIC_FILENAME, b"zip-bytes")
+    _prepare_file(static_dir / f"{CONSOLIDATED_STATIC_FILENAME}.sha256", b"abc123  GTFS.zip\n")
+
+    client = TestClient(create_app(tmp_path, source_slug))
+
+    response = client.get(RAW_STATIC_ROUTE)
+    assert response.status_code == 200
+    assert response.headers["etag"] == '"abc123"'
+
+    response = client.get(RAW_STATIC_ROUTE, headers={"If-None-Match": '"abc123"'})
+    assert response.status_code == 304
+    assert response.content == b""
+
+    response = client.get(RAW_STATIC_CHECKSUM_ROUTE)
+    assert response.status_code == 200
+    assert response.text == "abc123  GTFS.zip\n"
+
+
+def test_stop_search_endpoint(tmp_path: Path) -> None:
+    source_slug = "krakow-gtfs"
+    payload = {
+        "bundle_sha256": None,
+        "entries": [
+            {"name": "Teatr Bagatela", "stop_ids": ["A3_1"], "lat": 50.06, "lon": 19.93, "routes": 9},
+            {"name": "Teatr Słowackiego", "stop_ids": ["A3_2"], "lat": 50.06, "lon": 19.94, "routes": 12},
+        ],
+    }
+    _prepare_file(
+        tmp_path / source_slug / "static" / "GTFS-stops-search.json",
+        json.dumps(payload).encode("utf-8"),
+    )
+
+    client = TestClient(create_app(tmp_path, source_slug))
+
+    response = client.get(STOP_SEARCH_ROUTE, params={"q": "teatr"})
+    assert response.status_code == 200
+    assert [item["name"] for item in response.json()] == ["Teatr Słowackiego", "Teatr Bagatela"]
+
+    response = client.get(STOP_SEARCH_ROUTE, params={"q": "slowac", "limit": 1})
+    assert [item["stop_ids"] for item in response.json()] == [["A3_2"]]
+
+
+def test_trip_updates_changes_endpoint(tmp_path: Path) -> None:
+    source_slug = "krakow-gtfs"
+    path = tmp_path / source_slug / "tripupdates" / RAW_TRIP_UPDATES_FILENAME
+    path.parent.mkdir(parents=True)
+
+    client = TestClient(create_app(tmp_path, source_slug))
+
+    for delays in ({"A1_t1": 0, "A1_t2": 0}, {"A1_t1": 0, "A1_t2": 90}):
+        message = gtfs_realtime_pb2.FeedMessage()
+        message.header.gtfs_realtime_version = "2.0"
+        for trip_id, delay in delays.items():
+            entity = message.entity.add()
+            entity.id = trip_id
+            entity.trip_update.trip.trip_id = trip_id
+            entity.trip_update.delay = delay
+        data = message.SerializeToString()
+        path.write_bytes(data)
+        record_feed_version(data, path)
+
+    response = client.get(TRIP_UPDATES_CHANGES_ROUTE, params={"since": 1})
+    assert response.status_code == 200
+    assert response.headers["x-feed-version"] == "2"
+    differential = gtfs_realtime_pb2.FeedMessage()
+    differential.ParseFromString(response.content)
+    assert differential.header.incrementality == gtfs_realtime_pb2.FeedHeader.DIFFERENTIAL
+    assert [entity.id for entity in differential.entity] == ["A1_t2"]
+
+    # Without a usable version the full dataset is returned.
+    for params in ({}, {"since": 7}):
+        response = client.get(TRIP_UPDATES_CHANGES_ROUTE, params=params)
+        assert response.content == data
+        assert response.headers["x-feed-version"] == "2"
+
+
+def test_vehicle_positions_query_endpoint(tmp_path: Path) -> None:
+    source_slug = "krakow-gtfs"
+    message = gtfs_realtime_pb2.FeedMessage()
+    message.header.gtfs_realtime_version = "2.0"
+    message.header.timestamp = 1700000000
+    for entity_id, route_id, vehicle_id in (
+        ("A1_1", "A1_52", "A1_HY101"),
+        ("A1_2", "A1_52", "A1_HY102"),
+        ("A2_3", "A2_179", "A2_DN300"),
+    ):
+        entity = message.entity.add()
+        entity.id = entity_id
+        entity.vehicle.trip.trip_id = f"{entity_id}_trip"
+        entity.vehicle.trip.route_id = route_id
+        entity.vehicle.vehicle.id = vehicle_id
+    _prepare_file(
+        tmp_path / source_slug / "vehiclepositions" / RAW_VEHICLE_POSITIONS_FILENAME,
+        message.SerializeToString(),
+    )
+
+    client = TestClient(create_app(tmp_path, source_slug))
+
+    response = client.get(VEHICLE_POSITIONS_ROUTE, params={"route_id": "A1_52"})
+    assert response.status_code == 200
+    payload = response.json()
+    assert payload["timestamp"] == 1700000000
+    assert [entity["id"] for entity in payload["entities"]] == ["A1_1", "A1_2"]
+
+    response = client.get(
+        VEHICLE_POSITIONS_ROUTE, params={"route_id": "A1_52", "vehicle_id": "A1_HY102"}
+    )
+    assert [entity["vehicle"]["vehicle"]["id"] for entity in response.json()["entities"]] == [
+        "A1_HY102"
+    ]
+
+    assert client.get(VEHICLE_POSITIONS_ROUTE, params={"route_id": "A9_1"}).json()["entities"] == []
+    assert client.get(VEHICLE_POSITIONS_ROUTE).status_code == 400
+
+
+def test_delays_endpoint(tmp_path: Path) -> None:
+    source_slug = "krakow-gtfs"
+    message = gtfs_realtime_pb2.FeedMessage()
+    message.header.gtfs_realtime_version = "2.0"
+    message.header.timestamp = 1700000000
+    for trip_id, route_id, delay in (
+        ("A1_1", "A1_52", 60),
+        ("A1_2", "A1_52", 240),
+        ("A2_3", "A2_179", 0),
+    ):
+        entity = message.entity.add()
+        entity.id = trip_id
+        entity.trip_update.trip.trip_id = trip_id
+        entity.trip_update.trip.route_id = route_id
+        entity.trip_update.delay = delay
+    statistics = DelayStatistics()
+    statistics.update(message)
+    _prepare_file(
+        tmp_path / source_slug / "tripupdates" / DELAY_STATISTICS_FILENAME,
+        json.dumps(statistics.to_payload()).encode("utf-8"),
+    )
+
+    client = TestClient(create_app(tmp_path, source_slug))
+
+    response = client.get(DELAYS_ROUTE)
+    assert response.status_code == 200
+    payload = response.json()
+    assert payload["timestamp"] == 1700000000
+    assert payload["by"] == "route"
+    assert sorted(payload["delays"]) == ["A1_52", "A2_179"]
+    assert payload["delays"]["A1_52"]["mean"] == 150.0
+    assert payload["delays"]["A1_52"]["on_time_share"] == 0.5
+
+    response = client.get(DELAYS_ROUTE, params={"by": "hour", "key": "23"})
+    assert response.json()["delays"]["23"]["observations"] == 3.0
+    assert client.get(DELAYS_ROUTE, params={"by": "agency"}).status_code == 400
+
+
+def test_vehicle_positions_partition_endpoints(tmp_path: Path) -> None:
+    source_slug = "krakow-gtfs"
+    message = gtfs_realtime_pb2.FeedMessage()
+    message.header.gtfs_realtime_version = "2.0"
+    message.header.timestamp = 1700000000
+    for entity_id, route_id in (("A1_1", "A1_52"), ("A2_2", "A2_179")):
+        entity = message.entity.add(id=entity_id)
+        entity.vehicle.trip.route_id = route_id
+    data = message.SerializeToString()
+    path = tmp_path / source_slug / "vehiclepositions" / RAW_VEHICLE_POSITIONS_FILENAME
+    _prepare_file(path, data)
+
+    client = TestClient(create_app(tmp_path, source_slug))
+    # Route partitions are only served once they have been written.
+    assert client.get("/api/v1/raw-vehicle-positions/routes/A1_52").status_code == 404
+
+    write_partitions(data, path, routes=True)
+
+    for url, expected in (
+        ("/api/v1/raw-vehicle-positions/agencies/A1", ["A1_1"]),
+        ("/api/v1/raw-vehicle-positions/routes/A2_179", ["A2_2"]),
+        ("/api/v1/raw-vehicle-positions/agencies/A5", []),
+    ):
+        response = client.get(url)
+        assert response.status_code == 200
+        partition = gtfs_realtime_pb2.FeedMessage()
+        partition.ParseFromString(response.content)
+        assert partition.header.timestamp == 1700000000
+        assert [entity.id for entity in partition.entity] == expected
+
+    assert client.get("/api/v1/raw-trip-updates/agencies/A1").status_code == 404
+
+
 def test_missing_file_returns_404(tmp_path: Path) -> None:
     source_slug = "krakow-gtfs"
     app = create_app(tmp_path, source_slug)
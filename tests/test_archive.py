@@ -0,0 +1,116 @@
+from __future__ import annotations
+
+import io
+import os
+import zipfile
+from pathlib import Path
+
+import pytest
+
+from delai.processors import archive
+from delai.processors.archive import (
+    ArchiveExtractionError,
+    BundleCompression,
+    checksum_path,
+    extract_zip,
+    publish_zip,
+    read_checksum,
+    write_zip,
+)
+
+
+def _write_archive(path: Path, members: dict[str, str]) -> Path:
+    with zipfile.ZipFile(path, "w") as archive:
+        for name, payload in members.items():
+            archive.writestr(name, payload)
+    return path
+
+
+def test_extract_zip_skips_unchanged_members(tmp_path: Path) -> None:
+    archive = _write_archive(
+        tmp_path / "feed.zip",
+        {"stops.txt": "stop_id\ns1\n", "nested/trips.txt": "trip_id\nt1\n"},
+    )
+
+    destination = extract_zip(archive, workers=2)
+
+    assert destination == tmp_path / "feed"
+    assert (destination / "stops.txt").read_text() == "stop_id\ns1\n"
+    assert (destination / "nested" / "trips.txt").read_text() == "trip_id\nt1\n"
+    stops_mtime = (destination / "stops.txt").stat().st_mtime_ns
+    trips_inode = (destination / "nested" / "trips.txt").stat().st_ino
+
+    _write_archive(archive, {"stops.txt": "stop_id\ns1\n", "nested/trips.txt": "trip_id\nt2\n"})
+    extract_zip(archive)
+
+    assert (destination / "stops.txt").stat().st_mtime_ns == stops_mtime
+    assert (destination / "nested" / "trips.txt").read_text() == "trip_id\nt2\n"
+    assert (destination / "nested" / "trips.txt").stat().st_ino != trips_inode
+
+
+def test_extract_zip_replaces_modified_files(tmp_path: Path) -> None:
+    archive = _write_archive(tmp_path / "feed.zip", {"stops.txt": "stop_id\ns1\n"})
+    destination = extract_zip(archive)
+
+    (destination / "stops.txt").write_text("stop_id\nxx\n")
+    extract_zip(archive)
+
+    assert (destination / "stops.txt").read_text() == "stop_id\ns1\n"
+
+
+def test_extract_zip_rejects_path_traversal(tmp_path: Path) -> None:
+    archive = _write_archive(tmp_path / "feed.zip", {"../escape.txt": "nope"})
+
+    with pytest.raises(ArchiveExtractionError):
+        extract_zip(archive)
+
+    assert not (tmp_path / "escape.txt").exists()
+
+
+def _members() -> list[tuple[str, archive.MemberWriter]]:
+    rows = b"".join(
+        b"A1_t%d,A1_s%d,08:%02d:00\n" % (index, index % 40, index % 60) for index in range(5000)
+    )
+    return [
+        ("stops.txt", lambda: b"stop_id,stop_name\nA1_s1,Rondo Mogilskie\n"),
+        ("stop_times.txt", lambda: iter([b"trip_id,stop_id,arrival_time\n", rows])),
+    ]
+
+
+def test_write_zip_parallel_path_is_supported() -> None:
+    # Fails on a Python release whose zipfile internals the parallel writer does not know.
+    with zipfile.ZipFile(io.BytesIO(), "w") as probe:
+        assert archive._supports_precompressed_entries(probe)
+
+
+def test_write_zip_serial_fallback_matches_parallel_output(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    compression = BundleCompression(method="deflate", level=1, workers=2)
+    parallel = write_zip(tmp_path / "parallel.zip", _members(), compression)
+
+    monkeypatch.setattr(archive, "_LEVEL_ATTRIBUTE", None)
+    serial = write_zip(tmp_path / "serial.zip", _members(), compression)
+
+    with zipfile.ZipFile(parallel) as first, zipfile.ZipFile(serial) as second:
+        assert first.namelist() == second.namelist() == ["stops.txt", "stop_times.txt"]
+        for name in first.namelist():
+            assert first.read(name) == second.read(name)
+            assert first.getinfo(name).compress_size == second.getinfo(name).compress_size
+            assert first.getinfo(name).date_time == (1980, 1, 1, 0, 0, 0)
+
+
+def test_publish_zip_keeps_identical_archive_and_sidecar(tmp_path: Path) -> None:
+    destination = tmp_path / "GTFS.zip"
+    digest = publish_zip(destination, _members())
+    sidecar = checksum_path(destination)
+    for path in (destination, sidecar):
+        os.utime(path, ns=(1_000_000_000, 1_000_000_000))
+
+    assert publish_zip(destination, _members()) == digest
+    assert destination.stat().st_mtime_ns == sidecar.stat().st_mtime_ns == 1_000_000_000
+
+    sidecar.unlink()
+    assert publish_zip(destination, _members()) == digest
+    assert read_checksum(destination) == digest
+    assert destination.stat().st_mtime_ns == 1_000_000_000
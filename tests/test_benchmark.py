@@ -0,0 +1,44 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+from google.transit import gtfs_realtime_pb2
+
+from delai.benchmark import discover_feeds, main, run_benchmarks
+from delai.processors import protobuf_backend
+
+
+def _write_trip_updates(path: Path, count: int) -> Path:
+    message = gtfs_realtime_pb2.FeedMessage()
+    message.header.gtfs_realtime_version = "2.0"
+    message.header.timestamp = 100
+    for index in range(count):
+        entity = message.entity.add()
+        entity.id = f"entity_{index}"
+        entity.trip_update.trip.trip_id = f"trip_{index}"
+        entity.trip_update.stop_time_update.add().stop_id = "stop"
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(message.SerializeToString())
+    return path
+
+
+def test_discover_feeds_groups_by_kind(tmp_path: Path) -> None:
+    first = _write_trip_updates(tmp_path / "tripupdates" / "TripUpdates_A.pb", 1)
+    second = _write_trip_updates(tmp_path / "tripupdates" / "TripUpdates_T.pb", 1)
+    _write_trip_updates(tmp_path / "RawTripUpdates.pb", 1)
+
+    assert discover_feeds([tmp_path]) == {"TripUpdates": [first, second]}
+
+
+def test_run_benchmarks_covers_every_stage(tmp_path: Path, capsys) -> None:
+    _write_trip_updates(tmp_path / "TripUpdates_A.pb", 3)
+    _write_trip_updates(tmp_path / "TripUpdates_M.pb", 2)
+
+    results = run_benchmarks([tmp_path], repeat=2)
+
+    assert [result.stage for result in results] == ["parse", "merge", "serialize", "to_dict"]
+    assert all(result.kind == "TripUpdates" and result.entities == 5 for result in results)
+    assert all(0 <= result.best <= result.median for result in results)
+
+    assert main([str(tmp_path), "--repeat", "1"]) == 0
+    assert f"protobuf backend: {protobuf_backend()}" in capsys.readouterr().out
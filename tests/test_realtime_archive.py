@@ -0,0 +1,77 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+from google.transit import gtfs_realtime_pb2
+
+from delai.processors.realtime_archive import HistorySettings, RealtimeArchive
+
+
+def _feed(timestamp: int, delay: int = 0) -> bytes:
+    message = gtfs_realtime_pb2.FeedMessage()
+    message.header.gtfs_realtime_version = "2.0"
+    message.header.timestamp = timestamp
+    entity = message.entity.add()
+    entity.id = "A1_t1"
+    entity.trip_update.trip.trip_id = "A1_t1"
+    entity.trip_update.delay = delay
+    return message.SerializeToString()
+
+
+def test_archive_appends_snapshots_by_header_timestamp(tmp_path: Path) -> None:
+    archive = RealtimeArchive(tmp_path / "history", HistorySettings(segment_seconds=100))
+
+    assert archive.append(_feed(1000, 10))
+    assert archive.append(_feed(1015, 20))
+    assert not archive.append(_feed(1015, 30))
+    assert not archive.append(_feed(990, 40))
+
+    latest = archive.latest()
+    assert latest is not None
+    assert latest.timestamp == 1015
+    assert latest.data == _feed(1015, 20)
+
+    reopened = RealtimeArchive(tmp_path / "history", HistorySettings(segment_seconds=100))
+    assert not reopened.append(_feed(1015))
+    assert reopened.append(_feed(1030))
+
+
+def test_archive_reads_ranges_across_segments(tmp_path: Path) -> None:
+    archive = RealtimeArchive(tmp_path, HistorySettings(segment_seconds=60))
+    for timestamp in range(600, 900, 15):
+        archive.append(_feed(timestamp, timestamp))
+
+    assert archive.segments() == [600, 660, 720, 780, 840]
+    assert archive.timestamps(650, 730) == [660, 675, 690, 705, 720]
+
+    snapshots = list(archive.iter_range(645, 690))
+    assert [snapshot.timestamp for snapshot in snapshots] == [645, 660, 675]
+    assert [snapshot.data for snapshot in snapshots] == [
+        _feed(645, 645),
+        _feed(660, 660),
+        _feed(675, 675),
+    ]
+    assert list(archive.iter_range(1000, 2000)) == []
+
+
+def test_archive_ignores_partial_index_entries(tmp_path: Path) -> None:
+    archive = RealtimeArchive(tmp_path, HistorySettings(segment_seconds=60))
+    archive.append(_feed(10))
+    with (tmp_path / "0.idx").open("ab") as handle:
+        handle.write(b"\x01\x02\x03")
+
+    assert archive.timestamps(0, 60) == [10]
+
+
+def test_archive_prunes_expired_segments_on_rotation(tmp_path: Path) -> None:
+    settings = HistorySettings(retention_days=1, segment_seconds=3600)
+    archive = RealtimeArchive(tmp_path, settings)
+    archive.append(_feed(1800))
+    archive.append(_feed(3600 + 1800))
+
+    archive.append(_feed(86400 + 5400))
+    assert archive.segments() == [3600, 90000]
+
+    assert archive.prune(now=86400 + 7200) == [3600]
+    assert archive.segments() == [90000]
+    assert not (tmp_path / "3600.pbz").exists()
@@ -0,0 +1,98 @@
+from __future__ import annotations
+
+import json
+from pathlib import Path
+
+import pytest
+from google.transit import gtfs_realtime_pb2
+
+from delai.processors.realtime_delays import (
+    DelaySettings,
+    DelayStatistics,
+    DelayStatisticsError,
+    load_delay_statistics,
+)
+
+# 2023-11-14 23:13:20 in Kraków.
+TIMESTAMP = 1700000000
+
+
+def _feed(timestamp: int, trips: list[tuple[str, str, int]]) -> gtfs_realtime_pb2.FeedMessage:
+    message = gtfs_realtime_pb2.FeedMessage()
+    message.header.gtfs_realtime_version = "2.0"
+    message.header.timestamp = timestamp
+    for index, (route_id, stop_id, delay) in enumerate(trips):
+        entity = message.entity.add()
+        entity.id = f"A1_t{index}"
+        entity.trip_update.trip.trip_id = entity.id
+        entity.trip_update.trip.route_id = route_id
+        update = entity.trip_update.stop_time_update.add()
+        update.stop_id = stop_id
+        update.arrival.delay = delay
+        # Later stops are predictions, not observations.
+        entity.trip_update.stop_time_update.add(stop_id="A1_far").arrival.delay = 3000
+    return message
+
+
+def test_statistics_aggregate_next_stop_delays() -> None:
+    statistics = DelayStatistics()
+    observed = statistics.update(
+        _feed(
+            TIMESTAMP,
+            [
+                ("A1_52", "A1_s1", 0),
+                ("A1_52", "A1_s2", 120),
+                ("A1_52", "A1_s1", 600),
+                ("A1_4", "A1_s1", -90),
+            ],
+        )
+    )
+
+    assert observed == 4
+    routes = statistics.summary("route")
+    assert sorted(routes) == ["A1_4", "A1_52"]
+    tram = routes["A1_52"]
+    assert tram.observations == 3
+    assert tram.mean == 240
+    assert tram.on_time_share == pytest.approx(2 / 3)
+    assert 90 <= tram.p50 <= 150
+    assert 570 <= tram.p90 <= 630
+
+    stops = statistics.summary("stop")
+    assert "A1_far" not in stops
+    assert stops["A1_s1"].observations == 3
+    assert list(statistics.summary("hour")) == ["23"]
+
+
+def test_statistics_fade_older_observations() -> None:
+    statistics = DelayStatistics(DelaySettings(half_life_minutes=10))
+    statistics.update(_feed(TIMESTAMP, [("A1_52", "A1_s1", 600)]))
+    assert statistics.update(_feed(TIMESTAMP, [("A1_52", "A1_s1", 0)])) == 0
+
+    statistics.update(_feed(TIMESTAMP + 600, [("A1_52", "A1_s1", 0)]))
+    tram = statistics.summary("route")["A1_52"]
+    assert tram.observations == pytest.approx(1.5)
+    assert tram.mean == pytest.approx(200)
+
+    # After many half-lives the weights are rebased instead of overflowing.
+    statistics.update(_feed(TIMESTAMP + 600 * 70, [("A1_52", "A1_s1", 30)]))
+    tram = statistics.summary("route")["A1_52"]
+    assert tram.observations == pytest.approx(1.0)
+    assert tram.mean == pytest.approx(30)
+
+
+def test_statistics_round_trip(tmp_path: Path) -> None:
+    statistics = DelayStatistics()
+    statistics.update(_feed(TIMESTAMP, [("A1_52", "A1_s1", 45), ("A1_4", "A1_s2", 400)]))
+    path = tmp_path / "RawTripUpdates-delays.json"
+    path.write_text(json.dumps(statistics.to_payload()), encoding="utf-8")
+
+    restored = load_delay_statistics(path)
+    assert restored.settings == statistics.settings
+    assert restored.timestamp == TIMESTAMP
+    for dimension in ("route", "stop", "hour"):
+        assert restored.summary(dimension) == statistics.summary(dimension)
+
+    path.write_text("{}", encoding="utf-8")
+    with pytest.raises(DelayStatisticsError):
+        load_delay_statistics(path)
@@ -0,0 +1,39 @@
+from __future__ import annotations
+
+from google.transit import gtfs_realtime_pb2
+
+from delai.processors.realtime_index import build_realtime_index
+
+
+def test_trip_updates_are_indexed_by_every_key() -> None:
+    feed = gtfs_realtime_pb2.FeedMessage()
+    feed.header.gtfs_realtime_version = "2.0"
+    feed.header.timestamp = 42
+    for trip_id, route_id, stops in (
+        ("A1_t1", "A1_r1", ["A1_s1", "A1_s2"]),
+        ("A1_t2", "A1_r1", ["A1_s2", "A1_s3"]),
+        ("A3_t3", "A3_r9", ["A3_s1"]),
+    ):
+        entity = feed.entity.add()
+        entity.id = trip_id
+        entity.trip_update.trip.trip_id = trip_id
+        entity.trip_update.trip.route_id = route_id
+        entity.trip_update.vehicle.id = f"{trip_id}_vehicle"
+        for stop_id in stops:
+            entity.trip_update.stop_time_update.add().stop_id = stop_id
+
+    index = build_realtime_index(feed)
+
+    def ids(**filters: str) -> list[str]:
+        return [entity.id for entity in index.lookup(filters)]
+
+    assert ids(route_id="A1_r1") == ["A1_t1", "A1_t2"]
+    assert ids(stop_id="A1_s2") == ["A1_t1", "A1_t2"]
+    assert ids(stop_id="A1_s2", trip_id="A1_t2") == ["A1_t2"]
+    assert ids(vehicle_id="A3_t3_vehicle") == ["A3_t3"]
+    assert ids(route_id="A1_r1", stop_id="A3_s1") == []
+    assert ids() == []
+
+    payload = index.to_payload(index.lookup({"trip_id": "A3_t3"}))
+    assert payload["timestamp"] == 42
+    assert payload["entities"][0]["trip_update"]["stop_time_update"] == [{"stop_id": "A3_s1"}]
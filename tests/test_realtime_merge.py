@@ -11,7 +11,14 @@ from delai.processors.realtime_merge import (
     consolidate_service_alerts,
     consolidate_trip_updates,
     consolidate_vehicle_positions,
+    inputs_path,
+    merge_trip_updates,
+    merged_feed,
+    splice_combined_feed,
+    splice_trip_updates,
 )
+from delai.processors.realtime import FeedView, feed_to_dict, parse_feed
+from delai.processors.realtime_wire import HEADER_FIELD, iter_entities, strip_field
 
 
 def _build_service_alert(path: Path, agency_value: str | None, entity_id: str, timestamp: int) -> Path:
@@ -338,4 +345,167 @@ def test_consolidate_vehicle_positions(tmp_path: Path) -> None:
         if original_route_id is not None:
             assert vehicle.trip.route_id == f"{prefix}{original_route_id}"
         else:
-            assert not vehicle.trip.route_id
\ No newline at end of file
+            assert not vehicle.trip.route_id
+
+
+def test_merge_uses_preparsed_feeds(tmp_path: Path) -> None:
+    path = _build_trip_update(
+        tmp_path / "TripUpdates_A.pb",
+        entity_id="entity_a",
+        trip_id="trip_a",
+        route_id="route_a",
+        stop_ids=["stop_a1"],
+        vehicle_id="vehicle_a",
+        timestamp=50,
+    )
+    feed = gtfs_realtime_pb2.FeedMessage()
+    feed.ParseFromString(path.read_bytes())
+    path.unlink()
+
+    merged = merge_trip_updates([TripUpdateInput(path=path, agency_id="A1", feed=feed)])
+
+    assert merged.header.timestamp == 50
+    assert merged.entity[0].trip_update.trip.trip_id == "A1_trip_a"
+
+
+def test_splice_keeps_prefixed_entities_verbatim(tmp_path: Path) -> None:
+    path = _build_trip_update(
+        tmp_path / "TripUpdates_A.pb",
+        entity_id="A1_entity_a",
+        trip_id="A1_trip_a",
+        route_id="A1_route_a",
+        stop_ids=["A1_stop_a1", "A1_stop_a2"],
+        vehicle_id="A1_vehicle_a",
+        timestamp=60,
+    )
+    original = path.read_bytes()
+    other = _build_trip_update(
+        tmp_path / "TripUpdates_M.pb",
+        entity_id="entity_m",
+        trip_id="trip_m",
+        route_id=None,
+        stop_ids=["stop_m1"],
+        vehicle_id="vehicle_m",
+        timestamp=70,
+    )
+
+    spliced = splice_trip_updates(
+        [TripUpdateInput(path=path, agency_id="A1"), TripUpdateInput(path=other, agency_id="A2")]
+    )
+
+    body = b"".join(strip_field(original, HEADER_FIELD))
+    assert body in spliced
+
+    merged = gtfs_realtime_pb2.FeedMessage()
+    merged.ParseFromString(spliced)
+    assert merged.header.timestamp == 70
+    assert [entity.id for entity in merged.entity] == ["A1_entity_a", "A2_entity_m"]
+    assert merged.entity[1].trip_update.stop_time_update[0].stop_id == "A2_stop_m1"
+
+    # Byte-for-byte what a full decode, copy and re-encode would produce.
+    expected = gtfs_realtime_pb2.FeedMessage()
+    expected.header.CopyFrom(merged.header)
+    expected.entity.extend(merged.entity)
+    assert spliced == expected.SerializeToString()
+
+
+def test_splice_rewrites_only_unprefixed_entities(tmp_path: Path) -> None:
+    message = gtfs_realtime_pb2.FeedMessage()
+    message.header.gtfs_realtime_version = "2.0"
+    message.header.timestamp = 80
+    for entity_id in ("A1_kept", "renamed"):
+        entity = message.entity.add()
+        entity.id = entity_id
+        entity.trip_update.trip.trip_id = entity_id
+    path = tmp_path / "TripUpdates_A.pb"
+    path.write_bytes(message.SerializeToString())
+    kept = bytes(next(iter_entities(path.read_bytes()))[1])
+
+    feed = parse_feed(path.read_bytes())
+    inputs = [TripUpdateInput(path=path, agency_id="A1", feed=feed)]
+    spliced = splice_trip_updates(inputs)
+
+    assert kept in spliced
+    view = merged_feed(inputs, spliced)
+    assert isinstance(view, FeedView)
+    assert [entity.id for entity in view.entity] == ["A1_kept", "A1_renamed"]
+    assert view.entity[1] is feed.entity[1]
+    assert feed_to_dict(view) == feed_to_dict(parse_feed(spliced))
+
+
+def test_consolidate_skips_unchanged_inputs(tmp_path: Path) -> None:
+    def build(timestamp: int) -> list[VehiclePositionInput]:
+        path = _build_vehicle_position(
+            tmp_path / "VehiclePositions_A.pb",
+            entity_id="entity_a",
+            stop_id="stop_a",
+            trip_id="trip_a",
+            vehicle_id="veh_a",
+            route_id=None,
+            timestamp=timestamp,
+        )
+        return [VehiclePositionInput(path=path, agency_id="A1")]
+
+    output_path = tmp_path / "VehiclePositions.pb"
+    consolidate_vehicle_positions(build(100), output_path)
+    assert inputs_path(output_path).exists()
+
+    # A republished snapshot leaves the output alone.
+    output_path.write_bytes(b"sentinel")
+    consolidate_vehicle_positions(build(100), output_path)
+    assert output_path.read_bytes() == b"sentinel"
+
+    consolidate_vehicle_positions(build(115), output_path)
+    merged = gtfs_realtime_pb2.FeedMessage()
+    merged.ParseFromString(output_path.read_bytes())
+    assert merged.header.timestamp == 115
+
+    # Feeds without a header timestamp cannot be compared and are always merged.
+    consolidate_vehicle_positions(build(0), output_path)
+    output_path.write_bytes(b"sentinel")
+    consolidate_vehicle_positions(build(0), output_path)
+    assert output_path.read_bytes() != b"sentinel"
+
+
+def test_splice_combined_feed_keeps_ids_unique() -> None:
+    trips = gtfs_realtime_pb2.FeedMessage()
+    trips.header.gtfs_realtime_version = "2.0"
+    trips.header.timestamp = 100
+    trip = trips.entity.add(id="A1_1")
+    trip.trip_update.trip.trip_id = "A1_trip"
+    trip.trip_update.delay = 30
+
+    vehicles = gtfs_realtime_pb2.FeedMessage()
+    vehicles.header.gtfs_realtime_version = "2.0"
+    vehicles.header.timestamp = 110
+    vehicle = vehicles.entity.add(id="A1_1")
+    vehicle.vehicle.vehicle.id = "A1_HY101"
+    vehicles.entity.add(id="A1_2").vehicle.vehicle.id = "A1_HY102"
+
+    alerts = gtfs_realtime_pb2.FeedMessage()
+    alerts.header.gtfs_realtime_version = "2.0"
+    alerts.header.timestamp = 90
+    alerts.entity.add(id="A1_alert").alert.informed_entity.add(agency_id="A1")
+
+    combined = gtfs_realtime_pb2.FeedMessage()
+    combined.ParseFromString(
+        splice_combined_feed(
+            {
+                "trip_update": trips.SerializeToString(),
+                "vehicle": vehicles.SerializeToString(),
+                "alert": alerts.SerializeToString(),
+            }
+        )
+    )
+
+    assert combined.header.timestamp == 110
+    assert combined.header.incrementality == gtfs_realtime_pb2.FeedHeader.FULL_DATASET
+    assert [entity.id for entity in combined.entity] == [
+        "A1_1",
+        "A1_1-vehicle",
+        "A1_2",
+        "A1_alert",
+    ]
+    assert combined.entity[0].trip_update.delay == 30
+    assert combined.entity[1].vehicle.vehicle.id == "A1_HY101"
+    assert combined.entity[3].alert.informed_entity[0].agency_id == "A1"
@@ -0,0 +1,98 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+from google.transit import gtfs_realtime_pb2
+
+from delai.processors.realtime_partition import (
+    empty_partition,
+    partition_feed,
+    partition_path,
+    write_partitions,
+)
+
+
+def _feed(vehicles: list[tuple[str, str]]) -> bytes:
+    message = gtfs_realtime_pb2.FeedMessage()
+    message.header.gtfs_realtime_version = "2.0"
+    message.header.timestamp = 1700000000
+    for entity_id, route_id in vehicles:
+        entity = message.entity.add(id=entity_id)
+        entity.vehicle.vehicle.id = f"{entity_id}_vehicle"
+        entity.vehicle.position.latitude = 50.06
+        entity.vehicle.position.longitude = 19.94
+        if route_id:
+            entity.vehicle.trip.trip_id = f"{entity_id}_trip"
+            entity.vehicle.trip.route_id = route_id
+    return message.SerializeToString()
+
+
+def _parse(data: bytes) -> gtfs_realtime_pb2.FeedMessage:
+    message = gtfs_realtime_pb2.FeedMessage()
+    message.ParseFromString(data)
+    return message
+
+
+def test_partition_feed_groups_by_agency_and_route() -> None:
+    data = _feed(
+        [
+            ("A1_1", "A1_52"),
+            ("A1_2", "A1_4"),
+            ("A2_3", "A2_179"),
+            ("A1_4", "A1_52"),
+            ("A3_5", ""),
+        ]
+    )
+
+    partitions = partition_feed(data, routes=True)
+
+    assert partitions.header.timestamp == 1700000000
+    assert {key: len(bodies) for key, bodies in partitions.agencies.items()} == {
+        "A1": 3,
+        "A2": 1,
+        "A3": 1,
+    }
+    assert {key: len(bodies) for key, bodies in partitions.routes.items()} == {
+        "A1_52": 2,
+        "A1_4": 1,
+        "A2_179": 1,
+    }
+    assert partition_feed(data).routes == {}
+
+
+def test_partition_route_ids_from_trip_updates() -> None:
+    message = gtfs_realtime_pb2.FeedMessage()
+    message.header.gtfs_realtime_version = "2.0"
+    entity = message.entity.add(id="A1_t1")
+    entity.trip_update.trip.trip_id = "A1_trip"
+    entity.trip_update.trip.route_id = "A1_52"
+    entity.trip_update.stop_time_update.add(stop_id="A1_stop").arrival.delay = 60
+
+    partitions = partition_feed(message.SerializeToString(), routes=True)
+
+    assert list(partitions.routes) == ["A1_52"]
+
+
+def test_write_partitions_replaces_stale_feeds(tmp_path: Path) -> None:
+    feed_path = tmp_path / "RawVehiclePositions.pb"
+    data = _feed([("A1_1", "A1_52"), ("A2_3", "A2/179")])
+
+    written = write_partitions(data, feed_path, routes=True)
+
+    assert partition_path(tmp_path / "routes", "A2/179") in written
+    tram = _parse(partition_path(tmp_path / "routes", "A1_52").read_bytes())
+    assert tram.header.timestamp == 1700000000
+    assert [entity.id for entity in tram.entity] == ["A1_1"]
+    assert tram.entity[0] == _parse(data).entity[0]
+
+    write_partitions(_feed([("A1_2", "A1_4")]), feed_path, routes=True)
+
+    assert sorted(path.name for path in (tmp_path / "agencies").iterdir()) == ["A1.pb"]
+    assert sorted(path.name for path in (tmp_path / "routes").iterdir()) == ["A1_4.pb"]
+
+
+def test_empty_partition_keeps_header() -> None:
+    empty = _parse(empty_partition(_feed([("A1_1", "A1_52")])))
+
+    assert empty.header.timestamp == 1700000000
+    assert len(empty.entity) == 0
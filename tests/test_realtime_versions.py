@@ -0,0 +1,79 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+from google.transit import gtfs_realtime_pb2
+
+from delai.processors.realtime_versions import (
+    build_differential_feed,
+    load_feed_versions,
+    record_feed_version,
+    versions_path,
+)
+
+
+def _feed(delays: dict[str, int], timestamp: int) -> bytes:
+    message = gtfs_realtime_pb2.FeedMessage()
+    message.header.gtfs_realtime_version = "2.0"
+    message.header.timestamp = timestamp
+    for trip_id, delay in delays.items():
+        entity = message.entity.add()
+        entity.id = trip_id
+        entity.trip_update.trip.trip_id = trip_id
+        entity.trip_update.delay = delay
+    return message.SerializeToString()
+
+
+def _publish(path: Path, delays: dict[str, int], timestamp: int) -> bytes:
+    data = _feed(delays, timestamp)
+    path.write_bytes(data)
+    record_feed_version(data, path)
+    return data
+
+
+def test_versions_track_entity_changes(tmp_path: Path) -> None:
+    path = tmp_path / "RawTripUpdates.pb"
+    _publish(path, {"A1_t1": 0, "A1_t2": 60}, 100)
+    _publish(path, {"A1_t1": 0, "A1_t2": 60}, 115)
+    _publish(path, {"A1_t1": 30, "A1_t3": 0}, 130)
+
+    versions = load_feed_versions(path)
+    # The republished snapshot did not create a version.
+    assert versions.version == 2
+    assert versions.changes_since(1) == ({"A1_t1", "A1_t3"}, {"A1_t2"})
+    assert versions.changes_since(2) == (set(), set())
+    assert versions.changes_since(3) is None
+
+
+def test_differential_feed_contains_changes_and_tombstones(tmp_path: Path) -> None:
+    path = tmp_path / "RawTripUpdates.pb"
+    _publish(path, {"A1_t1": 0, "A1_t2": 60, "A1_t4": 0}, 100)
+    data = _publish(path, {"A1_t1": 30, "A1_t3": 0, "A1_t4": 0}, 130)
+
+    differential = build_differential_feed(data, load_feed_versions(path), since=1)
+    assert differential is not None and len(differential) < len(data)
+
+    message = gtfs_realtime_pb2.FeedMessage()
+    message.ParseFromString(differential)
+    assert message.header.incrementality == gtfs_realtime_pb2.FeedHeader.DIFFERENTIAL
+    assert message.header.timestamp == 130
+    entities = {entity.id: entity for entity in message.entity}
+    assert set(entities) == {"A1_t1", "A1_t2", "A1_t3"}
+    assert entities["A1_t1"].trip_update.delay == 30
+    assert entities["A1_t2"].is_deleted
+
+
+def test_history_is_bounded(tmp_path: Path) -> None:
+    path = tmp_path / "RawTripUpdates.pb"
+    data = b""
+    for tick in range(5):
+        data = _feed({"A1_t1": tick}, 100 + tick)
+        path.write_bytes(data)
+        record_feed_version(data, path, history_length=2)
+
+    versions = load_feed_versions(path)
+    assert versions.version == 5
+    assert [change.version for change in versions.history] == [4, 5]
+    assert versions.changes_since(3) == ({"A1_t1"}, set())
+    assert build_differential_feed(data, versions, since=2) is None
+    assert versions_path(path).name == "RawTripUpdates.pb.versions.json"
@@ -186,6 +186,57 @@ def test_service_converts_realtime_feeds(tmp_path: Path) -> None:
     assert data["entity"][0]["vehicle"]["vehicle"]["id"] == "vehicle-1"
 
 
+class CombinedRealtimeSource(DataSource):
+    def __init__(self) -> None:
+        super().__init__(name="realtime", slug="realtime")
+        self._targets = [
+            DownloadTarget(
+                relative_path=Path("tripupdates") / "TripUpdates_A.pb",
+                url="https://example.com/TripUpdates_A.pb",
+            ),
+            DownloadTarget(
+                relative_path=Path("vehiclepositions") / "VehiclePositions_A.pb",
+                url="https://example.com/VehiclePositions_A.pb",
+            ),
+        ]
+
+    def iter_targets(self) -> Iterable[DownloadTarget]:
+        return list(self._targets)
+
+
+def _realtime_payload(timestamp: int, *, trip_delay: int | None = None) -> bytes:
+    feed = gtfs_realtime_pb2.FeedMessage()
+    feed.header.gtfs_realtime_version = "2.0"
+    feed.header.timestamp = timestamp
+    entity = feed.entity.add(id="1")
+    if trip_delay is None:
+        entity.vehicle.vehicle.id = "HY101"
+    else:
+        entity.trip_update.trip.trip_id = "trip-1"
+        entity.trip_update.delay = trip_delay
+    return feed.SerializeToString()
+
+
+def test_combined_feed_keeps_kinds_that_fail_to_consolidate(tmp_path: Path) -> None:
+    source = CombinedRealtimeSource()
+    trips_url, vehicles_url = (target.url for target in source.iter_targets())
+    payloads = {
+        trips_url: _realtime_payload(100, trip_delay=30),
+        vehicles_url: _realtime_payload(100),
+    }
+    service = DownloadService([source], tmp_path, session_factory=DummySessionFactory(payloads))
+    service.run()
+
+    payloads[trips_url] = _realtime_payload(115, trip_delay=90)
+    payloads[vehicles_url] = b"not a protobuf"
+    service.run()
+
+    combined = gtfs_realtime_pb2.FeedMessage()
+    combined.ParseFromString((tmp_path / "realtime" / "realtime" / "RawRealtime.pb").read_bytes())
+    assert combined.entity[0].trip_update.delay == 90
+    assert [entity.vehicle.vehicle.id for entity in combined.entity[1:]] == ["A1_HY101"]
+
+
 class StaticZipSource(DataSource):
     def __init__(self) -> None:
         super().__init__(name="static", slug="static")
@@ -262,3 +313,40 @@ def test_service_cleans_intermediate_files_by_default(tmp_path: Path) -> None:
     assert consolidated_zip.exists()
     assert not original_zip.exists()
     assert not extracted_dir.exists()
+
+
+class StaticFeedSource(DataSource):
+    def __init__(self) -> None:
+        super().__init__(name="static", slug="static")
+        self._targets = [
+            DownloadTarget(
+                relative_path=Path("static") / "GTFS_KRK_T.zip",
+                url="https://example.com/GTFS_KRK_T.zip",
+            )
+        ]
+
+    def iter_targets(self) -> Iterable[DownloadTarget]:
+        return list(self._targets)
+
+
+def test_service_diffs_consecutive_static_bundles(tmp_path: Path) -> None:
+    source = StaticFeedSource()
+    url = source.iter_targets()[0].url
+
+    for stop_name in ("Stop A", "Stop B"):
+        buffer = io.BytesIO()
+        with zipfile.ZipFile(buffer, mode="w") as zip_file:
+            zip_file.writestr("stops.txt", f"stop_id,stop_name\n1,{stop_name}\n")
+
+        service = DownloadService(
+            sources=[source],
+            output_dir=tmp_path,
+            session_factory=DummySessionFactory({url: buffer.getvalue()}),
+        )
+        service.run()
+
+    static_dir = tmp_path / "static" / "static"
+    assert (static_dir / "GTFS.previous.zip").exists()
+
+    diff = json.loads((static_dir / "GTFS-diff.json").read_text(encoding="utf-8"))
+    assert diff["summary"]["stops"]["modified"] == ["A3_1"]
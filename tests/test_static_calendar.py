@@ -0,0 +1,81 @@
+from __future__ import annotations
+
+import zipfile
+from datetime import date
+from pathlib import Path
+
+from delai.processors.static_calendar import (
+    build_service_calendar,
+    expand_service_days,
+    load_service_calendar,
+    write_service_calendar,
+)
+
+
+def _write_bundle(path: Path) -> Path:
+    with zipfile.ZipFile(path, "w") as archive:
+        archive.writestr(
+            "calendar.txt",
+            "service_id,monday,tuesday,wednesday,thursday,friday,saturday,sunday,start_date,end_date\n"
+            "A1_weekday,1,1,1,1,1,0,0,20261001,20261031\n"
+            "A3_weekend,0,0,0,0,0,1,1,20261001,20261031\n",
+        )
+        archive.writestr(
+            "calendar_dates.txt",
+            "service_id,date,exception_type\n"
+            "A1_weekday,20261014,2\n"
+            "A3_weekend,20261014,1\n"
+            "A3_extra,20261105,1\n",
+        )
+        archive.writestr(
+            "trips.txt",
+            "route_id,service_id,trip_id\n"
+            "A1_r1,A1_weekday,A1_t1\n"
+            "A1_r1,A1_weekday,A1_t2\n"
+            "A3_r2,A3_weekend,A3_t3\n",
+        )
+    return path
+
+
+def test_service_calendar_expands_weekly_patterns_and_exceptions(tmp_path: Path) -> None:
+    calendar = build_service_calendar(_write_bundle(tmp_path / "GTFS.zip"))
+
+    assert calendar.start_date == date(2026, 10, 1)
+    assert calendar.days == 36
+
+    assert calendar.active_services(date(2026, 10, 13)) == ["A1_weekday"]
+    assert calendar.active_services(date(2026, 10, 17)) == ["A3_weekend"]
+    assert calendar.active_services(date(2026, 10, 14)) == ["A3_weekend"]
+    assert calendar.active_services(date(2026, 11, 5)) == ["A3_extra"]
+    assert calendar.active_services(date(2026, 11, 6)) == []
+    assert calendar.active_services(date(2025, 1, 1)) == []
+
+    assert calendar.is_active("A1_weekday", date(2026, 10, 30))
+    assert not calendar.is_active("A1_weekday", date(2026, 10, 31))
+    assert calendar.active_trips(date(2026, 10, 15)) == ["A1_t1", "A1_t2"]
+
+
+def test_service_calendar_round_trips_through_json(tmp_path: Path) -> None:
+    bundle = _write_bundle(tmp_path / "GTFS.zip")
+
+    index_path = write_service_calendar(bundle)
+
+    assert index_path == tmp_path / "GTFS-calendar.json"
+    assert load_service_calendar(index_path) == build_service_calendar(bundle)
+
+
+def test_service_calendar_skips_tables_missing_columns() -> None:
+    calendar = expand_service_days(
+        [
+            ["service_id", "monday", "start_date", "end_date"],
+            ["A1_weekday", "1", "20261001", "20261031"],
+        ],
+        [
+            ["service_id", "date", "exception_type"],
+            ["A3_extra", "20261105", "1"],
+            ["A3_short", "20261106"],
+        ],
+    )
+
+    assert calendar.services == {"A3_extra": 1}
+    assert calendar.start_date == date(2026, 11, 5)
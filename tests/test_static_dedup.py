@@ -0,0 +1,55 @@
+from __future__ import annotations
+
+from delai.processors.static_dedup import (
+    canonical_shapes,
+    shape_fingerprints,
+    stop_pattern_fingerprints,
+)
+
+SHAPE_HEADER = ["shape_id", "shape_pt_lat", "shape_pt_lon", "shape_pt_sequence"]
+
+
+def test_identical_shapes_collapse_onto_smallest_id() -> None:
+    rows = [
+        ["A3_b", "50.00", "19.90", "2"],
+        ["A3_b", "50.01", "19.91", "1"],
+        ["A1_a", "50.01", "19.91", "1"],
+        ["A1_a", "50.0", "19.9", "2"],
+        ["A2_c", "50.01", "19.91", "1"],
+        ["A2_c", "50.0", "19.9", "2"],
+        ["A2_reversed", "50.0", "19.9", "1"],
+        ["A2_reversed", "50.01", "19.91", "2"],
+        ["A4_broken", "50.01", "", "1"],
+    ]
+
+    fingerprints = shape_fingerprints(SHAPE_HEADER, rows)
+
+    assert "A4_broken" not in fingerprints
+    assert canonical_shapes(fingerprints) == {"A2_c": "A1_a", "A3_b": "A1_a"}
+
+
+def test_shape_distance_is_part_of_the_fingerprint() -> None:
+    header = [*SHAPE_HEADER, "shape_dist_traveled"]
+    rows = [
+        ["a", "50.0", "19.9", "1", "0"],
+        ["b", "50.0", "19.9", "1", "0.0"],
+        ["c", "50.0", "19.9", "1", "0.5"],
+    ]
+
+    assert canonical_shapes(shape_fingerprints(header, rows)) == {"b": "a"}
+
+
+def test_stop_pattern_fingerprints_group_trips_by_stop_sequence() -> None:
+    header = ["trip_id", "stop_id", "stop_sequence"]
+    rows = [
+        ["t1", "s1", "1"],
+        ["t1", "s2", "2"],
+        ["t2", "s1", "1"],
+        ["t2", "s2", "2"],
+        ["t3", "s2", "1"],
+        ["t3", "s1", "2"],
+    ]
+
+    patterns = stop_pattern_fingerprints(header, rows)
+
+    assert patterns["t1"] == patterns["t2"] != patterns["t3"]
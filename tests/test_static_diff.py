@@ -0,0 +1,114 @@
+from __future__ import annotations
+
+import json
+import zipfile
+from pathlib import Path
+
+import pytest
+
+from delai.processors import static_diff
+from delai.processors.static_diff import diff_static_bundles, write_static_diff
+
+
+def _write_bundle(path: Path, tables: dict[str, str]) -> Path:
+    with zipfile.ZipFile(path, "w") as archive:
+        for name, content in tables.items():
+            archive.writestr(name, content)
+    return path
+
+
+def _base_tables() -> dict[str, str]:
+    return {
+        "routes.txt": "route_id,route_short_name\nA1_r1,1\nA1_r2,2\n",
+        "stops.txt": 'stop_id,stop_name\nA1_s1,"Rondo, Mogilskie"\nA1_s2,Teatr\n',
+        "trips.txt": "route_id,service_id,trip_id\nA1_r1,A1_svc,A1_t1\nA1_r2,A1_svc,A1_t2\n",
+        "stop_times.txt": (
+            "trip_id,arrival_time,departure_time,stop_id,stop_sequence\n"
+            "A1_t1,08:00:00,08:00:00,A1_s1,1\n"
+            "A1_t1,08:05:00,08:05:00,A1_s2,2\n"
+            "A1_t2,09:00:00,09:00:00,A1_s2,1\n"
+        ),
+        "calendar_dates.txt": "service_id,date,exception_type\nA1_svc,20240601,1\n",
+    }
+
+
+def test_diff_static_bundles_reports_changes(tmp_path: Path) -> None:
+    previous = _write_bundle(tmp_path / "previous.zip", _base_tables())
+
+    tables = _base_tables()
+    tables["routes.txt"] = "route_id,route_short_name\nA1_r1,1\nA1_r3,3\n"
+    tables["stops.txt"] = 'stop_id,stop_name\nA1_s1,"Rondo, Mogilskie"\nA1_s2,Teatr Bagatela\n'
+    tables["stop_times.txt"] = tables["stop_times.txt"].replace("08:05:00", "08:06:00")
+    tables["calendar_dates.txt"] += "A1_svc,20240602,2\n"
+    current = _write_bundle(tmp_path / "current.zip", tables)
+
+    diff = diff_static_bundles(previous, current)
+
+    assert diff["changed"] is True
+    summary = diff["summary"]
+    assert summary["routes"] == {"added": ["A1_r3"], "removed": ["A1_r2"], "modified": []}
+    assert summary["stops"] == {"added": [], "removed": [], "modified": ["A1_s2"]}
+    assert summary["trips"] == {"added": [], "removed": [], "modified": ["A1_t1"]}
+    assert summary["services"]["modified"] == ["A1_svc"]
+    assert diff["tables"]["stop_times.txt"] == {"added": 0, "removed": 0, "modified": 1}
+
+
+def test_diff_static_bundles_ignores_reordered_columns(tmp_path: Path) -> None:
+    previous = _write_bundle(tmp_path / "previous.zip", _base_tables())
+
+    tables = _base_tables()
+    tables["stops.txt"] = 'stop_name,stop_id\n"Rondo, Mogilskie",A1_s1\nTeatr,A1_s2\n'
+    current = _write_bundle(tmp_path / "current.zip", tables)
+
+    output = write_static_diff(previous, current, tmp_path / "GTFS-diff.json")
+    diff = json.loads(output.read_text(encoding="utf-8"))
+
+    assert diff["changed"] is False
+    assert diff["summary"]["stops"] == {"added": [], "removed": [], "modified": []}
+
+
+def test_diff_static_bundles_skips_tables_without_key_column(tmp_path: Path) -> None:
+    tables = _base_tables()
+    tables["agency.txt"] = (
+        "agency_name,agency_url,agency_timezone\nMPK,https://mpk.example,Europe/Warsaw\n"
+    )
+    previous = _write_bundle(tmp_path / "previous.zip", tables)
+    tables["routes.txt"] += "A1_r3,3\n"
+    current = _write_bundle(tmp_path / "current.zip", tables)
+
+    diff = diff_static_bundles(previous, current)
+
+    assert diff["skipped"] == ["agency.txt"]
+    assert "agency.txt" not in diff["tables"]
+    assert diff["summary"]["routes"]["added"] == ["A1_r3"]
+
+
+@pytest.mark.parametrize("chunk_size", [7, 40, 1024 * 1024])
+def test_diff_static_bundles_ignores_chunking_and_line_endings(
+    tmp_path: Path,
+    monkeypatch: pytest.MonkeyPatch,
+    chunk_size: int,
+) -> None:
+    monkeypatch.setattr(static_diff, "_READ_CHUNK_SIZE", chunk_size)
+    rows = [
+        f'A1_s{index},"Stop, {index}"' if index % 3 else f"A1_s{index},Stop {index}"
+        for index in range(8)
+    ]
+    stops = "stop_id,stop_name\n" + "".join(f"{row}\n" for row in rows)
+
+    tables = _base_tables()
+    tables["stops.txt"] = stops
+    previous = _write_bundle(tmp_path / "previous.zip", tables)
+    tables["stops.txt"] = stops.replace("\n", "\r\n")
+    current = _write_bundle(tmp_path / "current.zip", tables)
+    assert diff_static_bundles(previous, current)["summary"]["stops"]["modified"] == []
+
+    tables["stops.txt"] = tables["stops.txt"].replace(
+        "stop_name\r\n", "stop_name\r\nA1_new,New\r\n"
+    )
+    current = _write_bundle(tmp_path / "current.zip", tables)
+    assert diff_static_bundles(previous, current)["summary"]["stops"] == {
+        "added": ["A1_new"],
+        "removed": [],
+        "modified": [],
+    }
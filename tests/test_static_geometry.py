@@ -0,0 +1,58 @@
+from __future__ import annotations
+
+import json
+import math
+import zipfile
+from pathlib import Path
+
+from delai.processors.static_geometry import build_route_geometry, encode_polyline
+
+
+def _write_bundle(path: Path) -> Path:
+    shape_rows = [
+        f"A3_sh1,{50.0 + index * 0.0005:.6f},{19.9 + math.sin(index / 5) * 0.0005:.6f},{index}"
+        for index in range(200)
+    ]
+    with zipfile.ZipFile(path, "w") as archive:
+        archive.writestr(
+            "shapes.txt",
+            "shape_id,shape_pt_lat,shape_pt_lon,shape_pt_sequence\n" + "\n".join(shape_rows) + "\n",
+        )
+        archive.writestr(
+            "trips.txt",
+            "route_id,service_id,trip_id,shape_id\nA3_r1,A3_svc,A3_t1,A3_sh1\nA3_r2,A3_svc,A3_t2,A3_sh1\n",
+        )
+    return path
+
+
+def test_encode_polyline_reference_example() -> None:
+    points = [(38.5, -120.2), (40.7, -120.95), (43.252, -126.453)]
+    assert encode_polyline(points) == "_p~iF~ps|U_ulLnnqC_mqNvxq`@"
+
+
+def test_build_route_geometry(tmp_path: Path) -> None:
+    bundle = _write_bundle(tmp_path / "GTFS.zip")
+
+    paths = build_route_geometry(bundle, tmp_path / "geometry", zoom_levels=(10, 16))
+
+    assert [path.name for path in paths] == [
+        "routes-z10.geojson",
+        "routes-z10.polyline.json",
+        "routes-z16.geojson",
+        "routes-z16.polyline.json",
+    ]
+
+    coarse = json.loads(paths[0].read_text(encoding="utf-8"))
+    fine = json.loads(paths[2].read_text(encoding="utf-8"))
+
+    coarse_feature = coarse["features"][0]
+    assert coarse_feature["properties"] == {"shape_id": "A3_sh1", "route_ids": ["A3_r1", "A3_r2"]}
+
+    coarse_coordinates = coarse_feature["geometry"]["coordinates"]
+    fine_coordinates = fine["features"][0]["geometry"]["coordinates"]
+    assert 2 <= len(coarse_coordinates) < len(fine_coordinates) < 200
+    assert coarse_coordinates[0] == [19.9, 50.0]
+
+    polylines = json.loads(paths[1].read_text(encoding="utf-8"))
+    assert polylines["shapes"][0]["shape_id"] == "A3_sh1"
+    assert polylines["shapes"][0]["polyline"]
@@ -1,12 +1,19 @@
 from __future__ import annotations
 
 import csv
+import hashlib
 import io
+import json
 import zipfile
+from datetime import date
 from pathlib import Path
 
 import pytest
 
+from delai.processors.archive import BundleCompression
+from delai.processors.static_stations import StationSettings
+from delai.processors.static_transfers import TransferSettings
+from delai.processors.static_validation import StaticValidationError
 from delai.processors.static_gtfs import (  # type: ignore[attr-defined]
     StaticFeedInput,
     consolidate_static_feeds,
@@ -107,6 +114,263 @@ def test_consolidate_static_feeds(static_dirs: list[StaticFeedInput], tmp_path:
         assert "blocks.txt" in archive.namelist()
 
 
+def test_consolidate_static_feeds_reconciles_headers(tmp_path: Path) -> None:
+    feeds = []
+    for name, agency_id, header, row in [
+        ("GTFS_KRK_A", "A1", ["trip_id", "stop_id", "stop_sequence"], ["t1", "s1", "1"]),
+        (
+            "GTFS_KRK_M",
+            "A2",
+            ["stop_sequence", "pickup_type", "stop_id", "trip_id"],
+            ["2", "1", "s2", "A2_t2"],
+        ),
+    ]:
+        directory = tmp_path / name
+        directory.mkdir()
+        _write_csv(directory / "stop_times.txt", header, [row])
+        feeds.append(StaticFeedInput(tmp_path / f"{name}.zip", directory, agency_id))
+
+    output_zip = consolidate_static_feeds(feeds, tmp_path / "GTFS.zip")
+
+    with zipfile.ZipFile(output_zip) as archive:
+        with archive.open("stop_times.txt") as handle:
+            lines = io.TextIOWrapper(handle, encoding="utf-8").read().splitlines()
+
+    assert lines == [
+        "trip_id,stop_id,stop_sequence,pickup_type",
+        "A1_t1,A1_s1,1,",
+        "A2_t2,A2_s2,2,1",
+    ]
+
+
+@pytest.mark.parametrize(
+    ("method", "compress_type"),
+    [
+        ("stored", zipfile.ZIP_STORED),
+        ("deflate", zipfile.ZIP_DEFLATED),
+        ("bzip2", zipfile.ZIP_BZIP2),
+        ("lzma", zipfile.ZIP_LZMA),
+    ],
+)
+def test_consolidate_static_feeds_compression(
+    static_dirs: list[StaticFeedInput],
+    tmp_path: Path,
+    method: str,
+    compress_type: int,
+) -> None:
+    compression = BundleCompression(method=method, workers=4)
+    output_zip = consolidate_static_feeds(static_dirs, tmp_path / "GTFS.zip", compression=compression)
+
+    with zipfile.ZipFile(output_zip) as archive:
+        assert archive.testzip() is None
+        assert archive.namelist() == sorted(archive.namelist())
+        assert {info.compress_type for info in archive.infolist()} == {compress_type}
+        assert len(_read_csv_from_zip(archive, "stop_times.txt")) == len(static_dirs)
+
+
+def test_consolidate_static_feeds_external_stop_times_sort(tmp_path: Path) -> None:
+    feeds = []
+    for name, agency_id in [("GTFS_KRK_A", "A1"), ("GTFS_KRK_T", "A3")]:
+        directory = tmp_path / name
+        directory.mkdir()
+        rows = [
+            [f"trip_{trip}", "08:00:00", "08:00:00", f"stop_{sequence}", str(sequence)]
+            for trip in (3, 1, 2)
+            for sequence in (10, 2, 1)
+        ]
+        _write_csv(
+            directory / "stop_times.txt",
+            ["trip_id", "arrival_time", "departure_time", "stop_id", "stop_sequence"],
+            rows,
+        )
+        feeds.append(StaticFeedInput(tmp_path / f"{name}.zip", directory, agency_id))
+
+    in_memory = consolidate_static_feeds(feeds, tmp_path / "memory" / "GTFS.zip")
+    external = consolidate_static_feeds(
+        feeds,
+        tmp_path / "external" / "GTFS.zip",
+        stop_times_memory_limit=1024,
+    )
+
+    with zipfile.ZipFile(in_memory) as first, zipfile.ZipFile(external) as second:
+        assert first.read("stop_times.txt") == second.read("stop_times.txt")
+        rows = _read_csv_from_zip(second, "stop_times.txt")
+
+    keys = [(row["trip_id"], int(row["stop_sequence"])) for row in rows]
+    assert keys == sorted(keys)
+    assert len(keys) == 18
+    assert not list((tmp_path / "external").glob("*.run"))
+
+
+def test_consolidate_static_feeds_window_bundle(
+    static_dirs: list[StaticFeedInput], tmp_path: Path
+) -> None:
+    expired = static_dirs[2].extracted_dir
+    _write_csv(
+        expired / "calendar.txt",
+        ["service_id", "monday", "tuesday", "wednesday", "thursday", "friday", "saturday",
+         "sunday", "start_date", "end_date"],
+        [["svc_GTFS_KRK_T", "1", "1", "1", "1", "1", "1", "1", "20230101", "20231231"]],
+    )
+    _write_csv(expired / "calendar_dates.txt", ["service_id", "date", "exception_type"], [])
+    _write_csv(
+        static_dirs[0].extracted_dir / "stops.txt",
+        ["stop_id", "stop_name", "stop_lat", "stop_lon", "parent_station"],
+        [
+            ["stop_GTFS_KRK_A", "Stop", "50.0", "19.9", "station"],
+            ["station", "Station", "50.0", "19.9", ""],
+            ["unused", "Unused", "50.0", "19.9", ""],
+        ],
+    )
+
+    output_zip = consolidate_static_feeds(
+        static_dirs,
+        tmp_path / "GTFS.zip",
+        window_days=7,
+        window_start=date(2024, 6, 3),
+    )
+    window_zip = tmp_path / "GTFS-window.zip"
+
+    with zipfile.ZipFile(output_zip) as full, zipfile.ZipFile(window_zip) as window:
+        assert window.namelist() == full.namelist()
+        assert window.read("agency.txt") == full.read("agency.txt")
+
+        trip_ids = {row["trip_id"] for row in _read_csv_from_zip(window, "trips.txt")}
+        assert len(trip_ids) == len(static_dirs) - 1
+        assert "A3_trip_GTFS_KRK_T" not in trip_ids
+        assert {row["trip_id"] for row in _read_csv_from_zip(window, "stop_times.txt")} == trip_ids
+        service_ids = {row["service_id"] for row in _read_csv_from_zip(window, "calendar.txt")}
+        assert "A3_svc_GTFS_KRK_T" not in service_ids and len(service_ids) == len(trip_ids)
+
+        route_ids = {row["route_id"] for row in _read_csv_from_zip(window, "routes.txt")}
+        assert "A3_r_GTFS_KRK_T" not in route_ids and len(route_ids) == len(trip_ids)
+        shape_ids = {row["shape_id"] for row in _read_csv_from_zip(window, "shapes.txt")}
+        assert "A3_sh_GTFS_KRK_T" not in shape_ids and len(shape_ids) == len(trip_ids)
+        stop_ids = {row["stop_id"] for row in _read_csv_from_zip(window, "stops.txt")}
+        assert "A3_stop_GTFS_KRK_T" not in stop_ids
+        assert {"A1_stop_GTFS_KRK_A", "A1_station"} <= stop_ids
+        assert "A1_unused" not in stop_ids
+
+
+def test_consolidate_static_feeds_generates_cross_agency_transfers(
+    static_dirs: list[StaticFeedInput], tmp_path: Path
+) -> None:
+    output_zip = consolidate_static_feeds(
+        static_dirs,
+        tmp_path / "GTFS.zip",
+        transfers=TransferSettings(max_distance=50),
+    )
+
+    with zipfile.ZipFile(output_zip) as archive:
+        transfers = _read_csv_from_zip(archive, "transfers.txt")
+
+    pairs = {(row["from_stop_id"], row["to_stop_id"]) for row in transfers}
+    assert len(transfers) == len(pairs) == len(static_dirs) * (len(static_dirs) - 1)
+    assert ("A1_stop_GTFS_KRK_A", "A5_stop_ald-gtfs") in pairs
+    assert all(row["transfer_type"] == "2" and row["min_transfer_time"] == "60" for row in transfers)
+
+
+def test_consolidate_static_feeds_groups_stops_into_stations(
+    static_dirs: list[StaticFeedInput], tmp_path: Path
+) -> None:
+    output_zip = consolidate_static_feeds(
+        static_dirs,
+        tmp_path / "GTFS.zip",
+        stations=StationSettings(max_distance=50),
+    )
+
+    with zipfile.ZipFile(output_zip) as archive:
+        stops = _read_csv_from_zip(archive, "stops.txt")
+
+    stations = [row for row in stops if row["location_type"] == "1"]
+    assert [row["stop_id"] for row in stations] == ["ST_A1_stop_GTFS_KRK_A"]
+    assert {row["parent_station"] for row in stops if row["location_type"] != "1"} == {
+        "ST_A1_stop_GTFS_KRK_A"
+    }
+    assert len(stops) == len(static_dirs) + 1
+
+    report = json.loads((tmp_path / "GTFS-stations.json").read_text(encoding="utf-8"))
+    assert report["stations"] == 1
+    assert report["clustered_stops"] == len(static_dirs)
+
+
+def test_consolidate_static_feeds_deduplicates_shapes(
+    static_dirs: list[StaticFeedInput], tmp_path: Path
+) -> None:
+    output_zip = consolidate_static_feeds(
+        static_dirs,
+        tmp_path / "GTFS.zip",
+        deduplicate_shapes=True,
+    )
+
+    with zipfile.ZipFile(output_zip) as archive:
+        shapes = _read_csv_from_zip(archive, "shapes.txt")
+        trips = _read_csv_from_zip(archive, "trips.txt")
+
+    assert [row["shape_id"] for row in shapes] == ["A1_sh_GTFS_KRK_A"]
+    assert {row["shape_id"] for row in trips} == {"A1_sh_GTFS_KRK_A"}
+    assert len(trips) == len(static_dirs)
+
+
+def test_consolidate_static_feeds_validates_references(
+    static_dirs: list[StaticFeedInput], tmp_path: Path
+) -> None:
+    output_zip = consolidate_static_feeds(static_dirs, tmp_path / "GTFS.zip")
+    report_path = tmp_path / "GTFS-validation.json"
+    assert json.loads(report_path.read_text(encoding="utf-8"))["valid"] is True
+    published = output_zip.read_bytes()
+
+    _write_csv(
+        static_dirs[0].extracted_dir / "stop_times.txt",
+        ["trip_id", "arrival_time", "departure_time", "stop_id", "stop_sequence"],
+        [["trip_GTFS_KRK_A", "08:00:00", "08:00:00", "missing", "1"]],
+    )
+
+    with pytest.raises(StaticValidationError):
+        consolidate_static_feeds(static_dirs, output_zip, strict_validation=True)
+
+    assert output_zip.read_bytes() == published
+    report = json.loads(report_path.read_text(encoding="utf-8"))
+    assert report["dangling"] == [
+        {
+            "table": "stop_times.txt",
+            "column": "stop_id",
+            "target": "stop_id",
+            "count": 1,
+            "samples": ["A1_missing"],
+        }
+    ]
+
+
+def test_consolidate_static_feeds_is_reproducible(
+    static_dirs: list[StaticFeedInput], tmp_path: Path
+) -> None:
+    first = consolidate_static_feeds(static_dirs, tmp_path / "first" / "GTFS.zip")
+    second = consolidate_static_feeds(
+        static_dirs,
+        tmp_path / "second" / "GTFS.zip",
+        compression=BundleCompression(workers=1),
+    )
+
+    assert first.read_bytes() == second.read_bytes()
+    with zipfile.ZipFile(first) as archive:
+        assert {info.date_time for info in archive.infolist()} == {(1980, 1, 1, 0, 0, 0)}
+
+    digest = hashlib.sha256(first.read_bytes()).hexdigest()
+    sidecar = first.with_name("GTFS.zip.sha256")
+    assert sidecar.read_text(encoding="utf-8") == f"{digest}  GTFS.zip\n"
+
+    modified = first.stat().st_mtime_ns
+    inode = first.stat().st_ino
+    consolidate_static_feeds(static_dirs, first)
+    assert (first.stat().st_mtime_ns, first.stat().st_ino) == (modified, inode)
+
+
+def test_bundle_compression_rejects_unknown_method() -> None:
+    with pytest.raises(ValueError):
+        BundleCompression(method="zstd")
+
+
 def test_determine_agency_id_default(tmp_path: Path) -> None:
     assert determine_agency_id(tmp_path / "GTFS_KRK_A.zip", 0) == "A1"
     assert determine_agency_id(tmp_path / "GTFS_KRK_M.zip", 1) == "A2"
@@ -0,0 +1,65 @@
+from __future__ import annotations
+
+import zipfile
+from pathlib import Path
+
+from delai.processors.static_search import (
+    build_stop_search_index,
+    load_stop_search_index,
+    write_stop_search_index,
+)
+
+
+def _write_bundle(path: Path) -> Path:
+    with zipfile.ZipFile(path, "w") as archive:
+        archive.writestr(
+            "stops.txt",
+            "stop_id,stop_name,stop_lat,stop_lon,location_type\n"
+            "A3_1,Łagiewniki,50.0280,19.9340,\n"
+            "A3_2,Łagiewniki,50.0282,19.9342,\n"
+            "A4_1,Kraków Łagiewniki,50.0270,19.9350,0\n"
+            "A3_3,Łagiewniki SKA,50.0275,19.9352,\n"
+            "A3_4,Rondo Grunwaldzkie,50.0480,19.9330,\n"
+            "ST_A3_1,Łagiewniki,50.0281,19.9341,1\n",
+        )
+        archive.writestr(
+            "trips.txt",
+            "route_id,service_id,trip_id\nA3_r1,s,A3_t1\nA3_r2,s,A3_t2\nA4_r9,s,A4_t9\n",
+        )
+        archive.writestr(
+            "stop_times.txt",
+            "trip_id,stop_id,stop_sequence\n"
+            "A3_t1,A3_1,1\nA3_t1,A3_4,2\nA3_t2,A3_2,1\nA4_t9,A4_1,1\nA3_t2,A3_3,2\n",
+        )
+    return path
+
+
+def test_stop_search_folds_diacritics_and_ranks_by_routes(tmp_path: Path) -> None:
+    index = build_stop_search_index(_write_bundle(tmp_path / "GTFS.zip"))
+
+    results = index.search("lagiew")
+    assert [entry.name for entry in results] == ["Łagiewniki", "Kraków Łagiewniki", "Łagiewniki SKA"]
+    assert results[0].stop_ids == ("A3_1", "A3_2")
+    assert results[0].routes == 2
+
+    assert [entry.name for entry in index.search("ŁAGIEWNIKI krak")] == ["Kraków Łagiewniki"]
+    assert [entry.name for entry in index.search("grunw", limit=1)] == ["Rondo Grunwaldzkie"]
+    assert index.search("niki") == []
+    assert index.search("  ") == []
+
+
+def test_stop_search_index_is_rebuilt_only_for_new_bundles(tmp_path: Path) -> None:
+    bundle = _write_bundle(tmp_path / "GTFS.zip")
+    (tmp_path / "GTFS.zip.sha256").write_text("digest-1  GTFS.zip\n", encoding="utf-8")
+
+    index_path = write_stop_search_index(bundle)
+    assert index_path == tmp_path / "GTFS-stops-search.json"
+    assert len(load_stop_search_index(index_path).entries) == 4
+
+    modified = index_path.stat().st_mtime_ns
+    write_stop_search_index(bundle)
+    assert index_path.stat().st_mtime_ns == modified
+
+    (tmp_path / "GTFS.zip.sha256").write_text("digest-2  GTFS.zip\n", encoding="utf-8")
+    write_stop_search_index(bundle)
+    assert index_path.stat().st_mtime_ns != modified
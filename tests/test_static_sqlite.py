@@ -0,0 +1,68 @@
+from __future__ import annotations
+
+import sqlite3
+import zipfile
+from pathlib import Path
+
+from delai.processors.static_sqlite import build_sqlite_index
+
+
+def _write_bundle(path: Path) -> Path:
+    with zipfile.ZipFile(path, "w") as archive:
+        archive.writestr(
+            "stops.txt",
+            "stop_id,stop_name,stop_lat,stop_lon,parent_station\n"
+            "A1_s1,Rondo,50.06,19.94,\n"
+            "A3_s2,Rondo,50.07,19.95,A1_s1\n",
+        )
+        archive.writestr(
+            "stop_times.txt",
+            "trip_id,arrival_time,departure_time,stop_id,stop_sequence\n"
+            "A1_t1,08:00:00,08:00:00,A1_s1,2\n"
+            "A1_t1,07:55:00,07:55:00,A3_s2,1\n"
+            "A3_t2,09:00:00,09:00:00,A1_s1,1\n",
+        )
+        archive.writestr("trips.txt", "route_id,service_id,trip_id\nA1_r1,A1_svc,A1_t1\n")
+    return path
+
+
+def test_build_sqlite_index(tmp_path: Path) -> None:
+    bundle = _write_bundle(tmp_path / "GTFS.zip")
+
+    database = build_sqlite_index(bundle)
+
+    assert database == tmp_path / "GTFS.sqlite"
+
+    connection = sqlite3.connect(database)
+    try:
+        trips = connection.execute(
+            "SELECT trip_id FROM stop_times WHERE stop_id = ? ORDER BY trip_id",
+            ("A1_s1",),
+        ).fetchall()
+        assert trips == [("A1_t1",), ("A3_t2",)]
+
+        lat, parent = connection.execute(
+            "SELECT stop_lat, parent_station FROM stops WHERE stop_id = 'A1_s1'"
+        ).fetchone()
+        assert isinstance(lat, float)
+        assert parent is None
+
+        sequences = connection.execute(
+            "SELECT stop_sequence FROM stop_times WHERE trip_id = 'A1_t1' ORDER BY stop_sequence"
+        ).fetchall()
+        assert sequences == [(1,), (2,)]
+
+        indexes = {
+            row[0]
+            for row in connection.execute("SELECT name FROM sqlite_master WHERE type = 'index'")
+        }
+        assert {
+            "idx_stop_times_trip_id",
+            "idx_stop_times_stop_id",
+            "idx_stops_stop_id",
+            "idx_trips_trip_id",
+            "idx_trips_route_id",
+            "idx_trips_service_id",
+        } <= indexes
+    finally:
+        connection.close()
@@ -0,0 +1,52 @@
+from __future__ import annotations
+
+from delai.processors.static_stations import (
+    ClusterStop,
+    StationSettings,
+    cluster_statistics,
+    cluster_stops,
+    normalize_stop_name,
+)
+
+
+def test_normalize_stop_name_folds_polish_diacritics() -> None:
+    assert normalize_stop_name("Kraków Główny") == "krakow glowny"
+    assert normalize_stop_name("KRAKÓW-GŁÓWNY ") == "krakow glowny"
+    assert normalize_stop_name("Łagiewniki (SKA)") == "lagiewniki ska"
+
+
+def test_cluster_stops_groups_nearby_stops_of_different_agencies() -> None:
+    stops = [
+        ClusterStop("A3_100", "A3", "Łagiewniki", 50.0280, 19.9340),
+        ClusterStop("A3_101", "A3", "Łagiewniki", 50.0282, 19.9342),
+        ClusterStop("A4_9", "A4", "Lagiewniki", 50.0284, 19.9338),
+        ClusterStop("A1_7", "A1", "Rondo Matecznego", 50.0285, 19.9340),
+        ClusterStop("A1_8", "A1", "Łagiewniki", 50.0400, 19.9340),
+        ClusterStop("A2_5", "A2", "Bieżanów", 50.0200, 20.0300),
+        ClusterStop("A3_6", "A3", "Bieżanów", 50.0201, 20.0301),
+        ClusterStop("A3_7", "A3", "Bieżanów", 50.0202, 20.0302),
+    ]
+
+    clusters = cluster_stops(stops, StationSettings(max_distance=60))
+
+    assert [cluster.station_id for cluster in clusters] == ["ST_A2_5", "ST_A3_100"]
+    lagiewniki = clusters[1]
+    assert [member.stop_id for member in lagiewniki.members] == ["A3_100", "A3_101", "A4_9"]
+    assert lagiewniki.name == "Łagiewniki"
+    assert lagiewniki.agencies == ("A3", "A4")
+    assert lagiewniki.spread < 60
+
+    statistics = cluster_statistics(clusters, len(stops))
+    assert statistics["stations"] == 2
+    assert statistics["clustered_stops"] == 6
+    assert statistics["agencies_per_station"] == {2: 2}
+
+
+def test_cluster_stops_requires_multiple_agencies() -> None:
+    stops = [
+        ClusterStop("A3_1", "A3", "Wawel", 50.0540, 19.9360),
+        ClusterStop("A3_2", "A3", "Wawel", 50.0541, 19.9361),
+    ]
+
+    assert cluster_stops(stops, StationSettings()) == []
+    assert len(cluster_stops(stops, StationSettings(min_agencies=1))) == 1
@@ -0,0 +1,53 @@
+from __future__ import annotations
+
+import itertools
+import random
+
+import pytest
+
+from delai.processors.spatial import haversine_distance, iter_nearby_pairs
+from delai.processors.static_transfers import TransferSettings, TransferStop, generate_transfers
+
+
+def test_iter_nearby_pairs_matches_brute_force() -> None:
+    generator = random.Random(7)
+    points = [
+        (50.06 + generator.uniform(-0.01, 0.01), 19.94 + generator.uniform(-0.015, 0.015))
+        for _ in range(300)
+    ]
+
+    found = {(first, second) for first, second, _ in iter_nearby_pairs(points, 150)}
+    expected = {
+        (first, second)
+        for first, second in itertools.combinations(range(len(points)), 2)
+        if haversine_distance(*points[first], *points[second]) <= 150
+    }
+
+    assert found == expected
+    assert expected
+
+
+def test_generate_transfers_links_only_other_agencies() -> None:
+    stops = [
+        TransferStop("A1_rail", "A1", 50.0680, 19.9470),
+        TransferStop("A3_tram", "A3", 50.0685, 19.9470),
+        TransferStop("A3_tram_far", "A3", 50.0800, 19.9470),
+        TransferStop("A1_other", "A1", 50.0681, 19.9470),
+    ]
+
+    rows = list(generate_transfers(stops, TransferSettings(max_distance=100)))
+
+    assert [row[:2] for row in rows] == [
+        ("A1_other", "A3_tram"),
+        ("A1_rail", "A3_tram"),
+        ("A3_tram", "A1_other"),
+        ("A3_tram", "A1_rail"),
+    ]
+    # 55.6 m * 1.3 / 1.2 m/s, rounded up
+    assert rows[1][2:] == ("2", "61")
+
+
+def test_transfer_settings_validation() -> None:
+    assert TransferSettings().walking_time(10) == 60
+    with pytest.raises(ValueError):
+        TransferSettings(max_distance=0)
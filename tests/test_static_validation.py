@@ -0,0 +1,63 @@
+from __future__ import annotations
+
+import csv
+import io
+from typing import Iterator
+
+from delai.processors.static_validation import validate_references
+
+TABLES = {
+    "agency.txt": "agency_id,agency_name\nA1,MPK\n",
+    "calendar_dates.txt": "service_id,date,exception_type\nA1_svc,20261019,1\n",
+    "stops.txt": (
+        "stop_id,stop_name,parent_station\n"
+        "A1_platform,Platform,A1_station\n"
+        "A1_station,Station,\n"
+        "A1_orphan,Orphan,A1_gone\n"
+    ),
+    "routes.txt": "route_id,agency_id\nA1_r1,A1\nA1_r2,A9\n",
+    "trips.txt": (
+        "route_id,service_id,trip_id,shape_id\n"
+        "A1_r1,A1_svc,A1_t1,\n"
+        "A1_r1,A1_missing,A1_t2,A1_shape\n"
+    ),
+    "stop_times.txt": (
+        "trip_id,stop_id,stop_sequence\n"
+        "A1_t1,A1_platform,1\n"
+        "A1_t1,A1_nowhere,2\n"
+        "A1_t3,A1_platform,1\n"
+        "A1_t3,,2\n"
+    ),
+}
+
+
+def _reader(name: str) -> Iterator[list[str]]:
+    if name in TABLES:
+        yield from csv.reader(io.StringIO(TABLES[name]))
+
+
+def test_validate_references_reports_dangling_keys() -> None:
+    report = validate_references(_reader)
+
+    assert not report.valid
+    assert report.rows["stop_times.txt"] == 4
+    found = {
+        (reference.table, reference.column): (reference.count, reference.samples)
+        for reference in report.dangling
+    }
+    assert found == {
+        ("stops.txt", "parent_station"): (1, ["A1_gone"]),
+        ("routes.txt", "agency_id"): (1, ["A9"]),
+        ("trips.txt", "service_id"): (1, ["A1_missing"]),
+        ("trips.txt", "shape_id"): (1, ["A1_shape"]),
+        ("stop_times.txt", "trip_id"): (2, ["A1_t3"]),
+        ("stop_times.txt", "stop_id"): (2, ["", "A1_nowhere"]),
+    }
+    assert report.to_payload()["valid"] is False
+
+
+def test_validate_references_accepts_consistent_bundle() -> None:
+    report = validate_references(lambda name: _reader(name) if name == "agency.txt" else iter(()))
+
+    assert report.valid
+    assert report.rows == {"agency.txt": 1}